@@ -12,11 +12,13 @@ from ai_agent import ai_agent
 from dpp_nft import DPPGenerator, NFTIntegration, DPPStorage
 from blockchain_integration import BlockchainDPPIntegration, DPPBlockchainStorage
 from database_manager import db_manager
+from database_setup import DatabaseSetup
 from auth_manager import AuthManager
 from security_middleware import SecurityMiddleware, require_auth, require_csrf
 from co2_calculator import co2_calculator
 from settings_manager import SettingsManager
 from export_manager import ExportManager
+from suggest_index import SuggestIndex, KINDS as SUGGEST_KINDS
 
 app = Flask(__name__)
 
@@ -36,11 +38,69 @@ security = SecurityMiddleware(app)
 # Export Manager'ı başlat
 export_manager = ExportManager()
 
+# Mevcut veritabanlarında eksik indeksleri ve istatistik tablosunu oluştur (migration)
+try:
+    schema_setup = DatabaseSetup(db_manager.db_path)
+    created_indexes = schema_setup.create_indexes()
+    if created_indexes:
+        print(f"✅ Veritabanı indeksleri oluşturuldu: {', '.join(created_indexes)}")
+    if schema_setup.create_stats_tables():
+        print("✅ Veritabanı istatistik tablosu oluşturuldu")
+except Exception as e:
+    print(f"⚠️ Veritabanı migration'ı yapılamadı: {e}")
+
+# Typeahead öneri indeksini başlangıçta oluştur (sorgular SQLite'a gitmez)
+suggest_index = SuggestIndex(db_manager)
+try:
+    suggest_index.refresh()
+except Exception as e:
+    print(f"⚠️ Öneri indeksi oluşturulamadı, ilk istekte denenecek: {e}")
+
 # Veri dosyaları için klasör
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
+
+def _page_args() -> dict:
+    """
+    Liste endpoint'lerinin ortak sorgu parametreleri
+    Query: fields=a,b - kolonlar, sort=a,-b - sıralama, limit - sayfa boyutu,
+    cursor - önceki yanıttaki next_cursor
+    """
+    page = {}
+    if request.args.get('fields'):
+        page['fields'] = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+    if request.args.get('sort'):
+        page['sort'] = request.args['sort']
+    if request.args.get('limit'):
+        page['limit'] = int(request.args['limit'])
+    if request.args.get('cursor'):
+        page['cursor'] = request.args['cursor']
+    return page
+
+
+def _list_response(key: str, result, **extra):
+    """Liste yanıtı; sayfalı sonuçta next_cursor ve has_more eklenir"""
+    payload = {'success': True}
+    if isinstance(result, dict):
+        payload[key] = result['items']
+        payload['count'] = len(result['items'])
+        payload['next_cursor'] = result['next_cursor']
+        payload['has_more'] = result['has_more']
+    else:
+        payload[key] = result
+        payload['count'] = len(result)
+    payload.update(extra)
+    return jsonify(payload)
+
+
+def _invalid_parameter(error: ValueError):
+    return jsonify({
+        'success': False,
+        'error': f'Geçersiz parametre: {str(error)}'
+    }), 400
+
 @app.route('/')
 def index():
     """Ana sayfa - Kullanıcı durumuna göre yönlendirme"""
@@ -564,12 +624,13 @@ def get_blockchain_stats():
 
 @app.route('/api/database/stats')
 def get_database_stats():
-    """Veritabanı istatistiklerini getir"""
+    """Veritabanı istatistiklerini getir (DB_STATS_TTL saniyelik önbellekten)"""
     try:
         stats = db_manager.get_database_stats()
         return jsonify({
             'success': True,
-            'stats': stats
+            'stats': stats,
+            'generated_at': stats['generated_at']
         })
     except Exception as e:
         return jsonify({
@@ -582,12 +643,10 @@ def get_finished_product_operations():
     """Bitmiş ürün işlemlerini getir"""
     try:
         category = request.args.get('category')
-        operations = db_manager.get_finished_product_operations(category)
-        return jsonify({
-            'success': True,
-            'operations': operations,
-            'count': len(operations)
-        })
+        operations = db_manager.get_finished_product_operations(category, **_page_args())
+        return _list_response('operations', operations)
+    except ValueError as e:
+        return _invalid_parameter(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -599,12 +658,10 @@ def get_garment_processes():
     """Konfeksiyon süreçlerini getir"""
     try:
         category = request.args.get('category')
-        processes = db_manager.get_garment_processes(category)
-        return jsonify({
-            'success': True,
-            'processes': processes,
-            'count': len(processes)
-        })
+        processes = db_manager.get_garment_processes(category, **_page_args())
+        return _list_response('processes', processes)
+    except ValueError as e:
+        return _invalid_parameter(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -617,12 +674,10 @@ def get_master_co2_data():
     try:
         category = request.args.get('category')
         operation = request.args.get('operation')
-        co2_data = db_manager.get_master_co2_data(category, operation)
-        return jsonify({
-            'success': True,
-            'co2_data': co2_data,
-            'count': len(co2_data)
-        })
+        co2_data = db_manager.get_master_co2_data(category, operation, **_page_args())
+        return _list_response('co2_data', co2_data)
+    except ValueError as e:
+        return _invalid_parameter(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -672,6 +727,50 @@ def search_operations():
             'error': str(e)
         }), 500
 
+@app.route('/api/suggest')
+def suggest():
+    """
+    Yazarken öneri (typeahead)
+    Query: q - önek, limit - öneri sayısı, kind - fabric_type,composition,operation,category
+    """
+    try:
+        query = request.args.get('q', '')
+        if not query.strip():
+            return jsonify({
+                'success': False,
+                'error': 'Arama terimi gerekli'
+            }), 400
+        
+        limit = int(request.args.get('limit', 10))
+        if limit < 1:
+            raise ValueError('limit pozitif olmalı')
+        
+        kinds = None
+        if request.args.get('kind'):
+            kinds = [kind.strip() for kind in request.args['kind'].split(',') if kind.strip()]
+            unknown = [kind for kind in kinds if kind not in SUGGEST_KINDS]
+            if unknown:
+                raise ValueError(f"Bilinmeyen tür(ler): {', '.join(unknown)}")
+        
+        suggestions = suggest_index.suggest(query, limit=limit, kinds=kinds)
+        
+        return jsonify({
+            'success': True,
+            'query': query,
+            'suggestions': suggestions,
+            'count': len(suggestions)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Geçersiz parametre: {str(e)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/calculate-co2', methods=['POST'])
 @require_auth
 @require_csrf
@@ -730,26 +829,113 @@ def calculate_total_co2():
             'error': f'CO₂ hesaplama hatası: {str(e)}'
         }), 500
 
-@app.route('/api/co2-items')
+@app.route('/api/calculate-co2/batch', methods=['POST'])
 @require_auth
-def get_co2_items():
+@require_csrf
+def calculate_total_co2_batch():
     """
-    Mevcut kumaş, aksesuar ve işlemleri listele
+    Toplu CO₂ hesaplama endpoint'i (koleksiyon bazında)
+    Input: boms[] - her biri fabric_id, accessory_ids[], process_ids[], quantities, style_code
+    Output: stil bazında breakdown + koleksiyon toplamları
     """
     try:
-        items = co2_calculator.get_available_items()
+        data = request.get_json() or {}
+        boms = data.get('boms', [])
+        
+        # Validation
+        if not isinstance(boms, list) or not boms:
+            return jsonify({
+                'success': False,
+                'error': 'En az bir ürün ağacı (BOM) gönderilmeli'
+            }), 400
         
-        if 'error' in items:
+        max_items = int(os.getenv('CO2_BATCH_MAX_ITEMS', '1000'))
+        if len(boms) > max_items:
             return jsonify({
                 'success': False,
-                'error': items['error']
+                'error': f'Tek istekte en fazla {max_items} BOM hesaplanabilir'
+            }), 400
+        
+        normalized = []
+        for index, bom in enumerate(boms):
+            if not isinstance(bom, dict):
+                raise ValueError(f'{index}. BOM bir nesne olmalı')
+            if not bom.get('fabric_id') and not bom.get('accessory_ids') and not bom.get('process_ids'):
+                return jsonify({
+                    'success': False,
+                    'error': f'{index}. BOM için en az bir kumaş, aksesuar veya işlem seçilmeli'
+                }), 400
+            normalized.append({
+                'style_code': bom.get('style_code'),
+                'fabric_id': bom.get('fabric_id'),
+                'fabric_quantity_kg': float(bom.get('fabric_quantity_kg', 1.0)),
+                'accessory_ids': bom.get('accessory_ids', []),
+                'accessory_quantities': [float(q) for q in bom.get('accessory_quantities', [])],
+                'process_ids': bom.get('process_ids', [])
+            })
+        
+        # Toplu CO₂ hesaplama (vectorized: yalnızca toplamlar, NumPy motoru).
+        # Monte Carlo bantları opsiyonel: {"samples": 10000, "seed": 42}; ayarlar ve
+        # örnek sınırı hesaplayıcıda doğrulanır (ValueError -> 400)
+        result = co2_calculator.calculate_many(
+            normalized,
+            vectorized=bool(data.get('vectorized', False)),
+            uncertainty=data.get('uncertainty')
+        )
+        
+        # Hata kontrolü
+        if 'error' in result:
+            return jsonify({
+                'success': False,
+                'error': result['error']
             }), 500
         
         return jsonify({
             'success': True,
-            'data': items
+            'data': result
         })
         
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'success': False,
+            'error': f'Geçersiz parametre: {str(e)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Toplu CO₂ hesaplama hatası: {str(e)}'
+        }), 500
+
+@app.route('/api/co2-items')
+@require_auth
+def get_co2_items():
+    """
+    Mevcut kumaş, aksesuar ve işlemleri listele
+    Query: fields=id,fabric_type,... - yalnızca istenen kolonlar
+    Önbellekteki katalog ETag ile döner; If-None-Match eşleşirse 304
+    """
+    try:
+        fields = request.args.get('fields')
+        if fields:
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
+        
+        body, etag = co2_calculator.get_items_snapshot(fields or None)
+        
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(body)
+            response.mimetype = 'application/json'
+        response.set_etag(etag)
+        # Kimlik doğrulamalı veri: tarayıcıda tutulur, her seferinde doğrulanır
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Geçersiz parametre: {str(e)}'
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -758,7 +944,14 @@ def get_co2_items():
 
 @app.route('/api/co2-calculator', methods=['POST'])
 def calculate_co2():
-    """CO2 hesaplama"""
+    """
+    CO2 hesaplama
+    
+    Yanıttaki calculation, kayıt commit edildiyse calculation_id içerir.
+    WRITE_BEHIND_DURABILITY=async iken kayıt arka planda yazıldığı için
+    calculation_id yerine "queued": true döner; ID /api/co2-calculations
+    geçmişinden alınabilir.
+    """
     try:
         data = request.get_json()
         product_name = data.get('product_name', '')
@@ -805,6 +998,50 @@ def get_co2_calculations():
             'error': str(e)
         }), 500
 
+@app.route('/api/co2-factors/recalculate', methods=['POST'])
+@require_auth
+@require_csrf
+def recalculate_factor_dependents():
+    """
+    Değişen emisyon faktörlerine bağlı kayıtlı hesaplamaları yeniden hesapla
+    Input: factors[] - her biri table, id ve opsiyonel düzeltilmiş co2_min/co2_max
+    Output: güncellenen hesaplama/stil işlemi sayıları ve toplam değişim
+    """
+    try:
+        data = request.get_json() or {}
+        factors = data.get('factors', [])
+        
+        if not isinstance(factors, list) or not factors:
+            return jsonify({
+                'success': False,
+                'error': 'En az bir faktör gönderilmeli'
+            }), 400
+        
+        for factor in factors:
+            if not isinstance(factor, dict):
+                raise ValueError('Her faktör bir nesne olmalı')
+            for key in ('co2_min', 'co2_max'):
+                if factor.get(key) is not None:
+                    factor[key] = float(factor[key])
+        
+        report = db_manager.recalculate_factor_dependents(factors)
+        
+        return jsonify({
+            'success': True,
+            'data': report
+        })
+        
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'success': False,
+            'error': f'Geçersiz parametre: {str(e)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Yeniden hesaplama hatası: {str(e)}'
+        }), 500
+
 @app.route('/api/operations/by-product-group')
 def get_operations_by_product_group():
     """Ürün grubuna göre işlemleri getir"""
@@ -816,13 +1053,10 @@ def get_operations_by_product_group():
                 'error': 'Ürün grubu gerekli'
             }), 400
         
-        operations = db_manager.get_operations_by_product_group(product_group)
-        return jsonify({
-            'success': True,
-            'operations': operations,
-            'count': len(operations),
-            'product_group': product_group
-        })
+        operations = db_manager.get_operations_by_product_group(product_group, **_page_args())
+        return _list_response('operations', operations, product_group=product_group)
+    except ValueError as e:
+        return _invalid_parameter(e)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -838,14 +1072,12 @@ def get_master_konfeksiyon():
         category = request.args.get('category')
         name = request.args.get('name')
         
-        data = db_manager.get_master_konfeksiyon_data(category, name)
+        data = db_manager.get_master_konfeksiyon_data(category, name, **_page_args())
         
-        return jsonify({
-            'success': True,
-            'data': data,
-            'count': len(data)
-        })
+        return _list_response('data', data)
         
+    except ValueError as e:
+        return _invalid_parameter(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -858,14 +1090,13 @@ def get_fabric_co2():
         product = request.args.get('product')
         fabric_type = request.args.get('fabric_type')
         
-        data = db_manager.get_product_fabric_co2_data(gender, category, product, fabric_type)
+        data = db_manager.get_product_fabric_co2_data(gender, category, product, fabric_type,
+                                                      **_page_args())
         
-        return jsonify({
-            'success': True,
-            'data': data,
-            'count': len(data)
-        })
+        return _list_response('data', data)
         
+    except ValueError as e:
+        return _invalid_parameter(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -961,6 +1192,35 @@ def save_style_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/save-styles', methods=['POST'])
+def save_styles():
+    """
+    Stilleri toplu kaydet (sezon içe aktarımı)
+    Body: {"styles": [save-style-data formatında stiller]}; aynı style_code güncellenir
+    """
+    try:
+        data = request.get_json()
+        styles = data.get('styles') if isinstance(data, dict) else None
+        
+        if not isinstance(styles, list) or not styles:
+            return jsonify({'error': 'Veri bulunamadı'}), 400
+        max_items = int(os.getenv('STYLE_IMPORT_MAX_ITEMS', '5000'))
+        if len(styles) > max_items:
+            return jsonify({'error': f'Tek istekte en fazla {max_items} stil kaydedilebilir'}), 400
+        if not all(isinstance(style, dict) and style.get('styleCode') for style in styles):
+            return jsonify({'error': 'Her stil için styleCode gerekli'}), 400
+        
+        style_ids = db_manager.save_styles(styles)
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(style_ids)} stil başarıyla kaydedildi',
+            'style_ids': style_ids
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/get-style-data/<style_code>')
 def get_style_data(style_code):
     """Stil verilerini getir"""
@@ -982,20 +1242,18 @@ def get_style_data(style_code):
 def get_all_styles():
     """Tüm stilleri listele"""
     try:
-        styles = db_manager.get_all_styles()
+        styles = db_manager.get_all_styles(**_page_args())
         
-        return jsonify({
-            'success': True,
-            'styles': styles,
-            'count': len(styles)
-        })
+        return _list_response('styles', styles)
         
+    except ValueError as e:
+        return _invalid_parameter(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/co2-range/<category>')
 def get_co2_range(category):
-    """Kategoriye göre CO2 aralığını getirir"""
+    """Kategoriye göre CO2 aralığını getirir (özet tablodan; tam eşleşme yoksa içeren kategoriler)"""
     try:
         co2_range = db_manager.get_co2_range_by_category(category)
         
@@ -1487,9 +1745,13 @@ def get_collections():
 
 @app.route('/api/styles-by-collection/<collection>')
 def get_styles_by_collection(collection):
-    """Koleksiyona göre stilleri getirir"""
+    """
+    Koleksiyona göre stilleri getirir
+    Query: full=1 - stilleri lif ve işlemleriyle birlikte döndür
+    """
     try:
-        styles = db_manager.get_styles_by_collection(collection)
+        full = request.args.get('full', '').lower() in ('1', 'true', 'yes')
+        styles = db_manager.get_styles_by_collection(collection, full=full)
         return jsonify({
             'success': True,
             'styles': styles
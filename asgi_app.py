@@ -0,0 +1,168 @@
+"""
+Zero@Design - ASGI CO₂ Hesaplama API'si
+Flask uygulamasından bağımsız, asyncio tabanlı hesaplama servisi.
+
+Çalıştırma:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8001 --workers 4
+
+İstekler `Authorization: Bearer <CO2_API_TOKEN>` başlığı ile doğrulanır.
+"""
+
+import hmac
+import json
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from async_co2_calculator import AsyncCO2Calculator
+from co2_calculator import _json_default
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = int(os.getenv('CO2_API_MAX_BODY_BYTES', str(5 * 1024 * 1024)))
+
+async_calculator = AsyncCO2Calculator()
+
+
+def _normalize_bom(bom: Dict, label: str = 'BOM') -> Dict:
+    """İstek gövdesindeki BOM alanlarını doğrula ve tiplerini düzelt"""
+    if not isinstance(bom, dict):
+        raise ValueError(f'{label} bir nesne olmalı')
+    if not bom.get('fabric_id') and not bom.get('accessory_ids') and not bom.get('process_ids'):
+        raise ValueError(f'{label} için en az bir kumaş, aksesuar veya işlem seçilmeli')
+    return {
+        'style_code': bom.get('style_code'),
+        'fabric_id': bom.get('fabric_id'),
+        'fabric_quantity_kg': float(bom.get('fabric_quantity_kg', 1.0)),
+        'accessory_ids': bom.get('accessory_ids', []),
+        'accessory_quantities': [float(q) for q in bom.get('accessory_quantities', [])],
+        'process_ids': bom.get('process_ids', [])
+    }
+
+
+async def calculate_total_co2(data: Dict) -> Tuple[int, Dict]:
+    """POST /api/calculate-co2 - Flask endpoint'i ile aynı girdi/çıktı"""
+    bom = _normalize_bom(data)
+    result = await async_calculator.calculate_total_co2(
+        fabric_id=bom['fabric_id'],
+        fabric_quantity_kg=bom['fabric_quantity_kg'],
+        accessory_ids=bom['accessory_ids'],
+        accessory_quantities=bom['accessory_quantities'],
+        process_ids=bom['process_ids']
+    )
+    if 'error' in result:
+        return 500, {'success': False, 'error': result['error']}
+    return 200, {'success': True, 'data': result}
+
+
+async def calculate_total_co2_batch(data: Dict) -> Tuple[int, Dict]:
+    """POST /api/calculate-co2/batch - Flask endpoint'i ile aynı girdi/çıktı"""
+    boms = data.get('boms', [])
+    if not isinstance(boms, list) or not boms:
+        raise ValueError('En az bir ürün ağacı (BOM) gönderilmeli')
+    max_items = int(os.getenv('CO2_BATCH_MAX_ITEMS', '1000'))
+    if len(boms) > max_items:
+        raise ValueError(f'Tek istekte en fazla {max_items} BOM hesaplanabilir')
+
+    normalized = [_normalize_bom(bom, f'{index}. BOM') for index, bom in enumerate(boms)]
+
+    # uncertainty, samples sınırı dahil hesaplayıcıda doğrulanır (ValueError -> 400)
+    result = await async_calculator.calculate_many(
+        normalized, vectorized=bool(data.get('vectorized', False)), uncertainty=data.get('uncertainty')
+    )
+    if 'error' in result:
+        return 500, {'success': False, 'error': result['error']}
+    return 200, {'success': True, 'data': result}
+
+
+ROUTES = {
+    ('POST', '/api/calculate-co2'): calculate_total_co2,
+    ('POST', '/api/calculate-co2/batch'): calculate_total_co2_batch,
+}
+
+
+def _is_authorized(headers: List[Tuple[bytes, bytes]]) -> bool:
+    """Bearer token kontrolü (token tanımlı değilse tüm istekler reddedilir)"""
+    token = os.getenv('CO2_API_TOKEN')
+    if not token:
+        return False
+    for name, value in headers:
+        if name == b'authorization':
+            return hmac.compare_digest(value.decode('latin-1'), f'Bearer {token}')
+    return False
+
+
+async def _read_body(receive) -> bytes:
+    """İstek gövdesini boyut sınırıyla oku"""
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError('İstek gövdesi çok büyük')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, status: int, payload: Dict):
+    """JSON yanıtı gönder"""
+    body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json; charset=utf-8'),
+            (b'content-length', str(len(body)).encode()),
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    """Başlangıç/kapanış olayları: havuzu kapat"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if not os.getenv('CO2_API_TOKEN'):
+                logger.warning("CO2_API_TOKEN tanımlı değil; tüm API istekleri reddedilecek")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_calculator.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI giriş noktası"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path']
+    if method == 'GET' and path == '/health':
+        await _send_json(send, 200, {'status': 'ok'})
+        return
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        await _send_json(send, 404, {'success': False, 'error': 'Bulunamadı'})
+        return
+    if not _is_authorized(scope.get('headers', [])):
+        await _send_json(send, 401, {'success': False, 'error': 'Yetkisiz erişim'})
+        return
+
+    try:
+        body = await _read_body(receive)
+        data = json.loads(body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('İstek gövdesi bir JSON nesnesi olmalı')
+        status, payload = await handler(data)
+    except (ValueError, TypeError) as e:
+        status, payload = 400, {'success': False, 'error': f'Geçersiz parametre: {str(e)}'}
+    except Exception as e:
+        logger.error(f"ASGI CO₂ hesaplama hatası: {e}")
+        status, payload = 500, {'success': False, 'error': f'CO₂ hesaplama hatası: {str(e)}'}
+
+    await _send_json(send, status, payload)
@@ -0,0 +1,189 @@
+"""
+Zero@Design - Asenkron CO₂ Hesaplama Modülü
+asyncpg ile kumaş, aksesuar, işlem ve lifecycle sorgularını eşzamanlı çalıştırır.
+Sonuçlar senkron CO2Calculator ile aynı builder'lardan üretilir.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+import asyncpg
+
+from co2_calculator import CO2Calculator, co2_calculator, _unique_uuids
+
+logger = logging.getLogger(__name__)
+
+# Her tablo ayrı bağlantıda paralel sorgulanır; lifecycle_master satırları her
+# zaman getirilir, fallback kararı senkron yoldaki gibi Python tarafında verilir.
+FABRICS_QUERY = "SELECT * FROM fabrics WHERE id = ANY($1::uuid[])"
+ACCESSORIES_QUERY = "SELECT * FROM accessories WHERE id = ANY($1::uuid[])"
+PROCESSES_QUERY = """
+    SELECT p.*, e.min_co2_kg, e.max_co2_kg, e.avg_co2_kg, e.source, e.notes
+    FROM processes p
+    LEFT JOIN emissions e ON p.id = e.process_id
+    WHERE p.id = ANY($1::uuid[])
+"""
+LIFECYCLE_QUERY = "SELECT * FROM lifecycle_master WHERE id = ANY($1::uuid[])"
+
+
+class AsyncCO2Calculator:
+    """asyncio tabanlı CO₂ hesaplama servisi"""
+
+    def __init__(self, calculator: Optional[CO2Calculator] = None,
+                 min_size: Optional[int] = None,
+                 max_size: Optional[int] = None):
+        """
+        Havuz ayarlarını hazırla (bağlantılar ilk kullanımda açılır)
+
+        Args:
+            calculator: Sonuçları üreten senkron hesaplayıcı (builder'lar ortak)
+            min_size: Havuzda açık tutulacak minimum bağlantı sayısı
+            max_size: Worker başına maksimum bağlantı sayısı
+        """
+        self.calculator = calculator or co2_calculator
+        self.db_config = self.calculator.db_config
+        self.min_size = int(min_size if min_size is not None else os.getenv('DB_POOL_MIN_SIZE', '2'))
+        self.max_size = int(max_size if max_size is not None else os.getenv('DB_POOL_MAX_SIZE', '8'))
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def get_pool(self) -> asyncpg.Pool:
+        """Bu event loop için bağlantı havuzunu döndür, gerekirse oluştur"""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        host=self.db_config['host'],
+                        port=int(self.db_config['port']),
+                        database=self.db_config['database'],
+                        user=self.db_config['user'],
+                        password=self.db_config['password'],
+                        min_size=self.min_size,
+                        max_size=self.max_size
+                    )
+                    logger.info(
+                        f"asyncpg bağlantı havuzu oluşturuldu "
+                        f"(min={self.min_size}, max={self.max_size})"
+                    )
+        return self._pool
+
+    async def close(self):
+        """Havuzdaki tüm bağlantıları kapat"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _fetch(self, query: str, ids: List[str]) -> List[Dict]:
+        """Havuzdan ayrı bir bağlantıyla UUID listesi sorgusu çalıştır"""
+        if not ids:
+            return []
+        pool = await self.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(query, ids)
+        return [dict(row) for row in rows]
+
+    async def fetch_factors(self, fabric_ids: List[str], accessory_ids: List[str],
+                            process_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Kumaş, aksesuar, işlem ve lifecycle faktörlerini eşzamanlı getir
+
+        Returns:
+            Dict: CO2Calculator.fetch_factors ile aynı yapı
+        """
+        process_ids = _unique_uuids(process_ids)
+        fabrics, accessories, processes, lifecycle = await asyncio.gather(
+            self._fetch(FABRICS_QUERY, _unique_uuids(fabric_ids)),
+            self._fetch(ACCESSORIES_QUERY, _unique_uuids(accessory_ids)),
+            self._fetch(PROCESSES_QUERY, process_ids),
+            self._fetch(LIFECYCLE_QUERY, process_ids)
+        )
+
+        factors = {
+            'fabrics': {str(row['id']): row for row in fabrics},
+            'accessories': {str(row['id']): row for row in accessories},
+            'processes': {},
+            'lifecycle': {str(row['id']): row for row in lifecycle}
+        }
+        for row in processes:
+            factors['processes'].setdefault(str(row['id']), []).append(row)
+        return factors
+
+    async def calculate_total_co2(self,
+                                  fabric_id: Optional[str] = None,
+                                  fabric_quantity_kg: float = 1.0,
+                                  accessory_ids: List[str] = None,
+                                  accessory_quantities: List[float] = None,
+                                  process_ids: List[str] = None) -> Dict:
+        """
+        Toplam CO₂ değerini hesapla (CO2Calculator.calculate_total_co2 ile aynı çıktı)
+
+        Args:
+            fabric_id: Kumaş UUID'si
+            fabric_quantity_kg: Kumaş miktarı (kg)
+            accessory_ids: Aksesuar UUID listesi
+            accessory_quantities: Aksesuar miktar listesi (kg)
+            process_ids: İşlem UUID listesi
+
+        Returns:
+            Dict: Toplam CO₂ ve detaylı breakdown
+        """
+        try:
+            factors = await self.fetch_factors(
+                [fabric_id] if fabric_id else [],
+                accessory_ids or [],
+                process_ids or []
+            )
+            fabric_result, accessories_result, processes_result = self.calculator._build_component_results(
+                factors, fabric_id, fabric_quantity_kg,
+                accessory_ids or [], accessory_quantities, process_ids or []
+            )
+            return self.calculator._build_breakdown(
+                fabric_id, fabric_result, accessories_result, processes_result
+            )
+
+        except Exception as e:
+            logger.error(f"Toplam CO₂ hesaplama hatası: {e}")
+            return {
+                'error': str(e),
+                'total_co2_kg': 0,
+                'fabric': {'co2_kg': 0, 'details': {}},
+                'accessories': {'co2_kg': 0, 'details': [], 'total_accessories': 0},
+                'processes': {'co2_kg': 0, 'details': [], 'total_processes': 0}
+            }
+
+    async def calculate_many(self, boms: List[Dict], vectorized: bool = False,
+                             uncertainty: Optional[Dict] = None) -> Dict:
+        """
+        Birden fazla BOM için toplu CO₂ hesapla (CO2Calculator.calculate_many ile aynı çıktı)
+
+        Args:
+            boms: calculate_many ile aynı formatta BOM listesi
+            vectorized: NumPy motoruyla yalnızca toplam/summary hesapla
+            uncertainty: Monte Carlo belirsizlik analizi ayarları
+
+        Returns:
+            Dict: Stil bazında breakdown listesi ve koleksiyon toplamları
+
+        Raises:
+            ValueError: Geçersiz uncertainty ayarları (CO2Calculator.normalize_uncertainty)
+        """
+        # Geçersiz ayar hesaplama hatası değil, istemci hatası (ValueError)
+        uncertainty = self.calculator.normalize_uncertainty(uncertainty)
+        try:
+            factors = await self.fetch_factors(*self.calculator._collect_bom_ids(boms))
+            # NumPy hesaplaması event loop'u bloklamasın
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self.calculator._calculate_many_with_factors,
+                factors, boms, vectorized, uncertainty
+            )
+
+        except Exception as e:
+            logger.error(f"Toplu CO₂ hesaplama hatası: {e}")
+            return {
+                'error': str(e),
+                'results': [],
+                'totals': self.calculator._build_collection_totals([])
+            }
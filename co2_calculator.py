@@ -3,18 +3,98 @@ Zero@Design CO₂ Hesaplama Modülü
 Kullanıcının seçtiği kumaş, aksesuar ve işlemlere göre toplam CO₂ değerini hesaplar.
 """
 
+import hashlib
+import json
 import logging
+import threading
 from typing import List, Dict, Optional, Tuple
 from decimal import Decimal, ROUND_HALF_UP
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
+import uuid
 from datetime import datetime
+from connection_pool import PostgresConnectionPool
+from emission_factor_cache import EmissionFactorCache, WATERMARK_QUERY
+from co2_vector_engine import CO2VectorEngine
 
 # Logging konfigürasyonu
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Kumaş, aksesuar, işlem (+emisyon) ve lifecycle faktörlerini tek round trip'te getirir.
+# lifecycle_master satırları her zaman döner; fallback kararı Python tarafında verilir.
+FACTORS_QUERY = """
+    SELECT 'fabrics' AS kind, f.id::text AS id, to_jsonb(f) AS data
+    FROM fabrics f
+    WHERE f.id = ANY(%(fabric_ids)s::uuid[])
+    UNION ALL
+    SELECT 'accessories', a.id::text, to_jsonb(a)
+    FROM accessories a
+    WHERE a.id = ANY(%(accessory_ids)s::uuid[])
+    UNION ALL
+    SELECT 'processes', p.id::text,
+           to_jsonb(p) || jsonb_build_object(
+               'min_co2_kg', e.min_co2_kg,
+               'max_co2_kg', e.max_co2_kg,
+               'avg_co2_kg', e.avg_co2_kg,
+               'source', e.source,
+               'notes', e.notes
+           )
+    FROM processes p
+    LEFT JOIN emissions e ON p.id = e.process_id
+    WHERE p.id = ANY(%(process_ids)s::uuid[])
+    UNION ALL
+    SELECT 'lifecycle', l.id::text, to_jsonb(l)
+    FROM lifecycle_master l
+    WHERE l.id = ANY(%(process_ids)s::uuid[])
+"""
+
+# /api/co2-items kataloğunu etkileyen tablolar
+CATALOG_TABLES = ('fabrics', 'accessories', 'processes', 'emissions')
+
+
+def _json_default(value):
+    """Katalog satırlarındaki JSON dışı tipleri Flask jsonify ile aynı şekilde çevir"""
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(value).__name__}")
+
+
+def _normalize_uuid(value) -> Optional[str]:
+    """UUID değerini PostgreSQL'in döndürdüğü kanonik metne çevir (geçersizse None)"""
+    try:
+        return str(uuid.UUID(str(value)))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _unique_uuids(values: List[str]) -> List[str]:
+    """Geçerli UUID'leri sırayı koruyarak tekilleştir"""
+    return list(dict.fromkeys(
+        item_id for item_id in (_normalize_uuid(v) for v in values or []) if item_id
+    ))
+
+
+def _aggregate_quantities(item_ids: List[str], quantities: Optional[List[float]] = None) -> Dict[str, float]:
+    """
+    UUID -> toplam miktar eşlemesini tek geçişte oluştur
+    
+    quantities[i], item_ids[i] ile eşleşir; eksik miktarlar 1.0 kabul edilir,
+    tekrar eden UUID'lerin miktarları toplanır. Sıra ilk geçişe göre korunur.
+    """
+    quantity_map = {}
+    quantities = quantities or []
+    for i, value in enumerate(item_ids or []):
+        item_id = _normalize_uuid(value)
+        if item_id is None:
+            continue
+        quantity = float(quantities[i]) if i < len(quantities) else 1.0
+        quantity_map[item_id] = quantity_map.get(item_id, 0.0) + quantity
+    return quantity_map
+
 class CO2Calculator:
     """CO₂ hesaplama servisi"""
     
@@ -27,15 +107,30 @@ class CO2Calculator:
             'user': os.getenv('DB_USER', 'postgres'),
             'password': os.getenv('DB_PASSWORD', 'postgres123')
         }
+        # Bağlantılar worker başına havuzdan alınır, ilk kullanımda açılır
+        self.pool = PostgresConnectionPool(self.db_config)
+        # Faktörleri tek sorguda getiren hesaplama modu
+        self.single_round_trip = os.getenv('CO2_SINGLE_ROUND_TRIP', 'true').lower() == 'true'
+        # Emisyon faktörü önbelleği (CO2_FACTOR_CACHE_SIZE=0 ile kapatılır)
+        self.factor_cache = None
+        if int(os.getenv('CO2_FACTOR_CACHE_SIZE', '10000')) > 0:
+            self.factor_cache = EmissionFactorCache(lambda: self.get_db_connection())
+        # Monte Carlo belirsizlik analizinde varsayılan örnek sayısı
+        self.uncertainty_samples = int(os.getenv('CO2_UNCERTAINTY_SAMPLES', '10000'))
+        # Tek istekte izin verilen en fazla örnek (örnek x faktör matrisi bellekte tutulur)
+        self.uncertainty_max_samples = int(os.getenv('CO2_UNCERTAINTY_MAX_SAMPLES', '100000'))
+        # /api/co2-items için serileştirilmiş katalog (tablo watermark'larına bağlı)
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
     
     def get_db_connection(self):
-        """Veritabanı bağlantısı oluştur"""
-        try:
-            conn = psycopg2.connect(**self.db_config)
-            return conn
-        except Exception as e:
-            logger.error(f"Veritabanı bağlantı hatası: {e}")
-            raise
+        """
+        Havuzdan veritabanı bağlantısı al
+        
+        Returns:
+            Context manager: blok sonunda commit/rollback yapıp bağlantıyı havuza iade eder
+        """
+        return self.pool.connection()
     
     def get_fabric_co2(self, fabric_id: str, quantity_kg: float = 1.0) -> Dict:
         """
@@ -65,29 +160,7 @@ class CO2Calculator:
                     """, (fabric_id,))
                     
                     fabric = cursor.fetchone()
-                    
-                    if not fabric:
-                        return {
-                            'error': f'Kumaş bulunamadı: {fabric_id}',
-                            'co2_kg': 0,
-                            'details': {}
-                        }
-                    
-                    co2_per_kg = fabric['co2_kg_per_kg'] or 0
-                    total_co2 = float(co2_per_kg) * quantity_kg
-                    
-                    return {
-                        'co2_kg': round(total_co2, 4),
-                        'details': {
-                            'fabric_type': fabric['fabric_type'],
-                            'composition': fabric['composition'],
-                            'co2_per_kg': float(co2_per_kg),
-                            'quantity_kg': quantity_kg,
-                            'gender': fabric['gender'],
-                            'category': fabric['category'],
-                            'product': fabric['product']
-                        }
-                    }
+                    return self._build_fabric_result(fabric, fabric_id, quantity_kg)
                     
         except Exception as e:
             logger.error(f"Kumaş CO₂ hesaplama hatası: {e}")
@@ -102,27 +175,25 @@ class CO2Calculator:
         Aksesuar CO₂ değerlerini getir
         
         Args:
-            accessory_ids: Aksesuar UUID listesi
+            accessory_ids: Aksesuar UUID listesi (tekrar eden UUID'lerin miktarları toplanır)
             quantities: Her aksesuar için miktar listesi (kg)
             
         Returns:
             Dict: Toplam CO₂ değeri ve detayları
         """
-        if not accessory_ids:
+        quantity_map = _aggregate_quantities(accessory_ids, quantities)
+        if not quantity_map:
             return {
                 'co2_kg': 0,
                 'details': [],
                 'total_accessories': 0
             }
         
-        if quantities is None:
-            quantities = [1.0] * len(accessory_ids)
-        
         try:
             with self.get_db_connection() as conn:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                     # IN clause için placeholder oluştur
-                    placeholders = ','.join(['%s'] * len(accessory_ids))
+                    placeholders = ','.join(['%s'] * len(quantity_map))
                     
                     cursor.execute(f"""
                         SELECT 
@@ -137,38 +208,15 @@ class CO2Calculator:
                             unit
                         FROM accessories 
                         WHERE id IN ({placeholders})
-                    """, accessory_ids)
+                    """, list(quantity_map))
                     
-                    accessories = cursor.fetchall()
-                    
-                    total_co2 = 0
-                    details = []
-                    
-                    for i, accessory in enumerate(accessories):
-                        quantity = quantities[i] if i < len(quantities) else 1.0
-                        co2_per_kg = accessory['co2_kg_per_kg'] or 0
-                        accessory_co2 = float(co2_per_kg) * quantity
-                        total_co2 += accessory_co2
-                        
-                        details.append({
-                            'id': str(accessory['id']),
-                            'name': accessory['accessory_name'],
-                            'material': accessory['material'],
-                            'composition': accessory['composition'],
-                            'co2_per_kg': float(co2_per_kg),
-                            'quantity_kg': quantity,
-                            'co2_total': round(accessory_co2, 4),
-                            'gender': accessory['gender'],
-                            'category': accessory['category'],
-                            'product': accessory['product'],
-                            'unit': accessory['unit']
-                        })
-                    
-                    return {
-                        'co2_kg': round(total_co2, 4),
-                        'details': details,
-                        'total_accessories': len(accessories)
-                    }
+                    # Satırlar UUID ile eşlenir; IN sorgusunun dönüş sırası garanti değil
+                    accessories = {str(row['id']): row for row in cursor.fetchall()}
+                    return self._build_accessories_result([
+                        (accessories[item_id], quantity)
+                        for item_id, quantity in quantity_map.items()
+                        if item_id in accessories
+                    ])
                     
         except Exception as e:
             logger.error(f"Aksesuar CO₂ hesaplama hatası: {e}")
@@ -249,34 +297,7 @@ class CO2Calculator:
                         
                         processes = cursor.fetchall()
                     
-                    total_co2 = 0
-                    details = []
-                    
-                    for process in processes:
-                        avg_co2 = process.get('avg_co2_kg', 0) or 0
-                        total_co2 += float(avg_co2)
-                        
-                        details.append({
-                            'id': str(process['id']),
-                            'name': process['process_name'],
-                            'category': process['category'],
-                            'stage_group': process.get('stage_group'),
-                            'stage': process.get('stage'),
-                            'unit': process.get('unit'),
-                            'description': process.get('description'),
-                            'applied_products': process.get('applied_products'),
-                            'min_co2_kg': float(process.get('min_co2_kg', 0) or 0),
-                            'max_co2_kg': float(process.get('max_co2_kg', 0) or 0),
-                            'avg_co2_kg': float(avg_co2),
-                            'source': process.get('source'),
-                            'notes': process.get('notes')
-                        })
-                    
-                    return {
-                        'co2_kg': round(total_co2, 4),
-                        'details': details,
-                        'total_processes': len(processes)
-                    }
+                    return self._build_processes_result(processes)
                     
         except Exception as e:
             logger.error(f"İşlem CO₂ hesaplama hatası: {e}")
@@ -292,7 +313,8 @@ class CO2Calculator:
                            fabric_quantity_kg: float = 1.0,
                            accessory_ids: List[str] = None,
                            accessory_quantities: List[float] = None,
-                           process_ids: List[str] = None) -> Dict:
+                           process_ids: List[str] = None,
+                           single_round_trip: Optional[bool] = None) -> Dict:
         """
         Toplam CO₂ değerini hesapla
         
@@ -302,71 +324,507 @@ class CO2Calculator:
             accessory_ids: Aksesuar UUID listesi
             accessory_quantities: Aksesuar miktar listesi (kg)
             process_ids: İşlem UUID listesi
+            single_round_trip: Tüm faktörleri tek sorguda getir
+                (None ise CO2_SINGLE_ROUND_TRIP ayarı kullanılır)
             
         Returns:
             Dict: Toplam CO₂ ve detaylı breakdown
         """
+        if single_round_trip is None:
+            single_round_trip = self.single_round_trip
+        
         try:
-            # Kumaş CO₂
-            fabric_result = {'co2_kg': 0, 'details': {}}
-            if fabric_id:
-                fabric_result = self.get_fabric_co2(fabric_id, fabric_quantity_kg)
+            if single_round_trip:
+                # Kumaş, aksesuar, işlem ve lifecycle faktörleri önbellekten
+                # ya da eksikler için tek round trip ile
+                factors = self.load_factors(
+                    [fabric_id] if fabric_id else [],
+                    accessory_ids or [],
+                    process_ids or []
+                )
+                fabric_result, accessories_result, processes_result = self._build_component_results(
+                    factors, fabric_id, fabric_quantity_kg,
+                    accessory_ids or [], accessory_quantities, process_ids or []
+                )
+            else:
+                # Kumaş CO₂
+                fabric_result = {'co2_kg': 0, 'details': {}}
+                if fabric_id:
+                    fabric_result = self.get_fabric_co2(fabric_id, fabric_quantity_kg)
+                
+                # Aksesuar CO₂
+                accessories_result = self.get_accessories_co2(accessory_ids or [], accessory_quantities)
+                
+                # İşlem CO₂
+                processes_result = self.get_processes_co2(process_ids or [])
             
-            # Aksesuar CO₂
-            accessories_result = self.get_accessories_co2(accessory_ids or [], accessory_quantities)
+            return self._build_breakdown(fabric_id, fabric_result, accessories_result, processes_result)
             
-            # İşlem CO₂
-            processes_result = self.get_processes_co2(process_ids or [])
+        except Exception as e:
+            logger.error(f"Toplam CO₂ hesaplama hatası: {e}")
+            return {
+                'error': str(e),
+                'total_co2_kg': 0,
+                'fabric': {'co2_kg': 0, 'details': {}},
+                'accessories': {'co2_kg': 0, 'details': [], 'total_accessories': 0},
+                'processes': {'co2_kg': 0, 'details': [], 'total_processes': 0}
+            }
+    
+    def calculate_many(self, boms: List[Dict], vectorized: bool = False,
+                       uncertainty: Optional[Dict] = None) -> Dict:
+        """
+        Birden fazla ürün ağacı (BOM) için toplu CO₂ hesapla
+        
+        Tüm BOM'lardaki UUID'ler tekilleştirilir ve faktörler tek seferde
+        getirilir; her stil için calculate_total_co2 ile aynı breakdown döner.
+        
+        Args:
+            boms: fabric_id, fabric_quantity_kg, accessory_ids,
+                accessory_quantities, process_ids ve opsiyonel style_code
+                alanlarını içeren sözlük listesi
+            vectorized: NumPy motoruyla yalnızca toplam/summary hesapla
+                (kalem detayları üretilmez)
+            uncertainty: Monte Carlo belirsizlik analizi ayarları
+                (samples, seed); verilirse sonuca P5/P50/P95 bantları eklenir
             
-            # Toplam hesaplama
-            total_co2 = (
-                fabric_result.get('co2_kg', 0) +
-                accessories_result.get('co2_kg', 0) +
-                processes_result.get('co2_kg', 0)
-            )
+        Returns:
+            Dict: Stil bazında breakdown listesi ve koleksiyon toplamları
             
-            # Detaylı breakdown
-            breakdown = {
-                'total_co2_kg': round(total_co2, 4),
-                'fabric': fabric_result,
-                'accessories': accessories_result,
-                'processes': processes_result,
-                'calculation_date': datetime.now().isoformat(),
-                'summary': {
-                    'fabric_co2': fabric_result.get('co2_kg', 0),
-                    'accessories_co2': accessories_result.get('co2_kg', 0),
-                    'processes_co2': processes_result.get('co2_kg', 0),
-                    'total_items': (
-                        (1 if fabric_id else 0) +
-                        accessories_result.get('total_accessories', 0) +
-                        processes_result.get('total_processes', 0)
-                    )
-                }
+        Raises:
+            ValueError: Geçersiz uncertainty ayarları (bkz. normalize_uncertainty)
+        """
+        # Geçersiz ayar hesaplama hatası değil, istemci hatası (ValueError)
+        uncertainty = self.normalize_uncertainty(uncertainty)
+        try:
+            fabric_ids, accessory_ids, process_ids = self._collect_bom_ids(boms)
+            factors = self.load_factors(fabric_ids, accessory_ids, process_ids)
+            return self._calculate_many_with_factors(factors, boms, vectorized, uncertainty)
+            
+        except Exception as e:
+            logger.error(f"Toplu CO₂ hesaplama hatası: {e}")
+            return {
+                'error': str(e),
+                'results': [],
+                'totals': self._build_collection_totals([])
             }
+    
+    def normalize_uncertainty(self, uncertainty) -> Optional[Dict]:
+        """
+        Monte Carlo ayarlarını doğrula (Flask ve ASGI uçları için ortak)
+        
+        Args:
+            uncertainty: None, True ya da samples/seed içeren sözlük
             
-            # Hata kontrolü
+        Returns:
+            samples ve seed alanlı sözlük; uncertainty verilmediyse None
+            
+        Raises:
+            ValueError: Nesne değilse, samples/seed tam sayı değilse ya da samples
+                1 ile CO2_UNCERTAINTY_MAX_SAMPLES arasında değilse
+        """
+        if uncertainty is None:
+            return None
+        if uncertainty is True:
+            uncertainty = {}
+        if not isinstance(uncertainty, dict):
+            raise ValueError('uncertainty bir nesne olmalı')
+        
+        samples, seed = uncertainty.get('samples'), uncertainty.get('seed')
+        try:
+            samples = self.uncertainty_samples if samples is None else int(samples)
+            seed = None if seed is None else int(seed)
+        except (TypeError, ValueError):
+            raise ValueError('samples ve seed tam sayı olmalı')
+        if not 0 < samples <= self.uncertainty_max_samples:
+            raise ValueError(f'Örnek sayısı 1 ile {self.uncertainty_max_samples} arasında olmalı')
+        return {'samples': samples, 'seed': seed}
+    
+    def _calculate_many_with_factors(self, factors: Dict[str, Dict], boms: List[Dict],
+                                     vectorized: bool = False,
+                                     uncertainty: Optional[Dict] = None) -> Dict:
+        """Getirilmiş faktörlerle toplu hesaplama sonucunu üret"""
+        uncertainty = self.normalize_uncertainty(uncertainty)
+        fabric_ids, accessory_ids, process_ids = self._collect_bom_ids(boms)
+        
+        engine = None
+        if vectorized or uncertainty is not None:
+            engine = self._build_vector_engine(factors, boms)
+        
+        if vectorized:
+            results = engine.results()
+        else:
+            results = []
+            for index, bom in enumerate(boms):
+                fabric_id = bom.get('fabric_id')
+                fabric_result, accessories_result, processes_result = self._build_component_results(
+                    factors, fabric_id, float(bom.get('fabric_quantity_kg', 1.0)),
+                    bom.get('accessory_ids') or [], bom.get('accessory_quantities'),
+                    bom.get('process_ids') or []
+                )
+                breakdown = self._build_breakdown(
+                    fabric_id, fabric_result, accessories_result, processes_result
+                )
+                breakdown['style_code'] = bom.get('style_code')
+                breakdown['index'] = index
+                results.append(breakdown)
+        
+        response = {
+            'results': results,
+            'totals': self._build_collection_totals(results),
+            'unique_items': {
+                'fabrics': len(_unique_uuids(fabric_ids)),
+                'accessories': len(_unique_uuids(accessory_ids)),
+                'processes': len(_unique_uuids(process_ids))
+            },
+            'calculation_date': datetime.now().isoformat()
+        }
+        if uncertainty is not None:
+            response['uncertainty'] = engine.simulate(
+                samples=uncertainty['samples'],
+                seed=uncertainty['seed']
+            )
+        return response
+    
+    def build_vector_engine(self, boms: List[Dict]) -> CO2VectorEngine:
+        """
+        BOM listesi için NumPy hesaplama motorunu hazırla
+        
+        What-if senaryolarında motor bir kez kurulur; update_factor ile tek bir
+        faktör değiştirilip results() ile tüm koleksiyon yeniden puanlanır.
+        
+        Args:
+            boms: calculate_many ile aynı formatta BOM listesi
+            
+        Returns:
+            CO2VectorEngine: Faktör vektörü ve BOM matrisi yüklü motor
+        """
+        factors = self.load_factors(*self._collect_bom_ids(boms))
+        return self._build_vector_engine(factors, boms)
+    
+    def _build_vector_engine(self, factors: Dict[str, Dict], boms: List[Dict]) -> CO2VectorEngine:
+        """Getirilmiş faktörlerden vektör motorunu kur"""
+        engine = CO2VectorEngine(factors)
+        for bom in boms:
+            fabric_id = bom.get('fabric_id')
+            resolved = self._resolve_bom(
+                factors, fabric_id, float(bom.get('fabric_quantity_kg', 1.0)),
+                bom.get('accessory_ids') or [], bom.get('accessory_quantities'),
+                bom.get('process_ids') or []
+            )
             errors = []
-            if 'error' in fabric_result:
-                errors.append(f"Kumaş: {fabric_result['error']}")
-            if 'error' in accessories_result:
-                errors.append(f"Aksesuar: {accessories_result['error']}")
-            if 'error' in processes_result:
-                errors.append(f"İşlem: {processes_result['error']}")
+            if resolved['fabric'] and not resolved['fabric'][1]:
+                errors.append(f"Kumaş: Kumaş bulunamadı: {fabric_id}")
+            engine.add_style(resolved, bom.get('style_code'), errors)
+        return engine
+    
+    def _collect_bom_ids(self, boms: List[Dict]) -> Tuple[List[str], List[str], List[str]]:
+        """BOM listesindeki tüm kumaş, aksesuar ve işlem UUID'lerini topla"""
+        fabric_ids = []
+        accessory_ids = []
+        process_ids = []
+        for bom in boms:
+            if bom.get('fabric_id'):
+                fabric_ids.append(bom['fabric_id'])
+            accessory_ids.extend(bom.get('accessory_ids') or [])
+            process_ids.extend(bom.get('process_ids') or [])
+        return fabric_ids, accessory_ids, process_ids
+    
+    def _build_collection_totals(self, results: List[Dict]) -> Dict:
+        """Stil breakdown'larından koleksiyon toplamlarını üret"""
+        total_co2 = sum(r['total_co2_kg'] for r in results)
+        return {
+            'total_co2_kg': round(total_co2, 4),
+            'fabric_co2': round(sum(r['summary']['fabric_co2'] for r in results), 4),
+            'accessories_co2': round(sum(r['summary']['accessories_co2'] for r in results), 4),
+            'processes_co2': round(sum(r['summary']['processes_co2'] for r in results), 4),
+            'average_co2_kg': round(total_co2 / len(results), 4) if results else 0,
+            'total_styles': len(results),
+            'styles_with_errors': sum(1 for r in results if 'errors' in r)
+        }
+    
+    def load_factors(self, fabric_ids: List[str], accessory_ids: List[str],
+                     process_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Faktörleri önce önbellekten, eksik olanları tek sorguda veritabanından getir
+        
+        Args:
+            fabric_ids: Kumaş UUID listesi
+            accessory_ids: Aksesuar UUID listesi
+            process_ids: İşlem UUID listesi
             
-            if errors:
-                breakdown['errors'] = errors
+        Returns:
+            Dict: fetch_factors ile aynı yapı
+        """
+        cache = self.factor_cache
+        if cache is None:
+            return self.fetch_factors(fabric_ids, accessory_ids, process_ids)
+        
+        cache.ensure_watching()
+        
+        fabric_ids = _unique_uuids(fabric_ids)
+        accessory_ids = _unique_uuids(accessory_ids)
+        process_ids = _unique_uuids(process_ids)
+        
+        factors = {}
+        missing = {}
+        for kind, ids in (('fabrics', fabric_ids), ('accessories', accessory_ids),
+                          ('processes', process_ids), ('lifecycle', process_ids)):
+            factors[kind], missing[kind] = cache.get_many(kind, ids)
+        
+        if any(missing.values()):
+            generation = cache.generation
+            missing_process_ids = list(dict.fromkeys(missing['processes'] + missing['lifecycle']))
+            fetched = self.fetch_factors(missing['fabrics'], missing['accessories'], missing_process_ids)
             
-            return breakdown
+            for kind in cache.KINDS:
+                requested = missing_process_ids if kind in ('processes', 'lifecycle') else missing[kind]
+                cache.put_many(kind, fetched[kind], requested, generation)
+                factors[kind].update(fetched[kind])
+        
+        return factors
+    
+    def fetch_factors(self, fabric_ids: List[str], accessory_ids: List[str],
+                      process_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Kumaş, aksesuar, işlem ve lifecycle faktörlerini tek sorguda getir
+        
+        Args:
+            fabric_ids: Kumaş UUID listesi
+            accessory_ids: Aksesuar UUID listesi
+            process_ids: İşlem UUID listesi (lifecycle_master fallback dahil)
             
-        except Exception as e:
-            logger.error(f"Toplam CO₂ hesaplama hatası: {e}")
+        Returns:
+            Dict: Tablo bazında UUID -> satır eşlemeleri. İşlemler bir
+            process'e bağlı birden fazla emission satırı olabileceği için
+            UUID -> satır listesi olarak döner.
+        """
+        factors = {'fabrics': {}, 'accessories': {}, 'processes': {}, 'lifecycle': {}}
+        params = {
+            'fabric_ids': _unique_uuids(fabric_ids),
+            'accessory_ids': _unique_uuids(accessory_ids),
+            'process_ids': _unique_uuids(process_ids)
+        }
+        if not any(params.values()):
+            return factors
+        
+        with self.get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(FACTORS_QUERY, params)
+                for kind, item_id, data in cursor.fetchall():
+                    if kind == 'processes':
+                        factors[kind].setdefault(item_id, []).append(data)
+                    else:
+                        factors[kind][item_id] = data
+        
+        return factors
+    
+    def _resolve_bom(self, factors: Dict[str, Dict],
+                     fabric_id: Optional[str],
+                     fabric_quantity_kg: float,
+                     accessory_ids: List[str],
+                     accessory_quantities: Optional[List[float]],
+                     process_ids: List[str]) -> Dict:
+        """
+        BOM kalemlerini önceden getirilmiş faktör satırlarıyla eşleştir
+        
+        Sözlük ve vektör hesaplama yolları aynı eşleştirmeyi kullanır.
+        
+        Returns:
+            Dict: fabric (uuid, satır, miktar), accessories [(uuid, satır, miktar)],
+            processes [(uuid, satırlar)] ve process_kind ('processes' / 'lifecycle')
+        """
+        fabric = None
+        if fabric_id:
+            fabric_key = _normalize_uuid(fabric_id)
+            fabric = (fabric_key, factors['fabrics'].get(fabric_key), fabric_quantity_kg)
+        
+        accessory_rows = factors['accessories']
+        accessories = [
+            (item_id, accessory_rows[item_id], quantity)
+            for item_id, quantity in _aggregate_quantities(accessory_ids, accessory_quantities).items()
+            if item_id in accessory_rows
+        ]
+        
+        process_kind = 'processes'
+        processes = []
+        if process_ids:
+            unique_process_ids = _unique_uuids(process_ids)
+            processes = [
+                (item_id, factors['processes'][item_id])
+                for item_id in unique_process_ids
+                if item_id in factors['processes']
+            ]
+            # processes tablosunda hiçbiri yoksa lifecycle_master'a düş
+            if not processes:
+                process_kind = 'lifecycle'
+                processes = [
+                    (item_id, [factors['lifecycle'][item_id]])
+                    for item_id in unique_process_ids
+                    if item_id in factors['lifecycle']
+                ]
+        
+        return {
+            'fabric': fabric,
+            'accessories': accessories,
+            'process_kind': process_kind,
+            'processes': processes
+        }
+    
+    def _build_component_results(self, factors: Dict[str, Dict],
+                                 fabric_id: Optional[str],
+                                 fabric_quantity_kg: float,
+                                 accessory_ids: List[str],
+                                 accessory_quantities: Optional[List[float]],
+                                 process_ids: List[str]) -> Tuple[Dict, Dict, Dict]:
+        """Önceden getirilmiş faktörlerden kumaş, aksesuar ve işlem sonuçlarını üret"""
+        resolved = self._resolve_bom(
+            factors, fabric_id, fabric_quantity_kg,
+            accessory_ids, accessory_quantities, process_ids
+        )
+        
+        fabric_result = {'co2_kg': 0, 'details': {}}
+        if resolved['fabric']:
+            _, fabric, quantity_kg = resolved['fabric']
+            fabric_result = self._build_fabric_result(fabric, fabric_id, quantity_kg)
+        
+        accessories_result = self._build_accessories_result(
+            [(row, quantity) for _, row, quantity in resolved['accessories']]
+        )
+        
+        processes_result = self._build_processes_result(
+            [row for _, rows in resolved['processes'] for row in rows]
+        )
+        
+        return fabric_result, accessories_result, processes_result
+    
+    def _build_fabric_result(self, fabric: Optional[Dict], fabric_id: str, quantity_kg: float) -> Dict:
+        """Kumaş satırından CO₂ sonucunu üret"""
+        if not fabric:
             return {
-                'error': str(e),
-                'total_co2_kg': 0,
-                'fabric': {'co2_kg': 0, 'details': {}},
-                'accessories': {'co2_kg': 0, 'details': [], 'total_accessories': 0},
-                'processes': {'co2_kg': 0, 'details': [], 'total_processes': 0}
+                'error': f'Kumaş bulunamadı: {fabric_id}',
+                'co2_kg': 0,
+                'details': {}
             }
+        
+        co2_per_kg = fabric['co2_kg_per_kg'] or 0
+        total_co2 = float(co2_per_kg) * quantity_kg
+        
+        return {
+            'co2_kg': round(total_co2, 4),
+            'details': {
+                'fabric_type': fabric['fabric_type'],
+                'composition': fabric['composition'],
+                'co2_per_kg': float(co2_per_kg),
+                'quantity_kg': quantity_kg,
+                'gender': fabric['gender'],
+                'category': fabric['category'],
+                'product': fabric['product']
+            }
+        }
+    
+    def _build_accessories_result(self, accessories: List[Tuple[Dict, float]]) -> Dict:
+        """(Aksesuar satırı, toplam miktar) çiftlerinden CO₂ sonucunu üret"""
+        total_co2 = 0
+        details = []
+        
+        for accessory, quantity in accessories:
+            co2_per_kg = accessory['co2_kg_per_kg'] or 0
+            accessory_co2 = float(co2_per_kg) * quantity
+            total_co2 += accessory_co2
+            
+            details.append({
+                'id': str(accessory['id']),
+                'name': accessory['accessory_name'],
+                'material': accessory['material'],
+                'composition': accessory['composition'],
+                'co2_per_kg': float(co2_per_kg),
+                'quantity_kg': quantity,
+                'co2_total': round(accessory_co2, 4),
+                'gender': accessory['gender'],
+                'category': accessory['category'],
+                'product': accessory['product'],
+                'unit': accessory['unit']
+            })
+        
+        return {
+            'co2_kg': round(total_co2, 4),
+            'details': details,
+            'total_accessories': len(accessories)
+        }
+    
+    def _build_processes_result(self, processes: List[Dict]) -> Dict:
+        """İşlem (veya lifecycle) satırlarından CO₂ sonucunu üret"""
+        total_co2 = 0
+        details = []
+        
+        for process in processes:
+            avg_co2 = process.get('avg_co2_kg', 0) or 0
+            total_co2 += float(avg_co2)
+            
+            details.append({
+                'id': str(process['id']),
+                'name': process['process_name'],
+                'category': process['category'],
+                'stage_group': process.get('stage_group'),
+                'stage': process.get('stage'),
+                'unit': process.get('unit'),
+                'description': process.get('description'),
+                'applied_products': process.get('applied_products'),
+                'min_co2_kg': float(process.get('min_co2_kg', 0) or 0),
+                'max_co2_kg': float(process.get('max_co2_kg', 0) or 0),
+                'avg_co2_kg': float(avg_co2),
+                'source': process.get('source'),
+                'notes': process.get('notes')
+            })
+        
+        return {
+            'co2_kg': round(total_co2, 4),
+            'details': details,
+            'total_processes': len(processes)
+        }
+    
+    def _build_breakdown(self, fabric_id: Optional[str], fabric_result: Dict,
+                         accessories_result: Dict, processes_result: Dict) -> Dict:
+        """Bileşen sonuçlarını toplam breakdown yapısında birleştir"""
+        # Toplam hesaplama
+        total_co2 = (
+            fabric_result.get('co2_kg', 0) +
+            accessories_result.get('co2_kg', 0) +
+            processes_result.get('co2_kg', 0)
+        )
+        
+        # Detaylı breakdown
+        breakdown = {
+            'total_co2_kg': round(total_co2, 4),
+            'fabric': fabric_result,
+            'accessories': accessories_result,
+            'processes': processes_result,
+            'calculation_date': datetime.now().isoformat(),
+            'summary': {
+                'fabric_co2': fabric_result.get('co2_kg', 0),
+                'accessories_co2': accessories_result.get('co2_kg', 0),
+                'processes_co2': processes_result.get('co2_kg', 0),
+                'total_items': (
+                    (1 if fabric_id else 0) +
+                    accessories_result.get('total_accessories', 0) +
+                    processes_result.get('total_processes', 0)
+                )
+            }
+        }
+        
+        # Hata kontrolü
+        errors = []
+        if 'error' in fabric_result:
+            errors.append(f"Kumaş: {fabric_result['error']}")
+        if 'error' in accessories_result:
+            errors.append(f"Aksesuar: {accessories_result['error']}")
+        if 'error' in processes_result:
+            errors.append(f"İşlem: {processes_result['error']}")
+        
+        if errors:
+            breakdown['errors'] = errors
+        
+        return breakdown
     
     def get_available_items(self) -> Dict:
         """
@@ -423,5 +881,80 @@ class CO2Calculator:
                 'total_items': 0
             }
 
+    def get_items_snapshot(self, fields: Optional[List[str]] = None) -> Tuple[bytes, str]:
+        """
+        Mevcut öğeler kataloğunu serileştirilmiş olarak getir
+        
+        Katalog yalnızca kumaş, aksesuar, işlem veya emisyon tablolarının
+        updated_at / satır sayısı watermark'ları değiştiğinde yeniden üretilir;
+        her alan projeksiyonu için JSON gövdesi ve ETag bir kez hesaplanır.
+        
+        Args:
+            fields: Döndürülecek kolonlar (ör. ['id', 'fabric_type']); boşsa tümü
+            
+        Returns:
+            Tuple[bytes, str]: /api/co2-items yanıt gövdesi ve strong ETag değeri
+        """
+        version = self._catalog_version()
+        with self._catalog_lock:
+            if self._catalog is None or self._catalog['version'] != version:
+                items = self.get_available_items()
+                if 'error' in items:
+                    raise RuntimeError(items['error'])
+                columns = set()
+                for key in ('fabrics', 'accessories', 'processes'):
+                    for item in items[key]:
+                        columns.update(item)
+                self._catalog = {
+                    'version': version,
+                    'items': items,
+                    'columns': columns,
+                    'bodies': {}
+                }
+                logger.info(f"CO₂ öğe kataloğu yenilendi: {items['total_items']} öğe")
+            catalog = self._catalog
+            
+            projection = tuple(sorted(set(fields))) if fields else None
+            if projection is not None:
+                unknown = [field for field in projection if field not in catalog['columns']]
+                if unknown:
+                    raise ValueError(f"Bilinmeyen alan(lar): {', '.join(unknown)}")
+            
+            if projection not in catalog['bodies']:
+                catalog['bodies'][projection] = self._serialize_catalog(catalog['items'], projection)
+            return catalog['bodies'][projection]
+    
+    def _catalog_version(self) -> Tuple:
+        """Katalog tablolarının güncel watermark'ları"""
+        if self.factor_cache is not None and self.factor_cache.poll_interval > 0:
+            # Arka plan kontrolünün son okuduğu değerler; istek DB'ye gitmez
+            self.factor_cache.ensure_watching()
+            watermarks = self.factor_cache.watermarks()
+        else:
+            with self.get_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(WATERMARK_QUERY)
+                    watermarks = {
+                        table: (max_updated_at, row_count)
+                        for table, max_updated_at, row_count in cursor.fetchall()
+                    }
+        return tuple((table, watermarks.get(table)) for table in CATALOG_TABLES)
+    
+    def _serialize_catalog(self, items: Dict, projection: Optional[Tuple[str, ...]]) -> Tuple[bytes, str]:
+        """Katalog yanıtını JSON'a çevir ve ETag üret"""
+        data = items
+        if projection is not None:
+            data = {
+                key: [{field: item[field] for field in projection if field in item}
+                      for item in items[key]]
+                for key in ('fabrics', 'accessories', 'processes')
+            }
+            data['total_items'] = items['total_items']
+        body = json.dumps(
+            {'success': True, 'data': data},
+            default=_json_default, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+        return body, hashlib.sha256(body).hexdigest()
+
 # Singleton instance
 co2_calculator = CO2Calculator()
\ No newline at end of file
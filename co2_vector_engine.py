@@ -0,0 +1,277 @@
+"""
+Zero@Design - Vektörel CO₂ Hesaplama Motoru
+Emisyon faktörlerini UUID ile indekslenmiş NumPy dizilerinde tutar ve
+binlerce BOM'un toplamını seyrek matris-vektör çarpımıyla hesaplar.
+Tek bir faktör değiştiğinde koleksiyonun tamamı yeniden puanlanabilir.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Bileşen sırası: BOM matrisi satırları (bileşen, stil) çiftlerine göre gruplanır
+COMPONENTS = ('fabric', 'accessories', 'processes')
+FABRIC, ACCESSORIES, PROCESSES = range(len(COMPONENTS))
+
+# Monte Carlo simülasyonunda bellek kullanımını sınırlamak için stil parça boyutu
+SIMULATION_STYLE_CHUNK = 256
+
+
+def _emission_range(row: Dict) -> Tuple[float, float, float]:
+    """Satırın (min, avg, max) CO₂ değerleri; eksik uçlar ortalamaya eşitlenir"""
+    avg = float(row.get('avg_co2_kg') or 0)
+    low = row.get('min_co2_kg')
+    high = row.get('max_co2_kg')
+    low = float(low) if low is not None else avg
+    high = float(high) if high is not None else avg
+    if low > high:
+        low, high = high, low
+    return low, avg, high
+
+
+class CO2VectorEngine:
+    """Faktör vektörü + seyrek (COO) BOM matrisi"""
+
+    def __init__(self, factors: Dict[str, Dict]):
+        """
+        Faktör vektörünü oluştur
+
+        Args:
+            factors: CO2Calculator.load_factors çıktısı
+        """
+        self.columns = {}
+        values = []
+        ranges = []
+
+        def add_column(kind, item_id, value, low=None, high=None):
+            self.columns[(kind, item_id)] = len(values)
+            values.append(value)
+            ranges.append((value if low is None else low, value if high is None else high))
+
+        for item_id, row in factors['fabrics'].items():
+            add_column('fabrics', item_id, float(row.get('co2_kg_per_kg') or 0))
+        for item_id, row in factors['accessories'].items():
+            add_column('accessories', item_id, float(row.get('co2_kg_per_kg') or 0))
+        for item_id, rows in factors['processes'].items():
+            # Bir işleme bağlı birden fazla emisyon satırı toplanır
+            low, avg, high = (sum(v) for v in zip(*(_emission_range(r) for r in rows)))
+            add_column('processes', item_id, avg, low, high)
+        for item_id, row in factors['lifecycle'].items():
+            low, avg, high = _emission_range(row)
+            add_column('lifecycle', item_id, avg, low, high)
+
+        self.factors = np.array(values, dtype=np.float64)
+        # Kumaş/aksesuar faktörleri nokta değerdir; aralık yalnızca emisyonlarda var
+        self.factor_min = np.array([r[0] for r in ranges], dtype=np.float64)
+        self.factor_max = np.array([r[1] for r in ranges], dtype=np.float64)
+        self.styles = []
+
+        self._entry_rows = []
+        self._entry_cols = []
+        self._entry_coefs = []
+        self._matrix = None
+
+    def add_style(self, resolved: Dict, style_code: Optional[str] = None,
+                  errors: Optional[List[str]] = None):
+        """
+        Çözümlenmiş bir BOM'u matrise satır olarak ekle
+
+        Args:
+            resolved: CO2Calculator._resolve_bom çıktısı
+            style_code: Stil kodu
+            errors: Stile ait hata mesajları
+        """
+        index = len(self.styles)
+        entries = []
+
+        if resolved['fabric'] and resolved['fabric'][1]:
+            fabric_id, _, quantity = resolved['fabric']
+            entries.append((FABRIC, self.columns[('fabrics', fabric_id)], quantity))
+        for item_id, _, quantity in resolved['accessories']:
+            entries.append((ACCESSORIES, self.columns[('accessories', item_id)], quantity))
+        for item_id, _ in resolved['processes']:
+            entries.append((PROCESSES, self.columns[(resolved['process_kind'], item_id)], 1.0))
+
+        for component, column, coef in entries:
+            self._entry_rows.append((component, index))
+            self._entry_cols.append(column)
+            self._entry_coefs.append(float(coef))
+
+        self.styles.append({
+            'style_code': style_code,
+            'index': index,
+            'total_items': (
+                (1 if resolved['fabric'] else 0) +
+                len(resolved['accessories']) +
+                sum(len(rows) for _, rows in resolved['processes'])
+            ),
+            'errors': errors or []
+        })
+        self._matrix = None
+
+    def _build_matrix(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """COO girdilerini NumPy dizilerine çevir (bir kez)"""
+        if self._matrix is None:
+            style_count = len(self.styles)
+            rows = np.array(
+                [component * style_count + index for component, index in self._entry_rows],
+                dtype=np.int64
+            )
+            self._matrix = (
+                rows,
+                np.array(self._entry_cols, dtype=np.int64),
+                np.array(self._entry_coefs, dtype=np.float64)
+            )
+        return self._matrix
+
+    def component_totals(self) -> np.ndarray:
+        """
+        Stil bazında bileşen toplamları
+
+        Returns:
+            np.ndarray: (3, stil sayısı) boyutlu kumaş / aksesuar / işlem toplamları
+        """
+        rows, cols, coefs = self._build_matrix()
+        style_count = len(self.styles)
+        totals = np.bincount(
+            rows, weights=coefs * self.factors[cols], minlength=len(COMPONENTS) * style_count
+        )
+        return totals.reshape(len(COMPONENTS), style_count)
+
+    def update_factor(self, kind: str, item_id: str, value: float) -> List[int]:
+        """
+        Tek bir faktörü güncelle (what-if)
+
+        Args:
+            kind: 'fabrics', 'accessories', 'processes' veya 'lifecycle'
+            item_id: Faktör UUID'si
+            value: Yeni CO₂ faktörü
+
+        Returns:
+            List[int]: Faktörü kullanan stil indeksleri
+        """
+        column = self.columns[(kind, item_id)]
+        # Belirsizlik aralığı yeni değere kaydırılır, genişliği korunur
+        delta = float(value) - self.factors[column]
+        self.factors[column] = float(value)
+        self.factor_min[column] += delta
+        self.factor_max[column] += delta
+
+        rows, cols, _ = self._build_matrix()
+        style_count = len(self.styles)
+        return sorted(set((rows[cols == column] % max(style_count, 1)).tolist()))
+
+    def results(self) -> List[Dict]:
+        """
+        Stil bazında özet sonuçlar (calculate_total_co2 summary yapısı)
+
+        Bileşenler calculate_total_co2 ile aynı şekilde (Python round) 4 haneye
+        yuvarlanır; np.round yarım değerlerde farklı sonuç verebilir.
+        """
+        fabric, accessories, processes = self.component_totals().tolist()
+
+        results = []
+        for style, fabric_co2, accessories_co2, processes_co2 in zip(
+                self.styles, fabric, accessories, processes):
+            fabric_co2 = round(fabric_co2, 4)
+            accessories_co2 = round(accessories_co2, 4)
+            processes_co2 = round(processes_co2, 4)
+            total = round(fabric_co2 + accessories_co2 + processes_co2, 4)
+            result = {
+                'style_code': style['style_code'],
+                'index': style['index'],
+                'total_co2_kg': total,
+                'summary': {
+                    'fabric_co2': fabric_co2,
+                    'accessories_co2': accessories_co2,
+                    'processes_co2': processes_co2,
+                    'total_items': style['total_items']
+                }
+            }
+            if style['errors']:
+                result['errors'] = style['errors']
+            results.append(result)
+        return results
+
+    def simulate(self, samples: int = 10000, seed: Optional[int] = None,
+                 percentiles: Tuple[float, ...] = (5, 50, 95)) -> Dict:
+        """
+        Monte Carlo belirsizlik analizi
+
+        Aralığı olan her faktör (min, avg, max) üçgen dağılımından örneklenir;
+        aynı örnek tüm stillerde kullanılır, böylece koleksiyon toplamı da
+        tutarlı korelasyonla hesaplanır.
+
+        Args:
+            samples: Örnek sayısı
+            seed: Tekrarlanabilir sonuçlar için RNG seed'i
+            percentiles: Hesaplanacak yüzdelikler
+
+        Returns:
+            Dict: Stil bazında ve koleksiyon toplamı için yüzdelik değerler
+        """
+        if samples <= 0:
+            raise ValueError("Örnek sayısı pozitif olmalı")
+
+        rng = np.random.default_rng(seed)
+        rows, cols, coefs = self._build_matrix()
+        style_count = len(self.styles)
+        style_index = rows % max(style_count, 1)
+
+        uncertain = np.flatnonzero(self.factor_max > self.factor_min)
+        position = np.full(len(self.factors), -1, dtype=np.int64)
+        position[uncertain] = np.arange(len(uncertain))
+        entry_positions = position[cols]
+        is_uncertain = entry_positions >= 0
+
+        # Nokta faktörlerin katkısı sabittir
+        fixed = np.bincount(
+            style_index[~is_uncertain],
+            weights=coefs[~is_uncertain] * self.factors[cols[~is_uncertain]],
+            minlength=style_count
+        )
+
+        # Stil x belirsiz faktör katsayı matrisi
+        weights = np.zeros((style_count, len(uncertain)))
+        np.add.at(weights, (style_index[is_uncertain], entry_positions[is_uncertain]), coefs[is_uncertain])
+
+        low = self.factor_min[uncertain]
+        high = self.factor_max[uncertain]
+        mode = np.clip(self.factors[uncertain], low, high)
+        draws = rng.triangular(low, mode, high, size=(samples, len(uncertain)))
+
+        style_percentiles = np.empty((len(percentiles), style_count))
+        style_means = np.empty(style_count)
+        for start in range(0, style_count, SIMULATION_STYLE_CHUNK):
+            stop = min(start + SIMULATION_STYLE_CHUNK, style_count)
+            totals = draws @ weights[start:stop].T + fixed[start:stop]
+            style_percentiles[:, start:stop] = np.percentile(totals, percentiles, axis=0)
+            style_means[start:stop] = totals.mean(axis=0)
+
+        collection = draws @ weights.sum(axis=0) + fixed.sum()
+        collection_percentiles = np.percentile(collection, percentiles)
+
+        def labelled(values):
+            return {f'p{p:g}': round(float(v), 4) for p, v in zip(percentiles, values)}
+
+        results = []
+        for i, style in enumerate(self.styles):
+            result = {
+                'style_code': style['style_code'],
+                'index': style['index'],
+                'mean_co2_kg': round(float(style_means[i]), 4),
+            }
+            result.update(labelled(style_percentiles[:, i]))
+            results.append(result)
+
+        collection_result = {'mean_co2_kg': round(float(collection.mean()), 4)}
+        collection_result.update(labelled(collection_percentiles))
+
+        return {
+            'samples': samples,
+            'seed': seed,
+            'distribution': 'triangular(min, avg, max)',
+            'uncertain_factors': int(len(uncertain)),
+            'results': results,
+            'collection': collection_result
+        }
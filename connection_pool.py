@@ -0,0 +1,188 @@
+"""
+Zero@Design - PostgreSQL Bağlantı Havuzu
+Her worker süreci için yönetilen, sağlık kontrolü yapılan bağlantı havuzu
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import psycopg2
+from psycopg2 import pool
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresConnectionPool:
+    """Worker başına PostgreSQL bağlantı havuzu"""
+
+    def __init__(self, db_config: Dict,
+                 min_size: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 max_lifetime: Optional[float] = None,
+                 health_check_interval: Optional[float] = None,
+                 acquire_timeout: Optional[float] = None):
+        """
+        Havuz ayarlarını hazırla (bağlantılar ilk kullanımda açılır)
+
+        Args:
+            db_config: psycopg2.connect parametreleri
+            min_size: Havuzda açık tutulacak minimum bağlantı sayısı
+            max_size: Worker başına maksimum bağlantı sayısı
+            max_lifetime: Bir bağlantının yeniden açılmadan önce kullanılabileceği süre (sn)
+            health_check_interval: Boşta kalan bağlantı için SELECT 1 kontrol aralığı (sn)
+            acquire_timeout: Havuz doluyken bağlantı bekleme süresi (sn)
+        """
+        self.db_config = db_config
+        self.min_size = int(min_size if min_size is not None else os.getenv('DB_POOL_MIN_SIZE', '2'))
+        self.max_size = int(max_size if max_size is not None else os.getenv('DB_POOL_MAX_SIZE', '8'))
+        self.max_lifetime = float(max_lifetime if max_lifetime is not None
+                                  else os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+        self.health_check_interval = float(health_check_interval if health_check_interval is not None
+                                           else os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30'))
+        self.acquire_timeout = float(acquire_timeout if acquire_timeout is not None
+                                     else os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '10'))
+
+        if self.min_size > self.max_size:
+            raise ValueError("DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE değerinden büyük olamaz")
+
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._opened_at = {}
+        self._checked_at = {}
+        # Fork öncesi açılmış havuzlar kapatılmaz; soketler ebeveyn süreçle paylaşılır
+        self._inherited_pools = []
+
+        atexit.register(self.close)
+
+    def _get_pool(self) -> pool.ThreadedConnectionPool:
+        """Bu süreç için havuzu döndür, gerekirse oluştur"""
+        pid = os.getpid()
+        if self._pool is None or self._pid != pid:
+            with self._lock:
+                if self._pool is None or self._pid != pid:
+                    if self._pool is not None:
+                        self._inherited_pools.append(self._pool)
+                        self._slots = threading.BoundedSemaphore(self.max_size)
+                        self._opened_at.clear()
+                        self._checked_at.clear()
+                    self._pool = pool.ThreadedConnectionPool(
+                        self.min_size, self.max_size, **self.db_config
+                    )
+                    self._pid = pid
+                    logger.info(
+                        f"PostgreSQL bağlantı havuzu oluşturuldu (pid={pid}, "
+                        f"min={self.min_size}, max={self.max_size})"
+                    )
+        return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        """Bağlantının kullanılabilir olup olmadığını kontrol et"""
+        if conn.closed:
+            return False
+
+        now = time.monotonic()
+        key = id(conn)
+        opened_at = self._opened_at.setdefault(key, now)
+        if self.max_lifetime and now - opened_at > self.max_lifetime:
+            return False
+
+        if now - self._checked_at.get(key, opened_at) < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error as e:
+            logger.warning(f"Sağlıksız bağlantı havuzdan çıkarıldı: {e}")
+            return False
+
+        self._checked_at[key] = now
+        return True
+
+    def _discard(self, db_pool, conn):
+        """Bağlantıyı kapatıp havuzdan çıkar"""
+        self._opened_at.pop(id(conn), None)
+        self._checked_at.pop(id(conn), None)
+        try:
+            db_pool.putconn(conn, close=True)
+        except Exception as e:
+            logger.warning(f"Bağlantı kapatma hatası: {e}")
+
+    def getconn(self):
+        """Havuzdan sağlıklı bir bağlantı al"""
+        db_pool = self._get_pool()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise pool.PoolError(
+                f"{self.acquire_timeout} sn içinde boş bağlantı bulunamadı (max={self.max_size})"
+            )
+
+        try:
+            # Havuzdaki tüm bağlantılar bayatlamış olabilir; her deneme yeni bağlantı açabilir
+            for _ in range(self.max_size + 1):
+                conn = db_pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(db_pool, conn)
+            raise pool.PoolError("Sağlıklı veritabanı bağlantısı açılamadı")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        """Bağlantıyı havuza iade et"""
+        db_pool = self._pool
+        try:
+            if db_pool is None or self._pid != os.getpid():
+                return
+            if conn.closed:
+                self._discard(db_pool, conn)
+                return
+            if conn.status != psycopg2.extensions.STATUS_READY:
+                conn.rollback()
+            db_pool.putconn(conn)
+            if conn.closed:
+                # min_size üzerindeki boş bağlantılar psycopg2 tarafından kapatılır
+                self._opened_at.pop(id(conn), None)
+                self._checked_at.pop(id(conn), None)
+        except psycopg2.Error:
+            self._discard(db_pool, conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Havuzdan bağlantı alan context manager
+
+        Blok başarıyla biterse commit, hata olursa rollback yapılır;
+        her durumda bağlantı havuza iade edilir.
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn)
+
+    def close(self):
+        """Bu sürecin açtığı tüm bağlantıları kapat"""
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid() and not self._pool.closed:
+                self._pool.closeall()
+                logger.info(f"PostgreSQL bağlantı havuzu kapatıldı (pid={self._pid})")
+            self._pool = None
+            self._pid = None
+            self._opened_at.clear()
+            self._checked_at.clear()
@@ -3,11 +3,258 @@ Zero@Design - Veritabanı Yönetici Modülü
 SQLite veritabanı ile etkileşim için yardımcı sınıflar
 """
 
+import base64
+import logging
+import os
+import re
 import sqlite3
+import time
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Any
 import json
 from datetime import datetime
+from sqlite_connection_manager import SQLiteConnectionManager
+from write_behind_queue import WriteBehindQueue
+from suggest_index import normalize
+
+# Kayıtlı hesaplamaların referans verebildiği emisyon faktörü tabloları
+FACTOR_TABLES = ('finished_product_operations', 'garment_processes', 'master_co2_data')
+
+# Faktör -> bağımlı kayıt (hesaplama / stil işlemi) indeksi
+FACTOR_DEPENDENCIES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS co2_factor_dependencies (
+        factor_table TEXT NOT NULL,
+        factor_id INTEGER NOT NULL,
+        dependent_type TEXT NOT NULL,
+        dependent_id INTEGER NOT NULL,
+        PRIMARY KEY (factor_table, factor_id, dependent_type, dependent_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_co2_factor_dependencies_dependent
+        ON co2_factor_dependencies (dependent_type, dependent_id);
+"""
+
+# İşlem arama indeksi kaynakları: tablo -> (rowid kodu, işlem adı kolonu)
+# FTS rowid'i = kaynak id * 4 + kod; trigger'lar satırı rowid ile bulur
+SEARCH_SOURCES = {
+    'finished_product_operations': (1, 'operation_type'),
+    'garment_processes': (2, 'process_step'),
+    'master_co2_data': (3, 'operation'),
+}
+
+# unicode61 remove_diacritics ş/ğ/ç/ö/ü harflerini sadeleştirir; noktasız ı ve
+# noktalı İ ayrıştırılamadığı için indekse yazmadan önce i'ye çevrilir
+SEARCH_INDEX_SCHEMA = """
+    CREATE VIRTUAL TABLE operations_fts USING fts5(
+        operation, description, category,
+        source_table UNINDEXED, source_id UNINDEXED,
+        tokenize = "unicode61 remove_diacritics 2"
+    );
+"""
+
+# bm25 kolon ağırlıkları: işlem adı > kategori > açıklama
+SEARCH_RANK = "bm25(operations_fts, 10.0, 2.0, 5.0)"
+
+# /co2-range/<category> özet kaynakları: ad -> (tablo, min, max, ortalama kolonu)
+CATEGORY_RANGE_SOURCES = {
+    'konfeksiyon': ('master_konfeksiyon', 'min_co2_kg', 'max_co2_kg', 'avg_co2_kg'),
+    'fabric': ('product_fabric_co2', 'co2_kg_per_kg', 'co2_kg_per_kg', 'co2_kg_per_kg'),
+}
+
+# Kategori bazında önceden hesaplanmış CO2 aralıkları; category_key büyük/küçük
+# harf ve Türkçe karakterlerden bağımsız anahtar (suggest_index.normalize)
+CATEGORY_RANGES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS category_co2_ranges (
+        source TEXT NOT NULL,
+        category_key TEXT NOT NULL,
+        category TEXT NOT NULL,
+        min_co2 REAL,
+        max_co2 REAL,
+        avg_sum REAL,
+        avg_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (source, category_key)
+    ) WITHOUT ROWID
+"""
+
+# Liste endpoint'leri için sayfa boyutu (cursor verilip limit verilmezse varsayılan)
+PAGE_DEFAULT_LIMIT = int(os.getenv('API_PAGE_DEFAULT_LIMIT', '100'))
+PAGE_MAX_LIMIT = int(os.getenv('API_PAGE_MAX_LIMIT', '1000'))
+
+# Stil listelerinde varsayılan kolonlar
+STYLE_LIST_FIELDS = ['id', 'style_code', 'product_name', 'collection', 'category', 'created_at']
+
+logger = logging.getLogger(__name__)
+
+
+def _fold_turkish_sql(expression: str) -> str:
+    """SQL ifadesinde ı/İ harflerini i'ye çevir"""
+    return f"replace(replace(coalesce({expression}, ''), 'ı', 'i'), 'İ', 'i')"
+
+
+def _search_index_triggers() -> List[str]:
+    """Kaynak tablolar değiştikçe operations_fts'i güncelleyen trigger'lar"""
+    statements = []
+    for table, (code, name_column) in SEARCH_SOURCES.items():
+        insert = f"""
+            INSERT INTO operations_fts (rowid, operation, description, category, source_table, source_id)
+            VALUES (new.id * 4 + {code}, {_fold_turkish_sql(f'new.{name_column}')},
+                    {_fold_turkish_sql('new.description')}, {_fold_turkish_sql('new.category')},
+                    '{table}', new.id);
+        """
+        delete = f"DELETE FROM operations_fts WHERE rowid = old.id * 4 + {code};"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+        ]
+    return statements
+
+
+def refresh_category_co2_ranges(conn, sources: Optional[List[str]] = None):
+    """
+    Kategori CO2 aralık özet tablosunu kaynak tablolardan yeniden oluştur
+    
+    İçe aktarma sonrası çağrılır; commit çağırana aittir.
+    
+    Args:
+        conn: SQLite bağlantısı
+        sources: Yenilenecek kaynaklar (varsayılan: tümü)
+    """
+    conn.execute(CATEGORY_RANGES_SCHEMA)
+    for source in sources or CATEGORY_RANGE_SOURCES:
+        table, min_column, max_column, avg_column = CATEGORY_RANGE_SOURCES[source]
+        rows = conn.execute(f"""
+            SELECT category, MIN({min_column}), MAX({max_column}),
+                   SUM({avg_column}), COUNT({avg_column})
+            FROM {table}
+            WHERE category IS NOT NULL
+            GROUP BY category
+        """).fetchall()
+        
+        # Yazımı farklı aynı kategoriler tek anahtarda birleşir
+        summary = {}
+        for category, low, high, avg_sum, avg_count in rows:
+            key = normalize(str(category).strip())
+            if not key:
+                continue
+            if key not in summary:
+                summary[key] = [str(category).strip(), low, high, avg_sum, avg_count]
+                continue
+            entry = summary[key]
+            entry[1] = min(v for v in (entry[1], low) if v is not None) if low is not None else entry[1]
+            entry[2] = max(v for v in (entry[2], high) if v is not None) if high is not None else entry[2]
+            entry[3] = (entry[3] or 0) + avg_sum if avg_sum is not None else entry[3]
+            entry[4] += avg_count
+        
+        conn.execute("DELETE FROM category_co2_ranges WHERE source = ?", (source,))
+        conn.executemany("""
+            INSERT INTO category_co2_ranges
+            (source, category_key, category, min_co2, max_co2, avg_sum, avg_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(source, key, *entry) for key, entry in summary.items()])
+
+
+def _fts_match_query(search_term: str) -> Optional[str]:
+    """Arama terimini FTS5 MATCH ifadesine çevir (her kelime önek araması, AND)"""
+    folded = search_term.replace('ı', 'i').replace('İ', 'i')
+    tokens = re.findall(r'\w+', folded)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _parse_sort(sort) -> List[Tuple[str, bool]]:
+    """"kolon,-kolon" biçimindeki sıralamayı (kolon, azalan) listesine çevir"""
+    if isinstance(sort, str):
+        sort = sort.split(',')
+    spec = []
+    for item in sort or []:
+        item = item.strip()
+        if item:
+            spec.append((item.lstrip('-'), item.startswith('-')))
+    return spec
+
+
+def _keyset_condition(sort_spec: List[Tuple[str, bool]], values: List,
+                      not_null: Tuple[str, ...] = ()) -> Tuple[str, List]:
+    """
+    Cursor'daki son satırdan sonra gelen satırlar için WHERE koşulu
+    
+    SQLite artan sıralamada NULL'ları başa, azalanda sona koyar; karşılaştırma
+    her kolon için bu kurala göre NULL-güvenli kurulur. İlk kolon için eklenen
+    aralık koşulu (>= / <=) indeksin cursor konumundan okunmasını sağlar.
+    """
+    alternatives, params = [], []
+    equal_parts, equal_params = [], []
+    for (column, descending), value in zip(sort_spec, values):
+        if value is None:
+            after = None if descending else f"{column} IS NOT NULL"
+            after_params = []
+            equal, equal_param = f"{column} IS NULL", []
+        else:
+            after = f"({column} < ? OR {column} IS NULL)" if descending else f"{column} > ?"
+            after_params = [value]
+            equal, equal_param = f"{column} = ?", [value]
+        if after is not None:
+            alternatives.append('(' + ' AND '.join(equal_parts + [after]) + ')')
+            params += equal_params + after_params
+        equal_parts.append(equal)
+        equal_params += equal_param
+    condition = '(' + (' OR '.join(alternatives) or '0') + ')'
+    
+    # Azalan sırada NULL'lar sonda kaldığı için aralık yalnızca NOT NULL kolonda güvenli
+    column, descending = sort_spec[0]
+    if values[0] is not None and (not descending or column in not_null):
+        condition = f"{column} {'<=' if descending else '>='} ? AND {condition}"
+        params = [values[0]] + params
+    return condition, params
+
+
+def _encode_cursor(sort_key: str, values: List) -> str:
+    payload = json.dumps({'s': sort_key, 'v': values}, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort_key: str, size: int) -> List:
+    """Opak cursor'u çöz; farklı sıralamayla üretilmişse reddet"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = payload['v']
+        valid = (payload['s'] == sort_key and isinstance(values, list) and len(values) == size
+                 and all(isinstance(value, (str, int, float, type(None))) for value in values))
+    except (ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise ValueError('Geçersiz cursor')
+    return values
+
+
+def _factor_ref(table: Optional[str], factor_id) -> Optional[Tuple[str, int]]:
+    """(tablo, id) faktör referansını doğrula"""
+    if table not in FACTOR_TABLES or factor_id in (None, ''):
+        return None
+    try:
+        return table, int(factor_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_co2_range(co2_min: Optional[float], co2_max: Optional[float]) -> Optional[str]:
+    """Sınırları CSV'deki "0.35-0.50" biçimine çevir (tek değer için "0.40")"""
+    def text(value: float) -> str:
+        return f"{value:.2f}" if round(value, 2) == value else f"{value:g}"
+    if co2_min is None and co2_max is None:
+        return None
+    if co2_min is None or co2_max is None or co2_min == co2_max:
+        return text(co2_max if co2_min is None else co2_min)
+    return f"{text(co2_min)}-{text(co2_max)}"
+
+
+def _operations_total(details: List[Dict]) -> float:
+    """calculate_product_co2 ile aynı formül: (Σmin + Σmax) / 2"""
+    total_min = sum(detail.get('co2_min', 0) or 0 for detail in details)
+    total_max = sum(detail.get('co2_max', 0) or 0 for detail in details)
+    return (total_min + total_max) / 2
 
 class DatabaseManager:
     def __init__(self, db_path: str = "zero_design.db"):
@@ -18,12 +265,33 @@ class DatabaseManager:
             db_path: SQLite veritabanı dosya yolu
         """
         self.db_path = db_path
+        # Thread başına açık tutulan bağlantılar (WAL, mmap, cache pragma'ları)
+        self.connections = SQLiteConnectionManager(db_path)
+        self._dependency_schema_ready = False
+        # None: henüz kontrol edilmedi, False: FTS5 kullanılamıyor (LIKE ile aranır)
+        self._search_query = None
+        self._table_columns = {}
+        self._category_ranges_ready = False
+        # (monotonic zaman, istatistikler); trigger'lar sayaçları anlık günceller
+        self._stats_snapshot = None
+        self.stats_ttl = float(os.getenv('DB_STATS_TTL', '30'))
+        # Hesaplama geçmişi kayıtları toplu yazılır (istek yolunda kilit beklenmez)
+        self.calculation_writer = WriteBehindQueue(
+            self._write_co2_calculations, name='co2-calculations-writer'
+        )
     
     def get_connection(self):
-        """Veritabanı bağlantısı oluşturur"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Dict-like access
-        return conn
+        """
+        Bu thread'in kalıcı veritabanı bağlantısını döndürür
+        
+        Bağlantı kapatılmamalıdır; süreç sonunda close() ile kapatılır.
+        """
+        return self.connections.get()
+    
+    def close(self):
+        """Bekleyen kayıtları yazar ve açık veritabanı bağlantılarını kapatır"""
+        self.calculation_writer.close()
+        self.connections.close()
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """
@@ -36,12 +304,8 @@ class DatabaseManager:
         Returns:
             Sorgu sonuçları listesi
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return results
+        cursor = self.get_connection().execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
     
     def execute_insert(self, query: str, params: tuple = ()) -> int:
         """
@@ -54,99 +318,190 @@ class DatabaseManager:
         Returns:
             Yeni kaydın ID'si
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        last_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return last_id
+        with self.connections.transaction() as conn:
+            return conn.execute(query, params).lastrowid
+    
+    def get_table_columns(self, table: str) -> List[str]:
+        """Tablonun kolon adları (şema değişmediği sürece önbellekten)"""
+        return [column['name'] for column in self._table_info(table)]
+    
+    def _table_info(self, table: str) -> List[Dict]:
+        """PRAGMA table_info satırları (önbellekten)"""
+        info = self._table_columns.get(table)
+        if info is None:
+            info = self.execute_query(f"PRAGMA table_info({table})")
+            self._table_columns[table] = info
+        return info
+    
+    def query_page(self, table: str, where: List[str], params: List,
+                   default_sort: str, default_fields: Optional[List[str]] = None,
+                   fields: Optional[List[str]] = None, sort: Optional[str] = None,
+                   cursor: Optional[str] = None, limit: Optional[int] = None):
+        """
+        Liste sorgusunu kolon seçimi, sıralama ve keyset sayfalama ile çalıştırır
+        
+        Sıralamaya her zaman id eklenir; cursor son satırın sıralama değerlerini
+        taşır ve sonraki sayfa OFFSET yerine WHERE koşuluyla indeks üzerinden okunur.
+        
+        Args:
+            table: Tablo adı
+            where: AND ile birleştirilecek filtre koşulları
+            params: Filtre parametreleri
+            default_sort: Varsayılan sıralama ("kolon,-kolon")
+            default_fields: fields verilmezse döndürülecek kolonlar (varsayılan: tümü)
+            fields: Döndürülecek kolonlar
+            sort: Sıralama ("-" öneki azalan)
+            cursor: Önceki sayfanın next_cursor değeri
+            limit: Sayfa boyutu
+            
+        Returns:
+            limit ve cursor verilmezse satır listesi; verilirse items,
+            next_cursor, has_more ve limit alanlarını içeren sayfa
+        """
+        columns = self.get_table_columns(table)
+        
+        selected = list(fields or default_fields or columns)
+        unknown = [field for field in selected if field not in columns]
+        if unknown:
+            raise ValueError(f"Geçersiz alan: {', '.join(unknown)}")
+        
+        sort_spec = _parse_sort(sort or default_sort)
+        unknown = [column for column, _ in sort_spec if column not in columns]
+        if unknown:
+            raise ValueError(f"Geçersiz sıralama alanı: {', '.join(unknown)}")
+        if 'id' not in [column for column, _ in sort_spec]:
+            # Son kolonla aynı yön: tek kolonlu indeks geriye doğru da sırayı karşılar
+            sort_spec.append(('id', sort_spec[-1][1] if sort_spec else False))
+        sort_key = ','.join(('-' if descending else '') + column for column, descending in sort_spec)
+        sort_columns = [column for column, _ in sort_spec]
+        
+        paginated = cursor is not None or limit is not None
+        if paginated:
+            limit = PAGE_DEFAULT_LIMIT if limit is None else int(limit)
+            if not 1 <= limit <= PAGE_MAX_LIMIT:
+                raise ValueError(f"limit 1 ile {PAGE_MAX_LIMIT} arasında olmalı")
+        
+        conditions, query_params = list(where), list(params)
+        if cursor:
+            not_null = tuple(column['name'] for column in self._table_info(table)
+                             if column['notnull'] or column['pk'])
+            condition, condition_params = _keyset_condition(
+                sort_spec, _decode_cursor(cursor, sort_key, len(sort_spec)), not_null
+            )
+            conditions.append(condition)
+            query_params += condition_params
+        
+        # Sıralama kolonları cursor için her zaman okunur, yanıttan çıkarılır
+        select_columns = selected + [column for column in sort_columns if column not in selected]
+        query = f"SELECT {', '.join(select_columns)} FROM {table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY " + ", ".join(
+            column + (' DESC' if descending else '') for column, descending in sort_spec
+        )
+        if paginated:
+            query += " LIMIT ?"
+            query_params.append(limit + 1)
+        
+        rows = self.execute_query(query, tuple(query_params))
+        if not paginated:
+            return [{field: row[field] for field in selected} for row in rows]
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = _encode_cursor(sort_key, [rows[-1][column] for column in sort_columns])
+        return {
+            'items': [{field: row[field] for field in selected} for row in rows],
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'limit': limit
+        }
     
     # Bitmiş Ürün İşlemleri Sorguları
-    def get_finished_product_operations(self, category: Optional[str] = None) -> List[Dict]:
+    def get_finished_product_operations(self, category: Optional[str] = None, **page):
         """
         Bitmiş ürün işlemlerini getirir
         
         Args:
             category: Kategori filtresi (opsiyonel)
+            **page: query_page sayfalama parametreleri (fields, sort, cursor, limit)
             
         Returns:
-            İşlem listesi
+            İşlem listesi (limit/cursor verilirse sayfa)
         """
-        query = "SELECT * FROM finished_product_operations"
-        params = ()
+        where, params = [], []
         
         if category:
-            query += " WHERE category LIKE ?"
-            params = (f"%{category}%",)
+            where.append("category LIKE ?")
+            params.append(f"%{category}%")
         
-        query += " ORDER BY category, operation_type"
-        return self.execute_query(query, params)
+        return self.query_page('finished_product_operations', where, params,
+                               'category,operation_type', **page)
     
-    def get_operations_by_product_group(self, product_group: str) -> List[Dict]:
+    def get_operations_by_product_group(self, product_group: str, **page):
         """
         Ürün grubuna göre işlemleri getirir
         
         Args:
             product_group: Ürün grubu adı
+            **page: query_page sayfalama parametreleri (fields, sort, cursor, limit)
             
         Returns:
-            İşlem listesi
-        """
-        query = """
-            SELECT * FROM finished_product_operations 
-            WHERE applicable_product_groups LIKE ?
-            ORDER BY category, operation_type
+            İşlem listesi (limit/cursor verilirse sayfa)
         """
-        return self.execute_query(query, (f"%{product_group}%",))
+        return self.query_page('finished_product_operations',
+                               ["applicable_product_groups LIKE ?"], [f"%{product_group}%"],
+                               'category,operation_type', **page)
     
     # Konfeksiyon Süreçleri Sorguları
-    def get_garment_processes(self, category: Optional[str] = None) -> List[Dict]:
+    def get_garment_processes(self, category: Optional[str] = None, **page):
         """
         Konfeksiyon süreçlerini getirir
         
         Args:
             category: Kategori filtresi (opsiyonel)
+            **page: query_page sayfalama parametreleri (fields, sort, cursor, limit)
             
         Returns:
-            Süreç listesi
+            Süreç listesi (limit/cursor verilirse sayfa)
         """
-        query = "SELECT * FROM garment_processes"
-        params = ()
+        where, params = [], []
         
         if category:
-            query += " WHERE category LIKE ?"
-            params = (f"%{category}%",)
+            where.append("category LIKE ?")
+            params.append(f"%{category}%")
         
-        query += " ORDER BY category, process_step"
-        return self.execute_query(query, params)
+        return self.query_page('garment_processes', where, params,
+                               'category,process_step', **page)
     
     # Master CO2 Verileri Sorguları
     def get_master_co2_data(self, category: Optional[str] = None, 
-                           operation: Optional[str] = None) -> List[Dict]:
+                           operation: Optional[str] = None, **page):
         """
         Master CO2 verilerini getirir
         
         Args:
             category: Kategori filtresi (opsiyonel)
             operation: İşlem filtresi (opsiyonel)
+            **page: query_page sayfalama parametreleri (fields, sort, cursor, limit)
             
         Returns:
-            CO2 veri listesi
+            CO2 veri listesi (limit/cursor verilirse sayfa)
         """
-        query = "SELECT * FROM master_co2_data WHERE 1=1"
-        params = []
+        where, params = [], []
         
         if category:
-            query += " AND category LIKE ?"
+            where.append("category LIKE ?")
             params.append(f"%{category}%")
         
         if operation:
-            query += " AND operation LIKE ?"
+            where.append("operation LIKE ?")
             params.append(f"%{operation}%")
         
-        query += " ORDER BY upper_category, category, operation"
-        return self.execute_query(query, tuple(params))
+        return self.query_page('master_co2_data', where, params,
+                               'upper_category,category,operation', **page)
     
     # Ürün Kategorileri Sorguları
     def get_product_categories(self) -> List[Dict]:
@@ -182,7 +537,8 @@ class DatabaseManager:
             selected_operations: Seçilen işlemler listesi
             
         Returns:
-            Hesaplama sonucu
+            Hesaplama sonucu; kayıt commit edildiyse calculation_id, async
+            kalıcılık modunda calculation_id yerine queued: True
         """
         total_co2_min = 0
         total_co2_max = 0
@@ -195,12 +551,17 @@ class DatabaseManager:
             total_co2_min += co2_min
             total_co2_max += co2_max
             
-            calculation_details.append({
+            detail = {
                 'operation': operation.get('operation_type') or operation.get('process_step') or operation.get('operation'),
                 'category': operation.get('category'),
                 'co2_min': co2_min,
                 'co2_max': co2_max
-            })
+            }
+            # Faktör değiştiğinde yeniden hesaplanabilmesi için kaynak satır
+            factor_ref = _factor_ref(operation.get('data_type'), operation.get('id'))
+            if factor_ref:
+                detail['factor_table'], detail['factor_id'] = factor_ref
+            calculation_details.append(detail)
         
         # Hesaplama sonucunu kaydet
         calculation_id = self.save_co2_calculation(
@@ -210,21 +571,29 @@ class DatabaseManager:
             calculation_details
         )
         
-        return {
-            'calculation_id': calculation_id,
+        if self.calculation_writer.durability == 'async':
+            # Kayıt arka planda yazılacak; henüz ID yok
+            result = {'queued': True}
+        else:
+            result = {'calculation_id': calculation_id}
+        result.update({
             'product_name': product_name,
             'total_co2_min': total_co2_min,
             'total_co2_max': total_co2_max,
             'total_co2_avg': (total_co2_min + total_co2_max) / 2,
             'operation_count': len(selected_operations),
             'calculation_details': calculation_details
-        }
+        })
+        return result
     
     def save_co2_calculation(self, product_name: str, co2_min: float, 
-                           co2_max: float, details: List[Dict]) -> int:
+                           co2_max: float, details: List[Dict]) -> Optional[int]:
         """
         CO2 hesaplama sonucunu kaydeder
         
+        Kayıt write-behind kuyruğu üzerinden yazılır (WRITE_BEHIND_DURABILITY):
+        sync ve group modlarında commit sonrası ID döner, async modda None.
+        
         Args:
             product_name: Ürün adı
             co2_min: Minimum CO2 değeri
@@ -232,18 +601,225 @@ class DatabaseManager:
             details: Hesaplama detayları
             
         Returns:
-            Kayıt ID'si
+            Kayıt ID'si (async modda None)
         """
-        total_co2 = (co2_min + co2_max) / 2
-        details_json = json.dumps(details, ensure_ascii=False)
-        
+        return self.calculation_writer.write((product_name, co2_min, co2_max, details))
+    
+    def _write_co2_calculations(self, calculations: List[Tuple]) -> List[int]:
+        """Hesaplamaları ve faktör bağımlılıklarını tek transaction'da yaz"""
         query = """
             INSERT INTO co2_calculations 
             (product_name, total_co2, calculation_details)
             VALUES (?, ?, ?)
         """
         
-        return self.execute_insert(query, (product_name, total_co2, details_json))
+        self.ensure_factor_dependency_index(self.get_connection())
+        calculation_ids, dependencies = [], []
+        with self.connections.transaction() as conn:
+            cursor = conn.cursor()
+            for product_name, co2_min, co2_max, details in calculations:
+                total_co2 = (co2_min + co2_max) / 2
+                details_json = json.dumps(details, ensure_ascii=False)
+                cursor.execute(query, (product_name, total_co2, details_json))
+                calculation_id = cursor.lastrowid
+                calculation_ids.append(calculation_id)
+                
+                # Hesaplamanın kullandığı faktörleri bağımlılık indeksine ekle
+                factor_refs = {
+                    _factor_ref(detail.get('factor_table'), detail.get('factor_id'))
+                    for detail in details
+                }
+                dependencies += [(table, factor_id, calculation_id)
+                                 for table, factor_id in factor_refs - {None}]
+            
+            cursor.executemany(
+                """
+                INSERT OR IGNORE INTO co2_factor_dependencies
+                (factor_table, factor_id, dependent_type, dependent_id)
+                VALUES (?, ?, 'calculation', ?)
+                """,
+                dependencies
+            )
+        return calculation_ids
+    
+    def ensure_factor_dependency_index(self, conn):
+        """Faktör bağımlılık tablosunu (yoksa) oluştur"""
+        if not self._dependency_schema_ready:
+            conn.executescript(FACTOR_DEPENDENCIES_SCHEMA)
+            self._dependency_schema_ready = True
+    
+    def recalculate_factor_dependents(self, factors: List[Dict]) -> Dict:
+        """
+        Değişen emisyon faktörlerine bağlı kayıtları toplu olarak yeniden hesapla
+        
+        Yalnızca bağımlılık indeksinde faktörle ilişkili görünen hesaplamalar ve
+        stil işlemleri okunur/güncellenir. Faktörde co2_min ve/veya co2_max
+        verilirse önce yalnızca verilen sınırlar düzeltilir (master_co2_data'da
+        co2_range metni de yenilenir); tüm işlem tek transaction'da yapılır.
+        
+        Args:
+            factors: table, id ve opsiyonel co2_min/co2_max alanlarını içeren liste
+            
+        Returns:
+            Güncellenen kayıt sayıları ve toplam değişim (delta) özeti
+        """
+        factor_refs = []
+        corrections = []
+        for factor in factors:
+            factor_ref = _factor_ref(factor.get('table'), factor.get('id'))
+            if factor_ref is None:
+                raise ValueError(f"Geçersiz faktör referansı: {factor.get('table')}/{factor.get('id')}")
+            factor_refs.append(factor_ref)
+            # Yalnızca verilen sınırlar düzeltilir; verilmeyen sınır korunur
+            bounds = {column: factor[column] for column in ('co2_min', 'co2_max') if column in factor}
+            if bounds:
+                corrections.append((factor_ref, bounds))
+        factor_refs = sorted(set(factor_refs))
+        
+        self.ensure_factor_dependency_index(self.get_connection())
+        with self.connections.transaction() as conn:
+            cursor = conn.cursor()
+            
+            for (table, factor_id), bounds in corrections:
+                assignments = ', '.join(f"{column} = ?" for column in bounds)
+                cursor.execute(
+                    f"UPDATE {table} SET {assignments} WHERE id = ?",
+                    (*bounds.values(), factor_id)
+                )
+                if table == 'master_co2_data':
+                    # Aralık metni de düzeltilmiş sınırları göstersin
+                    cursor.execute("SELECT co2_min, co2_max FROM master_co2_data WHERE id = ?", (factor_id,))
+                    row = cursor.fetchone()
+                    if row is not None:
+                        cursor.execute(
+                            "UPDATE master_co2_data SET co2_range = ? WHERE id = ?",
+                            (_format_co2_range(row[0], row[1]), factor_id)
+                        )
+            
+            # Etkilenen kayıtlar
+            dependents = {'calculation': set(), 'style_process': set()}
+            for table in FACTOR_TABLES:
+                ids = [factor_id for ref_table, factor_id in factor_refs if ref_table == table]
+                if not ids:
+                    continue
+                placeholders = ','.join('?' * len(ids))
+                cursor.execute(f"""
+                    SELECT dependent_type, dependent_id FROM co2_factor_dependencies
+                    WHERE factor_table = ? AND factor_id IN ({placeholders})
+                """, [table, *ids])
+                for dependent_type, dependent_id in cursor.fetchall():
+                    dependents.setdefault(dependent_type, set()).add(dependent_id)
+            
+            calculations = self._fetch_by_ids(
+                cursor, "SELECT id, total_co2, calculation_details FROM co2_calculations",
+                dependents['calculation']
+            )
+            style_processes = self._fetch_by_ids(
+                cursor,
+                """
+                SELECT sp.id, sp.emission_factor, d.factor_table, d.factor_id
+                FROM style_processes sp
+                JOIN co2_factor_dependencies d
+                  ON d.dependent_type = 'style_process' AND d.dependent_id = sp.id
+                """,
+                dependents['style_process'],
+                id_column='sp.id'
+            ) if dependents['style_process'] else []
+            
+            # Bu kayıtların ihtiyaç duyduğu tüm faktörlerin güncel değerleri
+            needed = set(factor_refs)
+            parsed_details = {}
+            for row in calculations:
+                details = json.loads(row['calculation_details'] or '[]')
+                parsed_details[row['id']] = details
+                for detail in details:
+                    needed.add(_factor_ref(detail.get('factor_table'), detail.get('factor_id')))
+            for row in style_processes:
+                needed.add(_factor_ref(row['factor_table'], row['factor_id']))
+            current = self._fetch_factor_values(cursor, needed - {None})
+            
+            changes = []
+            calculation_updates = []
+            for row in calculations:
+                details = parsed_details[row['id']]
+                for detail in details:
+                    factor_ref = _factor_ref(detail.get('factor_table'), detail.get('factor_id'))
+                    if factor_ref in current:
+                        detail['co2_min'], detail['co2_max'] = current[factor_ref]
+                new_total = _operations_total(details)
+                old_total = row['total_co2'] or 0
+                if abs(new_total - old_total) > 1e-9:
+                    calculation_updates.append(
+                        (new_total, json.dumps(details, ensure_ascii=False), row['id'])
+                    )
+                    changes.append({
+                        'calculation_id': row['id'],
+                        'old_total_co2': old_total,
+                        'new_total_co2': new_total,
+                        'delta': new_total - old_total
+                    })
+            
+            process_updates = []
+            for row in style_processes:
+                factor_ref = _factor_ref(row['factor_table'], row['factor_id'])
+                if factor_ref not in current:
+                    continue
+                co2_min, co2_max = current[factor_ref]
+                new_factor = _operations_total([{'co2_min': co2_min, 'co2_max': co2_max}])
+                if row['emission_factor'] is None or abs(new_factor - row['emission_factor']) > 1e-9:
+                    process_updates.append((new_factor, row['id']))
+            
+            cursor.executemany(
+                "UPDATE co2_calculations SET total_co2 = ?, calculation_details = ? WHERE id = ?",
+                calculation_updates
+            )
+            cursor.executemany(
+                "UPDATE style_processes SET emission_factor = ? WHERE id = ?",
+                process_updates
+            )
+        
+        deltas = [change['delta'] for change in changes]
+        return {
+            'factors': len(factor_refs),
+            'factors_corrected': len(corrections),
+            'calculations_checked': len(calculations),
+            'calculations_updated': len(calculation_updates),
+            'style_processes_checked': len(style_processes),
+            'style_processes_updated': len(process_updates),
+            'total_delta': sum(deltas),
+            'max_abs_delta': max((abs(delta) for delta in deltas), default=0),
+            'changes': changes
+        }
+    
+    def _fetch_by_ids(self, cursor, query: str, ids, id_column: str = 'id',
+                      chunk_size: int = 500) -> List[Dict]:
+        """IN listesini SQLite parametre limitine göre bölerek satırları getir"""
+        ids = sorted(ids)
+        rows = []
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f"{query} WHERE {id_column} IN ({placeholders})", chunk)
+            rows.extend(dict(row) for row in cursor.fetchall())
+        return rows
+    
+    def _delete_by_ids(self, cursor, query: str, ids, id_column: str = 'id',
+                       chunk_size: int = 500):
+        """IN listesi koşuluyla parçalar halinde silme (query WHERE/AND ile biter)"""
+        ids = sorted(ids)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            cursor.execute(f"{query} {id_column} IN ({','.join('?' * len(chunk))})", chunk)
+    
+    def _fetch_factor_values(self, cursor, factor_refs) -> Dict[Tuple[str, int], Tuple]:
+        """Faktörlerin güncel (co2_min, co2_max) değerleri"""
+        values = {}
+        for table in FACTOR_TABLES:
+            ids = [factor_id for ref_table, factor_id in factor_refs if ref_table == table]
+            if ids:
+                for row in self._fetch_by_ids(cursor, f"SELECT id, co2_min, co2_max FROM {table}", ids):
+                    values[(table, row['id'])] = (row['co2_min'], row['co2_max'])
+        return values
     
     def get_co2_calculations(self, limit: int = 50) -> List[Dict]:
         """
@@ -255,6 +831,10 @@ class DatabaseManager:
         Returns:
             Hesaplama geçmişi
         """
+        # Kuyrukta bekleyen hesaplamalar da listede görünsün
+        if self.calculation_writer.pending:
+            self.calculation_writer.flush()
+        
         query = """
             SELECT * FROM co2_calculations 
             ORDER BY created_at DESC 
@@ -267,12 +847,99 @@ class DatabaseManager:
         """
         Tüm tablolarda işlem arama yapar
         
+        FTS5 indeksi üzerinden tek sorguda, BM25 skoruna göre sıralı arar;
+        FTS5 kullanılamıyorsa veya terimde kelime yoksa LIKE aramasına düşer.
+        
         Args:
             search_term: Arama terimi
             
         Returns:
             Arama sonuçları
         """
+        match_query = _fts_match_query(search_term)
+        search_query = self.ensure_search_index() if match_query else None
+        if not search_query:
+            return self._search_operations_like(search_term)
+        
+        results = {table: [] for table in SEARCH_SOURCES}
+        for source_table, data in self.get_connection().execute(search_query, (match_query,)):
+            results[source_table].append(json.loads(data))
+        return results
+    
+    def ensure_search_index(self) -> Optional[str]:
+        """
+        FTS5 arama indeksini (yoksa) oluştur, doldur ve arama sorgusunu döndür
+        
+        Returns:
+            Tek statement arama sorgusu; FTS5 desteklenmiyorsa None
+        """
+        if self._search_query is not None:
+            return self._search_query or None
+        
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'operations_fts'"
+            ).fetchone()
+            if not exists:
+                conn.execute(SEARCH_INDEX_SCHEMA)
+                self._populate_search_index(conn)
+            for statement in _search_index_triggers():
+                conn.execute(statement)
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            logger.warning(f"FTS5 arama indeksi kullanılamıyor, LIKE aramasına dönülüyor: {e}")
+            self._search_query = False
+            return None
+        
+        self._search_query = self._build_search_query(conn)
+        return self._search_query
+    
+    def rebuild_search_index(self):
+        """Arama indeksini kaynak tablolardan yeniden oluştur"""
+        self.ensure_search_index()
+        with self.connections.transaction() as conn:
+            conn.execute("DELETE FROM operations_fts")
+            self._populate_search_index(conn)
+    
+    def _populate_search_index(self, conn):
+        """Kaynak tablolardaki tüm satırları indekse yaz"""
+        for table, (code, name_column) in SEARCH_SOURCES.items():
+            conn.execute(f"""
+                INSERT INTO operations_fts (rowid, operation, description, category, source_table, source_id)
+                SELECT id * 4 + {code}, {_fold_turkish_sql(name_column)},
+                       {_fold_turkish_sql('description')}, {_fold_turkish_sql('category')},
+                       '{table}', id
+                FROM {table}
+            """)
+    
+    def _build_search_query(self, conn) -> str:
+        """Üç tablonun satırlarını JSON olarak döndüren tek arama sorgusu"""
+        selects = []
+        for table in SEARCH_SOURCES:
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            json_columns = ', '.join(f"'{column}', t.{column}" for column in columns)
+            selects.append(f"""
+                SELECT h.source_table, json_object({json_columns}) AS data, h.rank
+                FROM hits h JOIN {table} t ON t.id = h.source_id
+                WHERE h.source_table = '{table}'
+            """)
+        return f"""
+            WITH hits AS MATERIALIZED (
+                SELECT source_table, source_id, {SEARCH_RANK} AS rank
+                FROM operations_fts
+                WHERE operations_fts MATCH ?
+            )
+            SELECT source_table, data FROM (
+                {' UNION ALL '.join(selects)}
+            )
+            ORDER BY rank
+        """
+    
+    def _search_operations_like(self, search_term: str) -> Dict[str, List[Dict]]:
+        """LIKE ile tablo taraması yapan arama (FTS5 yoksa)"""
         results = {
             'finished_product_operations': [],
             'garment_processes': [],
@@ -313,42 +980,40 @@ class DatabaseManager:
         return results
     
     # İstatistikler
-    def get_database_stats(self) -> Dict:
+    def get_database_stats(self, max_age: Optional[float] = None) -> Dict:
         """
         Veritabanı istatistiklerini getirir
         
+        Sayaçlar trigger'larla güncel tutulan database_stats tablosundan tek
+        sorguda okunur; sonuç stats_ttl saniye boyunca bellekten döner.
+        
+        Args:
+            max_age: Kabul edilen en eski önbellek yaşı (sn, varsayılan: stats_ttl)
+            
         Returns:
-            İstatistik bilgileri
+            İstatistik bilgileri ve generated_at zaman damgası
         """
-        stats = {}
+        max_age = self.stats_ttl if max_age is None else max_age
+        snapshot = self._stats_snapshot
+        if snapshot is not None and time.monotonic() - snapshot[0] <= max_age:
+            return dict(snapshot[1])
         
-        tables = [
-            'finished_product_operations',
-            'garment_processes', 
-            'master_co2_data',
-            'product_categories',
-            'co2_calculations'
-        ]
+        rows = self.execute_query("SELECT * FROM database_stats")
+        by_table = {row['table_name']: row for row in rows}
         
-        for table in tables:
-            query = f"SELECT COUNT(*) as count FROM {table}"
-            result = self.execute_query(query)
-            stats[table] = result[0]['count'] if result else 0
+        stats = {table: row['row_count'] for table, row in by_table.items()}
         
         # CO2 değer aralıkları
-        co2_stats_query = """
-            SELECT 
-                MIN(co2_min) as min_co2,
-                MAX(co2_max) as max_co2,
-                AVG((co2_min + co2_max) / 2) as avg_co2
-            FROM master_co2_data 
-            WHERE co2_min IS NOT NULL AND co2_max IS NOT NULL
-        """
-        co2_stats = self.execute_query(co2_stats_query)
-        if co2_stats:
-            stats['co2_range'] = co2_stats[0]
+        master = by_table['master_co2_data']
+        stats['co2_range'] = {
+            'min_co2': master['co2_min'],
+            'max_co2': master['co2_max'],
+            'avg_co2': master['co2_avg_sum'] / master['co2_count'] if master['co2_count'] else None
+        }
+        stats['generated_at'] = datetime.now().isoformat(timespec='seconds')
         
-        return stats
+        self._stats_snapshot = (time.monotonic(), stats)
+        return dict(stats)
     
     def get_categories_by_table(self) -> Dict[str, List[str]]:
         """
@@ -380,36 +1045,34 @@ class DatabaseManager:
         return categories
     
     def get_master_konfeksiyon_data(self, category: Optional[str] = None, 
-                                   name: Optional[str] = None) -> List[Dict]:
+                                   name: Optional[str] = None, **page):
         """
         Master konfeksiyon verilerini getirir
         
         Args:
             category: Kategori filtresi
             name: İsim filtresi
+            **page: query_page sayfalama parametreleri (fields, sort, cursor, limit)
             
         Returns:
-            Master konfeksiyon verileri listesi
+            Master konfeksiyon verileri listesi (limit/cursor verilirse sayfa)
         """
-        query = "SELECT * FROM master_konfeksiyon WHERE 1=1"
-        params = []
+        where, params = [], []
         
         if category:
-            query += " AND category LIKE ?"
+            where.append("category LIKE ?")
             params.append(f"%{category}%")
             
         if name:
-            query += " AND name LIKE ?"
+            where.append("name LIKE ?")
             params.append(f"%{name}%")
-            
-        query += " ORDER BY category, name"
         
-        return self.execute_query(query, tuple(params))
+        return self.query_page('master_konfeksiyon', where, params, 'category,name', **page)
     
     def get_product_fabric_co2_data(self, gender: Optional[str] = None,
                                    category: Optional[str] = None,
                                    product: Optional[str] = None,
-                                   fabric_type: Optional[str] = None) -> List[Dict]:
+                                   fabric_type: Optional[str] = None, **page):
         """
         Ürün kumaş CO2 verilerini getirir
         
@@ -418,32 +1081,31 @@ class DatabaseManager:
             category: Kategori filtresi  
             product: Ürün filtresi
             fabric_type: Kumaş tipi filtresi
+            **page: query_page sayfalama parametreleri (fields, sort, cursor, limit)
             
         Returns:
-            Ürün kumaş CO2 verileri listesi
+            Ürün kumaş CO2 verileri listesi (limit/cursor verilirse sayfa)
         """
-        query = "SELECT * FROM product_fabric_co2 WHERE 1=1"
-        params = []
+        where, params = [], []
         
         if gender:
-            query += " AND gender = ?"
+            where.append("gender = ?")
             params.append(gender)
             
         if category:
-            query += " AND category LIKE ?"
+            where.append("category LIKE ?")
             params.append(f"%{category}%")
             
         if product:
-            query += " AND product LIKE ?"
+            where.append("product LIKE ?")
             params.append(f"%{product}%")
             
         if fabric_type:
-            query += " AND fabric_type LIKE ?"
+            where.append("fabric_type LIKE ?")
             params.append(f"%{fabric_type}%")
-            
-        query += " ORDER BY gender, category, product"
         
-        return self.execute_query(query, tuple(params))
+        return self.query_page('product_fabric_co2', where, params,
+                               'gender,category,product', **page)
     
     def get_fabric_types(self) -> List[str]:
         """Tüm kumaş tiplerini getirir"""
@@ -457,6 +1119,35 @@ class DatabaseManager:
         results = self.execute_query(query)
         return [row['composition'] for row in results]
     
+    def get_suggestion_terms(self) -> List[Dict]:
+        """
+        Typeahead indeksi için terimleri kullanım sayılarıyla getirir
+        
+        Kumaş tipleri, kompozisyonlar, işlem adları ve kategoriler tek sorguda döner.
+        
+        Returns:
+            kind, term ve count alanlarını içeren kayıtlar
+        """
+        sources = [
+            ('fabric_type', 'product_fabric_co2', 'fabric_type'),
+            ('composition', 'product_fabric_co2', 'composition'),
+        ]
+        for table, (_, name_column) in SEARCH_SOURCES.items():
+            sources.append(('operation', table, name_column))
+            sources.append(('category', table, 'category'))
+        sources.append(('category', 'product_categories', 'name'))
+        
+        selects = ' UNION ALL '.join(
+            f"SELECT '{kind}' AS kind, {column} AS term FROM {table} "
+            f"WHERE {column} IS NOT NULL AND {column} != ''"
+            for kind, table, column in sources
+        )
+        query = f"""
+            SELECT kind, term, COUNT(*) AS count FROM ({selects})
+            GROUP BY kind, term
+        """
+        return self.execute_query(query)
+    
     def search_fabric_by_composition(self, composition_search: str) -> List[Dict]:
         """Kompozisyona göre kumaş arar"""
         query = """
@@ -467,113 +1158,169 @@ class DatabaseManager:
         return self.execute_query(query, (f"%{composition_search}%",))
     
     def save_style_data(self, data):
-        """Stil verilerini database'e kaydet"""
-        try:
+        """Stil verilerini database'e kaydet (stil kodu varsa güncellenir)"""
+        return self.save_styles([data])[data.get('styleCode', '')]
+    
+    def save_styles(self, styles: List[Dict]) -> Dict[str, int]:
+        """
+        Stilleri lif ve işlemleriyle birlikte toplu kaydet
+        
+        Tüm stiller tek transaction'da yazılır; her tablo için tek bir hazır
+        statement executemany ile çalıştırılır. Aynı style_code ile kayıtlı stil
+        güncellenir, lif ve işlemleri yenileriyle değiştirilir.
+        
+        Args:
+            styles: save_style_data formatında (styleCode, fibers, processes, ...) stiller
+            
+        Returns:
+            style_code -> stil ID'si
+        """
+        # Aynı kod birden fazla gelirse sonuncusu geçerli
+        by_code = {style.get('styleCode', ''): style for style in styles}
+        if not by_code:
+            return {}
+        
+        self.ensure_factor_dependency_index(self.get_connection())
+        with self.connections.transaction() as conn:
+            cursor = conn.cursor()
+            
             # Stil bilgilerini kaydet
-            style_query = """
+            cursor.executemany("""
                 INSERT INTO styles (
                     style_code, product_name, collection, category, size, 
                     market, net_weight, packaging_weight, notes, created_at
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            """
+                ON CONFLICT (style_code) DO UPDATE SET
+                    product_name = excluded.product_name,
+                    collection = excluded.collection,
+                    category = excluded.category,
+                    size = excluded.size,
+                    market = excluded.market,
+                    net_weight = excluded.net_weight,
+                    packaging_weight = excluded.packaging_weight,
+                    notes = excluded.notes,
+                    updated_at = datetime('now')
+            """, [(
+                code,
+                style.get('productName', ''),
+                style.get('collection', ''),
+                style.get('category', ''),
+                style.get('size', ''),
+                style.get('market', ''),
+                style.get('netWeight', 0),
+                style.get('packagingWeight', 0),
+                style.get('notes', '')
+            ) for code, style in by_code.items()])
             
-            style_values = (
-                data.get('styleCode', ''),
-                data.get('productName', ''),
-                data.get('collection', ''),
-                data.get('category', ''),
-                data.get('size', ''),
-                data.get('market', ''),
-                data.get('netWeight', 0),
-                data.get('packagingWeight', 0),
-                data.get('notes', '')
-            )
+            style_ids = {
+                row['style_code']: row['id']
+                for row in self._fetch_by_ids(cursor, "SELECT id, style_code FROM styles",
+                                              set(by_code), 'style_code')
+            }
             
-            cursor = self.conn.cursor()
-            cursor.execute(style_query, style_values)
-            style_id = cursor.lastrowid
+            # Güncellenen stillerin eski lif/işlem kayıtları ve bağımlılıkları
+            ids = set(style_ids.values())
+            old_processes = self._fetch_by_ids(cursor, "SELECT id FROM style_processes", ids, 'style_id')
+            self._delete_by_ids(
+                cursor, "DELETE FROM co2_factor_dependencies WHERE dependent_type = 'style_process' AND",
+                {row['id'] for row in old_processes}, 'dependent_id'
+            )
+            for table in ('style_fibers', 'style_processes'):
+                self._delete_by_ids(cursor, f"DELETE FROM {table} WHERE", ids, 'style_id')
             
             # Lif kompozisyonunu kaydet
-            if 'fibers' in data:
-                for fiber in data['fibers']:
-                    fiber_query = """
-                        INSERT INTO style_fibers (
-                            style_id, fiber_type, percentage, emission_factor
-                        ) VALUES (?, ?, ?, ?)
-                    """
-                    cursor.execute(fiber_query, (
-                        style_id,
-                        fiber.get('type', ''),
-                        fiber.get('percentage', 0),
-                        fiber.get('emissionFactor', 0)
-                    ))
+            cursor.executemany("""
+                INSERT INTO style_fibers (
+                    style_id, fiber_type, percentage, emission_factor
+                ) VALUES (?, ?, ?, ?)
+            """, [(
+                style_ids[code],
+                fiber.get('type', ''),
+                fiber.get('percentage', 0),
+                fiber.get('emissionFactor', 0)
+            ) for code, style in by_code.items() for fiber in style.get('fibers', [])])
             
             # İşlemleri kaydet
-            if 'processes' in data:
-                for process in data['processes']:
-                    process_query = """
-                        INSERT INTO style_processes (
-                            style_id, process_name, process_type, emission_factor, unit
-                        ) VALUES (?, ?, ?, ?, ?)
-                    """
-                    cursor.execute(process_query, (
-                        style_id,
-                        process.get('name', ''),
-                        process.get('type', ''),
-                        process.get('factor', 0),
-                        process.get('unit', '')
-                    ))
-            
-            self.conn.commit()
-            return style_id
+            processes = [(style_ids[code], process)
+                         for code, style in by_code.items() for process in style.get('processes', [])]
+            cursor.executemany("""
+                INSERT INTO style_processes (
+                    style_id, process_name, process_type, emission_factor, unit
+                ) VALUES (?, ?, ?, ?, ?)
+            """, [(
+                style_id,
+                process.get('name', ''),
+                process.get('type', ''),
+                process.get('factor', 0),
+                process.get('unit', '')
+            ) for style_id, process in processes])
             
-        except Exception as e:
-            self.conn.rollback()
-            raise e
+            # Katalogdan seçilen işlemler faktör bağımlılık indeksine eklenir;
+            # yeni satır ID'leri eklenme sırasıyla artar
+            process_ids = sorted(
+                row['id'] for row in self._fetch_by_ids(cursor, "SELECT id FROM style_processes",
+                                                        ids, 'style_id')
+            )
+            dependencies = []
+            for process_id, (_, process) in zip(process_ids, processes):
+                factor_ref = _factor_ref(process.get('factorTable'), process.get('factorId'))
+                if factor_ref:
+                    dependencies.append((*factor_ref, process_id))
+            cursor.executemany("""
+                INSERT OR IGNORE INTO co2_factor_dependencies
+                (factor_table, factor_id, dependent_type, dependent_id)
+                VALUES (?, ?, 'style_process', ?)
+            """, dependencies)
+        
+        return style_ids
     
     def get_style_data(self, style_code):
         """Stil verilerini getir"""
         try:
-            # Ana stil bilgilerini getir
-            style_query = """
-                SELECT * FROM styles WHERE style_code = ?
-            """
-            style_data = self.execute_query(style_query, (style_code,))
-            
-            if not style_data:
-                return None
-            
-            style = style_data[0]
-            
-            # Lif kompozisyonunu getir
-            fiber_query = """
-                SELECT * FROM style_fibers WHERE style_id = ?
-            """
-            fibers = self.execute_query(fiber_query, (style['id'],))
-            
-            # İşlemleri getir
-            process_query = """
-                SELECT * FROM style_processes WHERE style_id = ?
-            """
-            processes = self.execute_query(process_query, (style['id'],))
-            
-            return {
-                'style': style,
-                'fibers': fibers,
-                'processes': processes
-            }
+            return self.get_styles_full([style_code]).get(style_code)
             
         except Exception as e:
             raise e
     
-    def get_all_styles(self):
-        """Tüm stilleri listele"""
+    def get_styles_full(self, style_codes: List[str]) -> Dict[str, Dict]:
+        """
+        Birden fazla stili lif ve işlemleriyle birlikte getirir
+        
+        Stil sayısından bağımsız olarak styles, style_fibers ve style_processes
+        tablolarına birer IN sorgusu gider (çok uzun listeler parçalanır).
+        
+        Args:
+            style_codes: Stil kodları
+            
+        Returns:
+            style_code -> {'style', 'fibers', 'processes'} (verilen sırayla,
+            bulunamayan kodlar atlanır)
+        """
+        cursor = self.get_connection().cursor()
+        styles = self._fetch_by_ids(cursor, "SELECT * FROM styles", set(style_codes), 'style_code')
+        documents = self._assemble_styles(cursor, styles)
+        return {code: documents[code] for code in dict.fromkeys(style_codes) if code in documents}
+    
+    def _assemble_styles(self, cursor, styles: List[Dict]) -> Dict[str, Dict]:
+        """Stillerin lif ve işlemlerini toplu getirip stil dokümanlarını oluştur"""
+        documents, by_id = {}, {}
+        for style in styles:
+            document = {'style': style, 'fibers': [], 'processes': []}
+            documents[style['style_code']] = document
+            by_id[style['id']] = document
+        
+        style_ids = set(by_id)
+        for key, table in (('fibers', 'style_fibers'), ('processes', 'style_processes')):
+            rows = self._fetch_by_ids(cursor, f"SELECT * FROM {table}", style_ids, 'style_id')
+            rows.sort(key=lambda row: row['id'])
+            for row in rows:
+                by_id[row['style_id']][key].append(row)
+        return documents
+    
+    def get_all_styles(self, **page):
+        """Tüm stilleri listele (limit/cursor verilirse sayfa)"""
         try:
-            query = """
-                SELECT id, style_code, product_name, collection, category, 
-                       created_at FROM styles ORDER BY created_at DESC
-            """
-            return self.execute_query(query)
+            return self.query_page('styles', [], [], '-created_at', STYLE_LIST_FIELDS, **page)
             
         except Exception as e:
             raise e
@@ -592,9 +1339,24 @@ class DatabaseManager:
         except Exception as e:
             return []
     
-    def get_styles_by_collection(self, collection: str):
-        """Koleksiyona göre stilleri getir"""
+    def get_styles_by_collection(self, collection: str, full: bool = False):
+        """
+        Koleksiyona göre stilleri getir
+        
+        Args:
+            collection: Koleksiyon adı
+            full: Stilleri lif ve işlemleriyle birlikte (get_style_data formatında) döndür
+        """
         try:
+            if full:
+                cursor = self.get_connection().cursor()
+                cursor.execute(
+                    "SELECT * FROM styles WHERE collection = ? ORDER BY created_at DESC",
+                    (collection,)
+                )
+                styles = [dict(row) for row in cursor.fetchall()]
+                return list(self._assemble_styles(cursor, styles).values())
+            
             query = """
                 SELECT id, style_code, product_name, collection, category, 
                        created_at FROM styles 
@@ -607,28 +1369,62 @@ class DatabaseManager:
             return []
     
     def get_co2_range_by_category(self, category: str) -> Dict:
-        """Kategoriye göre CO2 aralığını getirir"""
-        # Master konfeksiyon verilerinden
-        query1 = """
-            SELECT MIN(min_co2_kg) as min_co2, MAX(max_co2_kg) as max_co2, AVG(avg_co2_kg) as avg_co2
-            FROM master_konfeksiyon 
-            WHERE category LIKE ?
         """
+        Kategoriye göre CO2 aralığını getirir
         
-        # Kumaş verilerinden
-        query2 = """
-            SELECT MIN(co2_kg_per_kg) as min_co2, MAX(co2_kg_per_kg) as max_co2, AVG(co2_kg_per_kg) as avg_co2
-            FROM product_fabric_co2 
-            WHERE category LIKE ?
+        Önceden hesaplanmış category_co2_ranges tablosundan kategori anahtarıyla
+        okunur; tam eşleşme olmayan kaynakta kategori adı içinde arama yapılır.
+        
+        Returns:
+            Kaynak (konfeksiyon, fabric) -> min_co2, max_co2, avg_co2 ve match
+            (exact, fuzzy)
         """
+        self.ensure_category_co2_ranges()
+        key = normalize(category.strip())
+        
+        exact = self.execute_query("""
+            SELECT source, min_co2, max_co2, avg_sum, avg_count
+            FROM category_co2_ranges WHERE source IN ({}) AND category_key = ?
+        """.format(','.join('?' * len(CATEGORY_RANGE_SOURCES))), (*CATEGORY_RANGE_SOURCES, key))
+        ranges = {row['source']: dict(row, match='exact') for row in exact}
         
-        konfeksiyon_data = self.execute_query(query1, (f"%{category}%",))
-        fabric_data = self.execute_query(query2, (f"%{category}%",))
+        for source in CATEGORY_RANGE_SOURCES:
+            if source not in ranges:
+                fuzzy = self.execute_query("""
+                    SELECT MIN(min_co2) as min_co2, MAX(max_co2) as max_co2,
+                           SUM(avg_sum) as avg_sum, SUM(avg_count) as avg_count
+                    FROM category_co2_ranges WHERE source = ? AND category_key LIKE ?
+                """, (source, f"%{key}%"))
+                ranges[source] = dict(fuzzy[0], match='fuzzy')
         
         return {
-            'konfeksiyon': konfeksiyon_data[0] if konfeksiyon_data else {},
-            'fabric': fabric_data[0] if fabric_data else {}
+            source: {
+                'min_co2': row['min_co2'],
+                'max_co2': row['max_co2'],
+                'avg_co2': row['avg_sum'] / row['avg_count'] if row['avg_count'] else None,
+                'match': row['match']
+            }
+            for source, row in ranges.items()
         }
+    
+    def ensure_category_co2_ranges(self):
+        """Kategori CO2 aralık tablosunu (yoksa) oluştur ve doldur"""
+        if self._category_ranges_ready:
+            return
+        with self.connections.transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_co2_ranges'"
+            ).fetchone()
+            if not exists:
+                refresh_category_co2_ranges(conn)
+        self._category_ranges_ready = True
+    
+    def rebuild_category_co2_ranges(self):
+        """Kategori CO2 aralıklarını kaynak tablolardan yeniden hesapla"""
+        with self.connections.transaction() as conn:
+            refresh_category_co2_ranges(conn)
+        self._category_ranges_ready = True
 
 # Singleton instance
 db_manager = DatabaseManager()
\ No newline at end of file
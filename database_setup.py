@@ -3,11 +3,280 @@ Zero@Design - Veritabanı Kurulum ve CSV Import Modülü
 CSV dosyalarından SQLite veritabanı oluşturur ve verileri import eder
 """
 
+import hashlib
+import io
+import json
 import sqlite3
+import sys
+import time
 import pandas as pd
 import os
 import re
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Tuple, Optional
+import reference_snapshot
+from database_manager import CATEGORY_RANGE_SOURCES, refresh_category_co2_ranges
+
+# DatabaseManager sorgularının filtre ve sıralama kolonları için indeksler:
+# tablo -> [(indeks adı, kolonlar)]. Sıralama kolonları keyset sayfalamada
+# ORDER BY ... id ile aynı sırada; id her indekste rowid olarak zaten var.
+SCHEMA_INDEXES = {
+    'finished_product_operations': [
+        ('idx_finished_product_operations_category', 'category, operation_type'),
+    ],
+    'garment_processes': [
+        ('idx_garment_processes_category', 'category, process_step'),
+    ],
+    'master_co2_data': [
+        ('idx_master_co2_data_upper_category', 'upper_category, category, operation'),
+        ('idx_master_co2_data_category', 'category'),
+        # database_stats trigger'ları silinen uç değerin yerine MIN/MAX okur
+        ('idx_master_co2_data_co2_min', 'co2_min'),
+        ('idx_master_co2_data_co2_max', 'co2_max'),
+    ],
+    'master_konfeksiyon': [
+        ('idx_master_konfeksiyon_category', 'category, name'),
+    ],
+    'product_fabric_co2': [
+        ('idx_product_fabric_co2_gender', 'gender, category, product'),
+        ('idx_product_fabric_co2_fabric_type', 'fabric_type'),
+        ('idx_product_fabric_co2_composition', 'composition'),
+        ('idx_product_fabric_co2_category', 'category, co2_kg_per_kg'),
+    ],
+    'co2_calculations': [
+        ('idx_co2_calculations_created_at', 'created_at'),
+    ],
+    'styles': [
+        ('idx_styles_collection', 'collection, created_at'),
+        ('idx_styles_created_at', 'created_at'),
+    ],
+    'style_fibers': [
+        ('idx_style_fibers_style_id', 'style_id'),
+    ],
+    'style_processes': [
+        ('idx_style_processes_style_id', 'style_id'),
+    ],
+}
+
+# CSV kaynakları: ad -> dosya (csv_dir altında), hedef tablo, tablo kolonu ->
+# CSV kolonu eşlemesi ve "0.35-0.50" biçimindeki CO2 aralık kolonu.
+# key: artımlı senkronizasyonda satırı tanımlayan tablo kolonları.
+# numeric: sayıya çevrilemeyen değer içeren satırlar reddedilir.
+# replace: tablo tamamen CSV'den gelir; CSV'de olmayan satırlar silinir.
+CSV_SOURCES = {
+    'finished_product_operations': {
+        'label': 'Bitmiş ürün işlemleri',
+        'path': ('bitmis_urun_islemleri_co2.csv',),
+        'table': 'finished_product_operations',
+        'columns': {
+            'category': 'Kategori',
+            'operation_type': 'İşlem Türü',
+            'description': 'Açıklama',
+            'applicable_product_groups': 'Uygulanan Ürün Grupları',
+            'notes': 'Not',
+        },
+        'co2_range': 'CO2 (kgCO2e/ürün)',
+        'key': ('category', 'operation_type'),
+    },
+    'garment_processes': {
+        'label': 'Konfeksiyon süreçleri',
+        'path': ('konfeksiyon_surecleri_co2.csv',),
+        'table': 'garment_processes',
+        'columns': {
+            'category': 'Kategori',
+            'process_step': 'İşlem Adımı',
+            'description': 'Açıklama',
+            'applicable_product_groups': 'Uygulanan Ürün Grupları',
+            'notes': 'Not',
+        },
+        'co2_range': 'CO2 (kgCO2e/ürün)',
+        'key': ('category', 'process_step'),
+    },
+    'master_co2_data': {
+        'label': 'Master CO2 verileri',
+        'path': ('hazir_giyim_master_co2.csv',),
+        'table': 'master_co2_data',
+        'columns': {
+            'upper_category': 'Üst Kategori',
+            'category': 'Kategori',
+            'operation': 'İşlem',
+            'description': 'Açıklama',
+            'applicable_product_groups': 'Uygulanan Ürün Grupları',
+            'co2_range': 'CO2 (kgCO2e/ürün)',
+            'notes': 'Not',
+        },
+        'co2_range': 'CO2 (kgCO2e/ürün)',
+        'key': ('upper_category', 'category', 'operation'),
+    },
+    'master_konfeksiyon': {
+        'label': 'Master Konfeksiyon',
+        'path': ('Final_Dosyalar', 'Master_Konfeksiyon copy.csv'),
+        'table': 'master_konfeksiyon',
+        'columns': {column: column for column in (
+            'category', 'name', 'type', 'unit', 'stage', 'description',
+            'min_co2_kg', 'max_co2_kg', 'avg_co2_kg', 'source', 'source_file'
+        )},
+        'defaults': {'min_co2_kg': None, 'max_co2_kg': None, 'avg_co2_kg': None},
+        'numeric': ('min_co2_kg', 'max_co2_kg', 'avg_co2_kg'),
+        'key': ('category', 'name', 'unit', 'source_file'),
+        'replace': True,
+    },
+    'product_fabric_co2': {
+        'label': 'Ürün Kumaş CO2',
+        'path': ('Final_Dosyalar', 'Urun_Kumas_CO2_Listesi.csv'),
+        'table': 'product_fabric_co2',
+        'read_csv': {'delimiter': ';'},
+        'columns': {column: column for column in (
+            'gender', 'category', 'product', 'fabric_type', 'composition', 'usage_hint', 'co2_kg_per_kg'
+        )},
+        'defaults': {'co2_kg_per_kg': None},
+        'numeric': ('co2_kg_per_kg',),
+        'key': ('gender', 'category', 'product', 'fabric_type', 'composition'),
+        'replace': True,
+    },
+}
+
+# Kategori aralık özetini (category_co2_ranges) besleyen tablolar -> özet kaynağı
+CATEGORY_RANGE_SOURCE_OF = {table: source for source, (table, *_) in CATEGORY_RANGE_SOURCES.items()}
+
+# Artımlı import kaydı: kaynak dosyanın özeti ve satır anahtarı -> tablo satırı
+CSV_IMPORT_MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS csv_import_manifest (
+        source TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        imported_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS csv_import_rows (
+        source TEXT NOT NULL,
+        row_key TEXT NOT NULL,
+        row_hash TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        PRIMARY KEY (source, row_key)
+    ) WITHOUT ROWID;
+"""
+
+
+# İstatistik sayfasında satır sayıları gösterilen tablolar
+STATS_TABLES = (
+    'finished_product_operations',
+    'garment_processes',
+    'master_co2_data',
+    'product_categories',
+    'co2_calculations'
+)
+
+# Trigger'larla güncel tutulan sayaçlar; CO2 aralığı yalnızca master_co2_data için
+DATABASE_STATS_SCHEMA = """
+    CREATE TABLE database_stats (
+        table_name TEXT PRIMARY KEY,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        co2_count INTEGER NOT NULL DEFAULT 0,
+        co2_avg_sum REAL NOT NULL DEFAULT 0,
+        co2_min REAL,
+        co2_max REAL
+    ) WITHOUT ROWID
+"""
+
+CO2_RANGE_ROW = "co2_min IS NOT NULL AND co2_max IS NOT NULL"
+
+
+def _stats_triggers() -> List[str]:
+    """Satır sayılarını ve master_co2_data CO2 aralığını güncel tutan trigger'lar"""
+    statements = []
+    for table in STATS_TABLES:
+        for event, delta in (('INSERT', '+ 1'), ('DELETE', '- 1')):
+            statements.append(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_stats_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE database_stats SET row_count = row_count {delta} WHERE table_name = '{table}';
+                END
+            """)
+    
+    def co2_update(old: bool, new: bool) -> str:
+        old_valid = "(old.co2_min IS NOT NULL AND old.co2_max IS NOT NULL)" if old else "0"
+        new_valid = "(new.co2_min IS NOT NULL AND new.co2_max IS NOT NULL)" if new else "0"
+        old_avg = "(old.co2_min + old.co2_max) / 2" if old else "0"
+        new_avg = "(new.co2_min + new.co2_max) / 2" if new else "0"
+        
+        # Silinen/değişen değer uç noktaysa aralık yeniden okunur (AFTER: yeni değerler dahil);
+        # co2_min/co2_max indeksleriyle bu okuma tablo taraması değil tek indeks aramasıdır
+        def bound(column: str, compare: str, combine: str, aggregate: str) -> str:
+            cases = []
+            if old:
+                cases.append(f"""WHEN {old_valid} AND old.{column} {compare} {column}
+                    THEN (SELECT {aggregate}({column}) FROM master_co2_data WHERE {CO2_RANGE_ROW})""")
+            if new:
+                cases.append(f"WHEN {new_valid} THEN {combine}(coalesce({column}, new.{column}), new.{column})")
+            return f"CASE {' '.join(cases)} ELSE {column} END"
+        
+        return f"""
+            UPDATE database_stats SET
+                co2_count = co2_count - ({old_valid}) + ({new_valid}),
+                co2_avg_sum = co2_avg_sum
+                    - CASE WHEN {old_valid} THEN {old_avg} ELSE 0 END
+                    + CASE WHEN {new_valid} THEN {new_avg} ELSE 0 END,
+                co2_min = {bound('co2_min', '<=', 'min', 'MIN')},
+                co2_max = {bound('co2_max', '>=', 'max', 'MAX')}
+            WHERE table_name = 'master_co2_data';
+        """
+    
+    for event, old, new in (('INSERT', False, True), ('DELETE', True, False),
+                            ('UPDATE OF co2_min, co2_max', True, True)):
+        name = event.split()[0].lower()
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS master_co2_data_co2_stats_{name}
+            AFTER {event} ON master_co2_data
+            BEGIN {co2_update(old, new)} END
+        """)
+    return statements
+
+
+def _row_values(row: Tuple) -> List:
+    """Özet ve anahtar için normalize değerler (REAL kolonlarda 5 ile 5.0 aynı)"""
+    return [float(value) if isinstance(value, int) and not isinstance(value, bool) else value
+            for value in row]
+
+
+def _natural_key(row: Tuple, key_positions: List[int]) -> str:
+    """Satırın key kolonlarından oluşan doğal anahtarı"""
+    values = _row_values(row)
+    return json.dumps([values[i] for i in key_positions], ensure_ascii=False, default=str)
+
+
+def _row_hash(row: Tuple) -> str:
+    """Satır içeriğinin özeti"""
+    return hashlib.sha1(json.dumps(_row_values(row), ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def _row_keys(rows: List[Tuple], key_positions: List[int]) -> List[Tuple[str, str]]:
+    """
+    Satırların (satır anahtarı, içerik özeti) çiftleri
+
+    Anahtar doğal anahtar ve içerik özetinden oluşur; yalnızca birebir aynı
+    satırlar sıra numarasıyla ayrılır, böylece araya eklenen bir satır diğer
+    satırların anahtarını kaydırmaz.
+    """
+    seen = {}
+    keys = []
+    for row in rows:
+        row_hash = _row_hash(row)
+        occurrence = seen.get(row_hash, 0)
+        seen[row_hash] = occurrence + 1
+        key = json.dumps([_natural_key(row, key_positions), row_hash, occurrence], ensure_ascii=False)
+        keys.append((key, row_hash))
+    return keys
+
+
+def _load_csv_source(db_path: str, csv_dir: str, snapshot_dir: str, name: str,
+                     known_checksum: Optional[str]) -> Dict:
+    """İşlem havuzu için DatabaseSetup.load_csv_source"""
+    setup = DatabaseSetup(db_path)
+    setup.csv_dir = csv_dir
+    setup.snapshot_dir = snapshot_dir
+    return setup.load_csv_source(name, known_checksum)
+
 
 class DatabaseSetup:
     def __init__(self, db_path: str = "zero_design.db"):
@@ -19,6 +288,12 @@ class DatabaseSetup:
         """
         self.db_path = db_path
         self.csv_dir = os.path.join(os.path.dirname(__file__), 'templates', 'csv_files')
+        # CSV parse işlem sayısı (0: CPU sayısı)
+        self.import_workers = int(os.getenv('CSV_IMPORT_WORKERS', '0')) or os.cpu_count() or 1
+        # Parça parça içe aktarmada parça başına satır
+        self.import_chunk_rows = int(os.getenv('CSV_IMPORT_CHUNK_ROWS', '50000'))
+        # Parse edilmiş Parquet/Arrow kopyaları (içerik özeti tutan snapshot'lar CSV yerine okunur)
+        self.snapshot_dir = reference_snapshot.SNAPSHOT_DIR
         
     def create_database(self):
         """Veritabanını oluştur ve tabloları tanımla"""
@@ -215,6 +490,8 @@ class DatabaseSetup:
         self.insert_default_settings()
         
         conn.close()
+        self.create_indexes()
+        self.create_stats_tables()
         print("✅ Veritabanı tabloları başarıyla oluşturuldu!")
         
     def insert_default_settings(self):
@@ -272,125 +549,510 @@ class DatabaseSetup:
         except ValueError:
             return None, None
     
-    def import_finished_product_operations(self):
-        """Bitmiş ürün işlemleri CSV'sini import eder"""
-        csv_path = os.path.join(self.csv_dir, 'bitmis_urun_islemleri_co2.csv')
+    def parse_co2_ranges(self, values: pd.Series) -> pd.DataFrame:
+        """
+        CO2 değer aralıklarını vektörel olarak parse eder (parse_co2_range ile aynı kurallar)
+        
+        Args:
+            values: "0.35-0.50" ya da "0.4" formatındaki değerler
+            
+        Returns:
+            co2_min ve co2_max kolonlu DataFrame (geçersiz değerler None)
+        """
+        text = values.astype('string').str.strip()
+        has_range = text.str.contains('-', regex=False).fillna(False)
+        
+        # Hiçbir değerde '-' yoksa eklenen ikinci kolon da metin tipinde olmalı
+        parts = text.str.split('-', n=2, expand=True).reindex(columns=[0, 1]).astype('string')
+        first = pd.to_numeric(parts[0].str.strip(), errors='coerce')
+        second = pd.to_numeric(parts[1].str.strip(), errors='coerce')
+        
+        # Aralıkta iki taraf da sayı olmalı; tek değer hem min hem max
+        valid_range = has_range & first.notna() & second.notna()
+        co2_min = first.where(valid_range | ~has_range)
+        co2_max = second.where(valid_range, first.where(~has_range))
+        
+        result = pd.DataFrame({'co2_min': co2_min, 'co2_max': co2_max}, index=values.index)
+        return result.astype(object).where(result.notna(), None)
+    
+    def _csv_path(self, name: str) -> str:
+        return os.path.join(self.csv_dir, *CSV_SOURCES[name]['path'])
+    
+    def _read_csv_source(self, name: str, content: bytes) -> Tuple[pd.DataFrame, List[Dict]]:
+        """CSV içeriğini okuyup _prepare_csv_rows ile dönüştürür"""
+        df = pd.read_csv(io.BytesIO(content), encoding='utf-8', **CSV_SOURCES[name].get('read_csv', {}))
+        return self._prepare_csv_rows(name, df)
+    
+    def _prepare_csv_rows(self, name: str, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict]]:
+        """
+        CSV satırlarını tablo kolonlarına dönüştürüp doğrular
+        
+        Reddedilen satırlar: tüm anahtar kolonları boş olanlar, CO2 aralığı ya da
+        sayısal kolonu dolu olup sayıya çevrilemeyenler.
+        
+        Args:
+            name: CSV_SOURCES anahtarı
+            df: Okunan CSV satırları (index: dosyadaki veri satırı sırası)
+        
+        Returns:
+            (geçerli satırlar (NaN -> None), reddedilen satırlar (line, reason))
+        """
+        source = CSV_SOURCES[name]
+        defaults = source.get('defaults', {})
+        
+        data = pd.DataFrame(index=df.index)
+        for column, csv_column in source['columns'].items():
+            data[column] = df[csv_column] if csv_column in df.columns else defaults.get(column, '')
+        
+        reasons = pd.Series(None, index=df.index, dtype=object)
+        for column in source.get('numeric', ()):
+            numbers = pd.to_numeric(data[column], errors='coerce')
+            reasons = reasons.mask(reasons.isna() & data[column].notna() & numbers.isna(),
+                                   f"Sayısal olmayan {column}")
+            data[column] = numbers
+        
+        if 'co2_range' in source:
+            range_column = source['co2_range']
+            ranges = df[range_column] if range_column in df.columns else pd.Series('', index=df.index)
+            data[['co2_min', 'co2_max']] = self.parse_co2_ranges(ranges)
+            given = ranges.astype('string').str.strip().fillna('') != ''
+            reasons = reasons.mask(reasons.isna() & given & data['co2_min'].isna(),
+                                   "Geçersiz CO2 aralığı")
+        
+        keys = data[list(source['key'])]
+        reasons = reasons.mask(reasons.isna() & (keys.isna() | (keys == '')).all(axis=1), "Anahtar kolonları boş")
         
+        rejected = [{'line': index + 2, 'reason': reason} for index, reason in reasons.dropna().items()]
+        data = data[reasons.isna()]
+        return data.astype(object).where(data.notna(), None), rejected
+    
+    def load_csv_source(self, name: str, known_checksum: Optional[str] = None) -> Dict:
+        """
+        Kaynak dosyasını okuyup parse eder (işlem havuzunda da çalışır)
+        
+        Aynı CSV içeriğinden üretilmiş snapshot varsa CSV yerine o okunur.
+        
+        Args:
+            name: CSV_SOURCES anahtarı
+            known_checksum: Son içe aktarılan içeriğin SHA-256 özeti; aynıysa
+                            dosya parse edilmez
+        
+        Returns:
+            name, status (missing/unchanged/parsed), checksum ve parse
+            edildiyse data, rejected ve parse_ms alanları
+        """
+        started = time.perf_counter()
+        csv_path = self._csv_path(name)
         if not os.path.exists(csv_path):
-            print(f"❌ Dosya bulunamadı: {csv_path}")
+            return {'name': name, 'status': 'missing', 'path': csv_path}
+        
+        with open(csv_path, 'rb') as f:
+            content = f.read()
+        checksum = hashlib.sha256(content).hexdigest()
+        if checksum == known_checksum:
+            return {'name': name, 'status': 'unchanged', 'checksum': checksum}
+        
+        snapshot = reference_snapshot.read_source(name, checksum, self.snapshot_dir)
+        data, rejected = snapshot if snapshot is not None else self._read_csv_source(name, content)
+        return {
+            'name': name,
+            'status': 'parsed',
+            'checksum': checksum,
+            'data': data,
+            'rejected': rejected,
+            'parse_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+    
+    def load_csv_sources(self, names: List[str], checksums: Optional[Dict[str, str]] = None,
+                         workers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Kaynakları işlem havuzunda paralel parse eder
+        
+        Sonuçlar parse bittikçe döner; tek yazıcı (çağıran) yazarken diğer
+        dosyalar parse edilmeye devam eder.
+        
+        Args:
+            names: CSV_SOURCES anahtarları
+            checksums: Kaynak -> bilinen SHA-256 (değişmeyenler parse edilmez)
+            workers: İşlem sayısı (varsayılan: CSV_IMPORT_WORKERS ya da CPU sayısı)
+        """
+        checksums = checksums or {}
+        workers = min(workers or self.import_workers, len(names))
+        if workers <= 1:
+            for name in names:
+                yield self.load_csv_source(name, checksums.get(name))
             return
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_load_csv_source, self.db_path, self.csv_dir, self.snapshot_dir,
+                                       name, checksums.get(name))
+                       for name in names]
+            for future in as_completed(futures):
+                yield future.result()
+    
+    def build_reference_snapshots(self, names: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Referans CSV'leri tipli Parquet/Arrow snapshot'larına dönüştürür
+        
+        CO2 aralıkları co2_min/co2_max, sayısal kolonlar float64 olarak yazılır.
+        İçeriği değişmeyen CSV'lerin snapshot'ları yeniden yazılmaz.
+        
+        Args:
+            names: CSV_SOURCES anahtarları (varsayılan: tümü)
             
-        try:
-            df = pd.read_csv(csv_path, encoding='utf-8')
+        Returns:
+            Kaynak adı -> status (unchanged/built), built ise rows, rejected ve path
+        """
+        if not reference_snapshot.available():
+            raise RuntimeError("Snapshot için pyarrow kurulu olmalı (pip install pyarrow)")
+        
+        report = {}
+        for name in names or CSV_SOURCES:
+            source = CSV_SOURCES[name]
+            loaded = self.load_csv_source(name, reference_snapshot.snapshot_checksum(name, self.snapshot_dir))
+            if not self._report_loaded(loaded):
+                if loaded['status'] == 'unchanged':
+                    report[name] = {'status': 'unchanged'}
+                continue
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            numeric = [*source.get('numeric', ()), *(('co2_min', 'co2_max') if 'co2_range' in source else ())]
+            path = reference_snapshot.write_snapshot(name, loaded['data'], numeric, loaded['checksum'],
+                                                     loaded['rejected'], self.snapshot_dir)
+            report[name] = {'status': 'built', 'rows': len(loaded['data']),
+                            'rejected': len(loaded['rejected']), 'path': path}
+            print(f"✅ {source['label']} snapshot'ı oluşturuldu: {len(loaded['data'])} kayıt -> {path}")
+        return report
+    
+    def _report_loaded(self, loaded: Dict) -> bool:
+        """Okunamayan ve reddedilen satırları bildir; yazılacak veri varsa True"""
+        label = CSV_SOURCES[loaded['name']]['label']
+        if loaded['status'] == 'missing':
+            print(f"❌ Dosya bulunamadı: {loaded['path']}")
+            return False
+        if loaded['status'] == 'unchanged':
+            print(f"⏭️ {label} değişmedi, atlandı")
+            return False
+        for row in loaded['rejected'][:5]:
+            print(f"⚠️ {label} satır {row['line']} reddedildi: {row['reason']}")
+        if len(loaded['rejected']) > 5:
+            print(f"⚠️ {label}: toplam {len(loaded['rejected'])} satır reddedildi")
+        return True
+    
+    def import_csv_sources(self, names: Optional[List[str]] = None,
+                           workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        CSV kaynaklarını tek transaction'da içe aktarır
+        
+        Dosyalar işlem havuzunda parse edilir; her tablo tek yazıcı tarafından
+        tek bir executemany ile yazılır. Herhangi bir kaynakta hata olursa hiçbir
+        tablo değişmez.
+        
+        Args:
+            names: CSV_SOURCES anahtarları (varsayılan: tümü)
+            workers: Parse işlem sayısı
             
-            for _, row in df.iterrows():
-                co2_min, co2_max = self.parse_co2_range(row.get('CO2 (kgCO2e/ürün)', ''))
+        Returns:
+            Kaynak adı -> içe aktarılan kayıt sayısı
+        """
+        names = list(names or CSV_SOURCES)
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executescript(CSV_IMPORT_MANIFEST_SCHEMA)
+            imported = {}
+            with conn:
+                for loaded in self.load_csv_sources(names, workers=workers):
+                    if not self._report_loaded(loaded):
+                        continue
+                    started = time.perf_counter()
+                    name, data = loaded['name'], loaded['data']
+                    source = CSV_SOURCES[name]
+                    if source.get('replace'):
+                        conn.execute(f"DELETE FROM {source['table']}")
+                    # Satır eşlemesi geçersiz; sonraki senkronizasyon tablodan yeniden kurar
+                    conn.execute("DELETE FROM csv_import_manifest WHERE source = ?", (name,))
+                    conn.execute("DELETE FROM csv_import_rows WHERE source = ?", (name,))
+                    placeholders = ', '.join('?' * len(data.columns))
+                    conn.executemany(
+                        f"INSERT INTO {source['table']} ({', '.join(data.columns)}) VALUES ({placeholders})",
+                        data.itertuples(index=False, name=None)
+                    )
+                    imported[name] = len(data)
+                    print(f"✅ {source['label']} import edildi: {len(data)} kayıt "
+                          f"(parse {loaded['parse_ms']} ms, yazma "
+                          f"{(time.perf_counter() - started) * 1000:.1f} ms)")
                 
-                cursor.execute('''
-                    INSERT INTO finished_product_operations 
-                    (category, operation_type, description, applicable_product_groups, 
-                     co2_min, co2_max, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row.get('Kategori', ''),
-                    row.get('İşlem Türü', ''),
-                    row.get('Açıklama', ''),
-                    row.get('Uygulanan Ürün Grupları', ''),
-                    co2_min,
-                    co2_max,
-                    row.get('Not', '')
-                ))
-            
-            conn.commit()
+                ranges = [CATEGORY_RANGE_SOURCE_OF[CSV_SOURCES[name]['table']] for name in imported
+                          if CSV_SOURCES[name]['table'] in CATEGORY_RANGE_SOURCE_OF]
+                if ranges:
+                    refresh_category_co2_ranges(conn, ranges)
+        finally:
             conn.close()
-            print(f"✅ Bitmiş ürün işlemleri import edildi: {len(df)} kayıt")
-            
-        except Exception as e:
-            print(f"❌ Bitmiş ürün işlemleri import hatası: {e}")
+        return imported
     
-    def import_garment_processes(self):
-        """Konfeksiyon süreçleri CSV'sini import eder"""
-        csv_path = os.path.join(self.csv_dir, 'konfeksiyon_surecleri_co2.csv')
+    def sync_csv_sources(self, names: Optional[List[str]] = None,
+                         workers: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        CSV kaynaklarını artımlı olarak senkronize eder
         
-        if not os.path.exists(csv_path):
-            print(f"❌ Dosya bulunamadı: {csv_path}")
-            return
+        İçeriği (SHA-256) son senkronizasyondan beri değişmeyen dosyalar atlanır.
+        Değişen dosyalar işlem havuzunda parse edilir; satırlar key kolonlarıyla
+        eşleştirilip yalnızca eklenen, değişen ve silinen satırlar uygulanır.
+        Değişen satırlar yerinde güncellendiği için ID'leri (ve faktör
+        bağımlılıkları) korunur. Tüm kaynaklar tek transaction'da yazılır.
+        
+        Args:
+            names: CSV_SOURCES anahtarları (varsayılan: tümü)
+            workers: Parse işlem sayısı
             
+        Returns:
+            Kaynak adı -> status (unchanged/synced); senkronize edilenlerde
+            inserted, updated, deleted, updated_ids (değişen satırların ID'leri),
+            rows, rejected, parse_ms ve write_ms
+        """
+        names = list(names or CSV_SOURCES)
+        conn = sqlite3.connect(self.db_path)
         try:
-            df = pd.read_csv(csv_path, encoding='utf-8')
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for _, row in df.iterrows():
-                co2_min, co2_max = self.parse_co2_range(row.get('CO2 (kgCO2e/ürün)', ''))
+            conn.executescript(CSV_IMPORT_MANIFEST_SCHEMA)
+            checksums = dict(conn.execute("SELECT source, sha256 FROM csv_import_manifest"))
+            report = {}
+            with conn:
+                for loaded in self.load_csv_sources(names, checksums, workers):
+                    name = loaded['name']
+                    if loaded['status'] == 'unchanged':
+                        report[name] = {'status': 'unchanged'}
+                    if not self._report_loaded(loaded):
+                        continue
+                    
+                    started = time.perf_counter()
+                    data = loaded['data']
+                    result = self._apply_csv_diff(conn, name, data)
+                    conn.execute("""
+                        INSERT OR REPLACE INTO csv_import_manifest (source, path, sha256, row_count)
+                        VALUES (?, ?, ?, ?)
+                    """, (name, '/'.join(CSV_SOURCES[name]['path']), loaded['checksum'], len(data)))
+                    result.update(rows=len(data), rejected=loaded['rejected'], parse_ms=loaded['parse_ms'],
+                                  write_ms=round((time.perf_counter() - started) * 1000, 1))
+                    report[name] = result
+                    print(f"✅ {CSV_SOURCES[name]['label']} senkronize edildi: {result['inserted']} eklendi, "
+                          f"{result['updated']} güncellendi, {result['deleted']} silindi "
+                          f"(parse {result['parse_ms']} ms, yazma {result['write_ms']} ms)")
                 
-                cursor.execute('''
-                    INSERT INTO garment_processes 
-                    (category, process_step, description, applicable_product_groups, 
-                     co2_min, co2_max, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row.get('Kategori', ''),
-                    row.get('İşlem Adımı', ''),
-                    row.get('Açıklama', ''),
-                    row.get('Uygulanan Ürün Grupları', ''),
-                    co2_min,
-                    co2_max,
-                    row.get('Not', '')
-                ))
-            
-            conn.commit()
+                ranges = sorted({CATEGORY_RANGE_SOURCE_OF[CSV_SOURCES[name]['table']]
+                                 for name, result in report.items()
+                                 if result['status'] == 'synced'
+                                 and CSV_SOURCES[name]['table'] in CATEGORY_RANGE_SOURCE_OF})
+                if ranges:
+                    refresh_category_co2_ranges(conn, ranges)
+        finally:
             conn.close()
-            print(f"✅ Konfeksiyon süreçleri import edildi: {len(df)} kayıt")
-            
-        except Exception as e:
-            print(f"❌ Konfeksiyon süreçleri import hatası: {e}")
+        return report
     
-    def import_master_co2_data(self):
-        """Master CO2 verilerini import eder"""
-        csv_path = os.path.join(self.csv_dir, 'hazir_giyim_master_co2.csv')
+    def _apply_csv_diff(self, conn, name: str, data: pd.DataFrame) -> Dict:
+        """
+        Kaynağın yeni satırlarını tabloya ve satır kaydına fark olarak uygula
         
-        if not os.path.exists(csv_path):
-            print(f"❌ Dosya bulunamadı: {csv_path}")
-            return
+        İçeriği aynı kalan satırlar özetleriyle eşleşir ve dokunulmaz. Kalan
+        satırlar doğal anahtarla (key kolonları) eşleşirse yerinde güncellenir,
+        eşleşmeyenler eklenir ya da silinir.
+        """
+        source = CSV_SOURCES[name]
+        table = source['table']
+        columns = list(data.columns)
+        key_positions = [columns.index(column) for column in source['key']]
+        
+        rows = list(data.itertuples(index=False, name=None))
+        incoming = [(key, row_hash, row) for (key, row_hash), row in zip(_row_keys(rows, key_positions), rows)]
+        
+        previous = conn.execute(
+            "SELECT row_key, row_hash, row_id FROM csv_import_rows WHERE source = ?", (name,)
+        ).fetchall()
+        recorded = bool(previous)
+        if not recorded:
+            # İlk senkronizasyon: mevcut satırlarla eşleştir ki ID'ler korunsun
+            existing = conn.execute(f"SELECT id, {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+            existing_keys = _row_keys([row[1:] for row in existing], key_positions)
+            naturals = {_natural_key(row, key_positions) for row in rows}
+            previous = [(key, row_hash, row[0]) for (key, row_hash), row in zip(existing_keys, existing)
+                        if source.get('replace') or _natural_key(row[1:], key_positions) in naturals]
+        
+        # İçeriği değişmeyen satırlar: kayıttaki anahtarı farklıysa yalnızca kayıt yenilenir
+        by_hash = {}
+        for key, row_hash, row_id in previous:
+            by_hash.setdefault(row_hash, []).append((key, row_id))
+        manifest_rows, stale_keys, pending = [], [], []
+        for key, row_hash, row in incoming:
+            matches = by_hash.get(row_hash)
+            if not matches:
+                pending.append((key, row_hash, row))
+                continue
+            old_key, row_id = matches.pop(0)
+            if not recorded or old_key != key:
+                stale_keys.append(old_key)
+                manifest_rows.append((name, key, row_hash, row_id))
+        
+        # Değişen satırlar: aynı doğal anahtarlı eski satır, en çok kolonu aynı
+        # kalan yeni satırla eşleşip yerinde güncellenir
+        old_keys = {row_id: key for matches in by_hash.values() for key, row_id in matches}
+        old_rows = self._fetch_rows(conn, f"SELECT id, {', '.join(columns)} FROM {table}", sorted(old_keys))
+        candidates = {}
+        for entry in pending:
+            candidates.setdefault(_natural_key(entry[2], key_positions), []).append(entry)
+        updates = []
+        for old_row in old_rows:
+            group = candidates.get(_natural_key(old_row[1:], key_positions))
+            if not group:
+                continue
+            old_values = _row_values(old_row[1:])
+            best = max(group, key=lambda entry: sum(
+                a == b for a, b in zip(old_values, _row_values(entry[2]))))
+            group.remove(best)
+            key, row_hash, row = best
+            updates.append((key, row_hash, row, old_row[0]))
+        updated_ids = {row_id for *_, row_id in updates}
+        deleted = [(key, row_id) for row_id, key in sorted(old_keys.items()) if row_id not in updated_ids]
+        stale_keys += [old_keys[row_id] for row_id in sorted(updated_ids)]
+        unmatched = {id(entry) for group in candidates.values() for entry in group}
+        inserts = [entry for entry in pending if id(entry) in unmatched]
+        
+        cursor = conn.cursor()
+        cursor.executemany(f"DELETE FROM {table} WHERE id = ?", [(row_id,) for _, row_id in deleted])
+        if recorded:
+            cursor.executemany("DELETE FROM csv_import_rows WHERE source = ? AND row_key = ?",
+                               [(name, key) for key in stale_keys + [key for key, _ in deleted]])
+        
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        cursor.executemany(f"UPDATE {table} SET {assignments} WHERE id = ?",
+                           [(*row, row_id) for _, _, row, row_id in updates])
+        manifest_rows.extend((name, key, row_hash, row_id) for key, row_hash, _, row_id in updates)
+        
+        if inserts:
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [row for _, _, row in inserts]
+            )
+            # Yazma transaction'ı içinde AUTOINCREMENT ID'leri ardışık verilir
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            first_id = last_id - len(inserts) + 1
+            manifest_rows.extend((name, key, row_hash, first_id + offset)
+                                 for offset, (key, row_hash, _) in enumerate(inserts))
+        
+        cursor.executemany("""
+            INSERT OR REPLACE INTO csv_import_rows (source, row_key, row_hash, row_id)
+            VALUES (?, ?, ?, ?)
+        """, manifest_rows)
+        
+        return {
+            'status': 'synced',
+            'inserted': len(inserts),
+            'updated': len(updates),
+            'deleted': len(deleted),
+            'updated_ids': [row_id for _, _, _, row_id in updates]
+        }
+    
+    def _fetch_rows(self, conn, query: str, ids: List[int], chunk_size: int = 500) -> List[Tuple]:
+        """IN listesini SQLite parametre limitine göre bölerek satırları getir"""
+        rows = []
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            rows += conn.execute(f"{query} WHERE id IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+        return rows
+    
+    def stream_csv_source(self, name: str, chunk_rows: Optional[int] = None) -> Dict:
+        """
+        Büyük bir kaynağı parça parça okuyarak tamamen yeniden içe aktarır
+        
+        Dosya chunk_rows satırlık parçalar halinde okunur, doğrulanır ve bir
+        ara tabloya parça başına commit edilerek yazılır; bellek kullanımı dosya
+        boyutundan bağımsızdır. Son adımda ara tablo tek transaction'da asıl
+        tabloya aktarılır, okuyucular yarım yüklenmiş tablo görmez.
+        
+        Args:
+            name: CSV_SOURCES anahtarı
+            chunk_rows: Parça başına satır (varsayılan: CSV_IMPORT_CHUNK_ROWS)
             
+        Returns:
+            rows, rejected (toplam), rejected_sample (ilk reddedilenler), seconds
+        """
+        source = CSV_SOURCES[name]
+        table = source['table']
+        staging = f"{table}_staging"
+        chunk_rows = chunk_rows or self.import_chunk_rows
+        csv_path = self._csv_path(name)
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"Dosya bulunamadı: {csv_path}")
+        
+        started = time.perf_counter()
+        rows, rejected, rejected_sample = 0, 0, []
+        conn = sqlite3.connect(self.db_path)
         try:
-            df = pd.read_csv(csv_path, encoding='utf-8')
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for _, row in df.iterrows():
-                co2_range = row.get('CO2 (kgCO2e/ürün)', '')
-                co2_min, co2_max = self.parse_co2_range(co2_range)
-                
-                cursor.execute('''
-                    INSERT INTO master_co2_data 
-                    (upper_category, category, operation, description, applicable_product_groups, 
-                     co2_range, co2_min, co2_max, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row.get('Üst Kategori', ''),
-                    row.get('Kategori', ''),
-                    row.get('İşlem', ''),
-                    row.get('Açıklama', ''),
-                    row.get('Uygulanan Ürün Grupları', ''),
-                    co2_range,
-                    co2_min,
-                    co2_max,
-                    row.get('Not', '')
-                ))
+            conn.executescript(CSV_IMPORT_MANIFEST_SCHEMA)
+            columns = None
+            reader = pd.read_csv(csv_path, encoding='utf-8', chunksize=chunk_rows,
+                                 **source.get('read_csv', {}))
+            for chunk in reader:
+                data, chunk_rejected = self._prepare_csv_rows(name, chunk)
+                with conn:
+                    if columns is None:
+                        columns = ', '.join(data.columns)
+                        conn.execute(f"DROP TABLE IF EXISTS {staging}")
+                        conn.execute(f"CREATE TABLE {staging} AS SELECT {columns} FROM {table} WHERE 0")
+                    conn.executemany(
+                        f"INSERT INTO {staging} VALUES ({', '.join('?' * len(data.columns))})",
+                        data.itertuples(index=False, name=None)
+                    )
+                rows += len(data)
+                rejected += len(chunk_rejected)
+                rejected_sample.extend(chunk_rejected[:max(0, 5 - len(rejected_sample))])
+                elapsed = time.perf_counter() - started
+                print(f"⏳ {source['label']}: {rows} satır yazıldı, {rejected} reddedildi "
+                      f"({rows / elapsed:.0f} satır/sn)")
             
+            if columns is None:
+                raise ValueError(f"Boş CSV dosyası: {csv_path}")
+            with conn:
+                if source.get('replace'):
+                    conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} ORDER BY rowid")
+                conn.execute(f"DROP TABLE {staging}")
+                # Satır eşlemesi geçersiz; sonraki senkronizasyon tablodan yeniden kurar
+                conn.execute("DELETE FROM csv_import_manifest WHERE source = ?", (name,))
+                conn.execute("DELETE FROM csv_import_rows WHERE source = ?", (name,))
+                if table in CATEGORY_RANGE_SOURCE_OF:
+                    refresh_category_co2_ranges(conn, [CATEGORY_RANGE_SOURCE_OF[table]])
+        except Exception:
+            conn.execute(f"DROP TABLE IF EXISTS {staging}")
             conn.commit()
+            raise
+        finally:
             conn.close()
-            print(f"✅ Master CO2 verileri import edildi: {len(df)} kayıt")
-            
+        
+        seconds = time.perf_counter() - started
+        for row in rejected_sample:
+            print(f"⚠️ {source['label']} satır {row['line']} reddedildi: {row['reason']}")
+        print(f"✅ {source['label']} import edildi: {rows} kayıt, {rejected} reddedildi "
+              f"({seconds:.1f} sn, {rows / seconds:.0f} satır/sn)")
+        return {'rows': rows, 'rejected': rejected, 'rejected_sample': rejected_sample,
+                'seconds': round(seconds, 3)}
+    
+    def _import_csv_source(self, name: str):
+        """Tek kaynağı içe aktar; hata olursa bildir ve devam et"""
+        try:
+            self.import_csv_sources([name])
         except Exception as e:
-            print(f"❌ Master CO2 verileri import hatası: {e}")
+            print(f"❌ {CSV_SOURCES[name]['label']} import hatası: {e}")
+    
+    def import_finished_product_operations(self):
+        """Bitmiş ürün işlemleri CSV'sini import eder"""
+        self._import_csv_source('finished_product_operations')
+    
+    def import_garment_processes(self):
+        """Konfeksiyon süreçleri CSV'sini import eder"""
+        self._import_csv_source('garment_processes')
+    
+    def import_master_co2_data(self):
+        """Master CO2 verilerini import eder"""
+        self._import_csv_source('master_co2_data')
     
     def extract_and_import_categories(self):
         """Tüm CSV dosyalarından ürün kategorilerini çıkarır ve kategoriler tablosuna ekler"""
@@ -430,12 +1092,10 @@ class DatabaseSetup:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        for category in categories:
-            if category and category.strip():
-                cursor.execute('''
-                    INSERT OR IGNORE INTO product_categories (name)
-                    VALUES (?)
-                ''', (category.strip(),))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO product_categories (name)
+            VALUES (?)
+        ''', [(category.strip(),) for category in categories if category and category.strip()])
         
         conn.commit()
         conn.close()
@@ -494,6 +1154,7 @@ class DatabaseSetup:
             cursor.execute(style_processes_table)
             conn.commit()
             conn.close()
+            self.create_indexes()
             
             print("✓ Stil tabloları oluşturuldu")
             
@@ -501,6 +1162,91 @@ class DatabaseSetup:
             print(f"✗ Stil tabloları oluşturulurken hata: {e}")
             raise e
     
+    def create_indexes(self) -> List[str]:
+        """
+        Eksik indeksleri oluştur (mevcut veritabanları için migration)
+        
+        Henüz oluşturulmamış tablolar atlanır.
+        
+        Returns:
+            Yeni oluşturulan indekslerin adları
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            existing = {name: kind for name, kind in conn.execute(
+                "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'index')"
+            )}
+            created = []
+            for table, indexes in SCHEMA_INDEXES.items():
+                if existing.get(table) != 'table':
+                    continue
+                for name, columns in indexes:
+                    if name not in existing:
+                        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+                        created.append(name)
+            conn.commit()
+            return created
+        finally:
+            conn.close()
+    
+    def create_stats_tables(self) -> bool:
+        """
+        İstatistik tablosunu ve trigger'larını oluştur (mevcut veritabanları için migration)
+        
+        Tablo yeni oluşturulursa sayaçlar mevcut satırlardan doldurulur.
+        
+        Returns:
+            Tablo yeni oluşturulduysa True
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'database_stats'"
+            ).fetchone()
+            if not exists:
+                conn.execute(DATABASE_STATS_SCHEMA)
+                self._populate_stats(conn)
+            for statement in _stats_triggers():
+                conn.execute(statement)
+            conn.execute("COMMIT")
+            return not exists
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+    
+    def rebuild_database_stats(self):
+        """Sayaçları kaynak tablolardan yeniden hesapla"""
+        self.create_stats_tables()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                self._populate_stats(conn)
+        finally:
+            conn.close()
+    
+    def _populate_stats(self, conn):
+        """Tüm sayaçları ve CO2 aralığını tek statement ile yaz"""
+        counts = " UNION ALL ".join(
+            f"SELECT '{table}', COUNT(*), 0, 0, NULL, NULL FROM {table}"
+            for table in STATS_TABLES if table != 'master_co2_data'
+        )
+        conn.execute(f"""
+            INSERT OR REPLACE INTO database_stats
+            (table_name, row_count, co2_count, co2_avg_sum, co2_min, co2_max)
+            {counts}
+            UNION ALL
+            SELECT 'master_co2_data', COUNT(*),
+                   COUNT(CASE WHEN {CO2_RANGE_ROW} THEN 1 END),
+                   coalesce(SUM(CASE WHEN {CO2_RANGE_ROW} THEN (co2_min + co2_max) / 2 END), 0),
+                   MIN(CASE WHEN {CO2_RANGE_ROW} THEN co2_min END),
+                   MAX(CASE WHEN {CO2_RANGE_ROW} THEN co2_max END)
+            FROM master_co2_data
+        """)
+    
     def setup_complete_database(self):
         """Tam veritabanı kurulumunu gerçekleştirir"""
         print("🚀 Zero@Design Veritabanı Kurulumu Başlıyor...")
@@ -511,103 +1257,27 @@ class DatabaseSetup:
         # 2. Stil tablolarını oluştur
         self.create_styles_tables()
         
-        # 3. CSV dosyalarını import et
-        self.import_finished_product_operations()
-        self.import_garment_processes()
-        self.import_master_co2_data()
-        
-        # 4. Final_Dosyalar'dan yeni CSV'leri import et
-        self.import_master_konfeksiyon()
-        self.import_product_fabric_co2()
+        # 3. CSV dosyalarını senkronize et (değişmeyen dosyalar atlanır)
+        try:
+            self.sync_csv_sources()
+        except Exception as e:
+            print(f"❌ CSV import hatası, hiçbir tablo değiştirilmedi: {e}")
         
-        # 5. Kategorileri çıkar ve ekle
+        # 4. Kategorileri çıkar ve ekle
         self.extract_and_import_categories()
         
         print("🎉 Veritabanı kurulumu tamamlandı!")
     
     def import_master_konfeksiyon(self):
         """Master Konfeksiyon CSV'sini import eder"""
-        csv_path = os.path.join(self.csv_dir, 'Final_Dosyalar', 'Master_Konfeksiyon copy.csv')
-        
-        if not os.path.exists(csv_path):
-            print(f"❌ Dosya bulunamadı: {csv_path}")
-            return
-            
-        try:
-            df = pd.read_csv(csv_path, encoding='utf-8')
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Önce tabloyu temizle
-            cursor.execute('DELETE FROM master_konfeksiyon')
-            
-            for _, row in df.iterrows():
-                cursor.execute('''
-                    INSERT INTO master_konfeksiyon 
-                    (category, name, type, unit, stage, description, 
-                     min_co2_kg, max_co2_kg, avg_co2_kg, source, source_file)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row.get('category', ''),
-                    row.get('name', ''),
-                    row.get('type', ''),
-                    row.get('unit', ''),
-                    row.get('stage', ''),
-                    row.get('description', ''),
-                    row.get('min_co2_kg', None),
-                    row.get('max_co2_kg', None),
-                    row.get('avg_co2_kg', None),
-                    row.get('source', ''),
-                    row.get('source_file', '')
-                ))
-            
-            conn.commit()
-            conn.close()
-            print(f"✅ Master Konfeksiyon import edildi: {len(df)} kayıt")
-            
-        except Exception as e:
-            print(f"❌ Master Konfeksiyon import hatası: {e}")
+        self._import_csv_source('master_konfeksiyon')
     
     def import_product_fabric_co2(self):
-        """Ürün Kumaş CO2 CSV'sini import eder"""
-        csv_path = os.path.join(self.csv_dir, 'Final_Dosyalar', 'Urun_Kumas_CO2_Listesi.csv')
-        
-        if not os.path.exists(csv_path):
-            print(f"❌ Dosya bulunamadı: {csv_path}")
-            return
-            
+        """Ürün Kumaş CO2 CSV'sini parça parça import eder (tedarikçi dökümleri çok büyük olabilir)"""
         try:
-            df = pd.read_csv(csv_path, encoding='utf-8', delimiter=';')
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Önce tabloyu temizle
-            cursor.execute('DELETE FROM product_fabric_co2')
-            
-            for _, row in df.iterrows():
-                cursor.execute('''
-                    INSERT INTO product_fabric_co2 
-                    (gender, category, product, fabric_type, composition, 
-                     usage_hint, co2_kg_per_kg)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    row.get('gender', ''),
-                    row.get('category', ''),
-                    row.get('product', ''),
-                    row.get('fabric_type', ''),
-                    row.get('composition', ''),
-                    row.get('usage_hint', ''),
-                    row.get('co2_kg_per_kg', None)
-                ))
-            
-            conn.commit()
-            conn.close()
-            print(f"✅ Ürün Kumaş CO2 import edildi: {len(df)} kayıt")
-            
+            self.stream_csv_source('product_fabric_co2')
         except Exception as e:
-            print(f"❌ Ürün Kumaş CO2 import hatası: {e}")
+            print(f"❌ {CSV_SOURCES['product_fabric_co2']['label']} import hatası: {e}")
         self.show_database_stats()
     
     def show_database_stats(self):
@@ -633,6 +1303,10 @@ class DatabaseSetup:
         conn.close()
 
 if __name__ == "__main__":
-    # Veritabanı kurulumunu çalıştır
     db_setup = DatabaseSetup()
-    db_setup.setup_complete_database()
\ No newline at end of file
+    if sys.argv[1:] == ['snapshot']:
+        # Referans CSV'lerin Parquet/Arrow snapshot'larını oluştur
+        db_setup.build_reference_snapshots()
+    else:
+        # Veritabanı kurulumunu çalıştır
+        db_setup.setup_complete_database()
\ No newline at end of file
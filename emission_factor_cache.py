@@ -0,0 +1,248 @@
+"""
+Zero@Design - Emisyon Faktörü Önbelleği
+Kumaş, aksesuar, işlem ve lifecycle faktörlerini UUID bazında bellekte tutar.
+Geçersiz kılma, mevcut updated_at trigger'larının yükselttiği high-water mark
+değerleri arka planda periyodik olarak sorgulanarak yapılır.
+
+Trigger'lar updated_at'e transaction başlangıç zamanını yazar; kontrolden önce
+başlayıp sonra commit edilen bir güncelleme high-water mark'ın gerisinde kalır.
+Bu yüzden her kontrolde high-water mark'tan geriye doğru bir örtüşme penceresi
+yeniden taranır ve pencerede daha önce görülmemiş (UUID, updated_at) satırları
+geçersiz kılınır.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tablo -> önbellek türü eşlemesi (emissions satırları process_id ile işlemlere bağlı)
+WATCHED_TABLES = {
+    'fabrics': ('fabrics', 'id'),
+    'accessories': ('accessories', 'id'),
+    'processes': ('processes', 'id'),
+    'emissions': ('processes', 'process_id'),
+    'lifecycle_master': ('lifecycle', 'id'),
+}
+
+WATERMARK_QUERY = " UNION ALL ".join(
+    f"SELECT '{table}' AS table_name, MAX(updated_at) AS max_updated_at, COUNT(*) AS row_count FROM {table}"
+    for table in WATCHED_TABLES
+)
+
+# Bulunamayan UUID'ler de önbelleğe alınır; aksi halde lifecycle fallback
+# kontrolü her hesaplamada veritabanına giderdi.
+_MISSING = object()
+
+
+class EmissionFactorCache:
+    """Boyut sınırlı (LRU) emisyon faktörü önbelleği"""
+
+    KINDS = ('fabrics', 'accessories', 'processes', 'lifecycle')
+
+    def __init__(self, connection_factory: Callable,
+                 max_size: Optional[int] = None,
+                 poll_interval: Optional[float] = None,
+                 poll_overlap: Optional[float] = None):
+        """
+        Args:
+            connection_factory: Context manager döndüren bağlantı fabrikası
+            max_size: Önbellekte tutulacak maksimum kayıt sayısı
+            poll_interval: updated_at high-water mark kontrol aralığı (sn, 0 = kapalı)
+            poll_overlap: High-water mark'tan geriye yeniden taranan pencere (sn);
+                en uzun yazma transaction'ından uzun olmalı
+        """
+        self.connection_factory = connection_factory
+        self.max_size = int(max_size if max_size is not None
+                            else os.getenv('CO2_FACTOR_CACHE_SIZE', '10000'))
+        self.poll_interval = float(poll_interval if poll_interval is not None
+                                   else os.getenv('CO2_FACTOR_CACHE_POLL_SECONDS', '30'))
+        self.poll_overlap = float(poll_overlap if poll_overlap is not None
+                                  else os.getenv('CO2_FACTOR_CACHE_POLL_OVERLAP_SECONDS', '60'))
+
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._watermarks = None
+        # Tablo -> son örtüşme penceresindeki (UUID, updated_at) sayıları
+        self._recent = {}
+        self._watcher_pid = None
+        # Her geçersiz kılmada artar; DB okuması sürerken gelen değişikliklerin
+        # eski satırlarla ezilmesini engeller
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    # Önbellek erişimi
+    def get_many(self, kind: str, ids: Iterable[str]) -> Tuple[Dict, List[str]]:
+        """
+        Önbellekteki faktörleri getir
+
+        Returns:
+            Tuple[bulunan UUID -> satır, önbellekte olmayan UUID listesi]
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for item_id in ids:
+                key = (kind, item_id)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    value = self._entries[key]
+                    if value is not _MISSING:
+                        found[item_id] = value
+                    self.hits += 1
+                else:
+                    missing.append(item_id)
+                    self.misses += 1
+        return found, missing
+
+    def put_many(self, kind: str, rows: Dict, requested_ids: Iterable[str],
+                 generation: Optional[int] = None):
+        """
+        Veritabanından gelen satırları (ve bulunamayanları) önbelleğe yaz
+
+        Args:
+            kind: Faktör türü
+            rows: UUID -> satır eşlemesi
+            requested_ids: Sorgulanan UUID'ler (dönmeyenler "yok" olarak işaretlenir)
+            generation: Okuma başlamadan önceki generation; arada geçersiz
+                kılma olduysa satırlar yazılmaz
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            for item_id in requested_ids:
+                key = (kind, item_id)
+                self._entries[key] = rows.get(item_id, _MISSING)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind: str, ids: Optional[Iterable[str]] = None):
+        """Belirli UUID'leri ya da bir türün tamamını önbellekten çıkar"""
+        with self._lock:
+            self.generation += 1
+            if ids is None:
+                for key in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[key]
+            else:
+                for item_id in ids:
+                    self._entries.pop((kind, item_id), None)
+
+    def clear(self):
+        """Önbelleği tamamen temizle"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Önbellek istatistikleri"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def watermarks(self) -> Dict:
+        """Son kontrolde okunan tablo -> (max updated_at, satır sayısı) değerleri"""
+        return dict(self._watermarks or {})
+
+    # Geçersiz kılma
+    def ensure_watching(self):
+        """
+        Bu süreç için high-water mark izlemeyi başlat
+
+        İlk çağrıda başlangıç değerleri senkron alınır; sonraki kontroller
+        arka plan thread'inde yapılır, hesaplamalar veritabanına gitmez.
+        """
+        pid = os.getpid()
+        if self._watcher_pid == pid:
+            return
+        with self._lock:
+            if self._watcher_pid == pid:
+                return
+            # Fork sonrası ebeveyn sürecin önbelleğine güvenme
+            self.clear()
+            self._watermarks = None
+            self._recent = {}
+            self.poll()
+            if self.poll_interval > 0:
+                watcher = threading.Thread(
+                    target=self._watch, name='emission-factor-cache', daemon=True
+                )
+                watcher.start()
+            self._watcher_pid = pid
+
+    def _watch(self):
+        """Periyodik high-water mark kontrol döngüsü"""
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Emisyon faktörü önbellek kontrol hatası: {e}")
+
+    def poll(self):
+        """updated_at high-water mark ve satır sayılarını kontrol edip değişenleri geçersiz kıl"""
+        with self.connection_factory() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(WATERMARK_QUERY)
+                watermarks = {
+                    table: (max_updated_at, row_count)
+                    for table, max_updated_at, row_count in cursor.fetchall()
+                }
+
+                previous = self._watermarks
+                self._watermarks = watermarks
+
+                selects = []
+                params = {'overlap': self.poll_overlap}
+                cleared = set()
+                for table, (kind, id_column) in WATCHED_TABLES.items():
+                    new_max, new_count = watermarks.get(table, (None, None))
+                    if previous is None:
+                        # İlk kontrolde pencere yalnızca karşılaştırma tabanı olarak okunur
+                        old_max, old_count = new_max, new_count
+                    else:
+                        old_max, old_count = previous.get(table, (None, None))
+                    if old_count != new_count:
+                        # Silme/ekleme: hangi UUID'lerin etkilendiği bilinemez
+                        self.invalidate(kind)
+                        cleared.add(table)
+                        logger.info(f"Emisyon faktörü önbelleği temizlendi: {table}")
+                    if new_max is None:
+                        continue
+                    # old_max yoksa (önceden updated_at'i olmayan tablo) tüm satırlar taranır
+                    select = f"SELECT '{table}', {id_column}::text, updated_at FROM {table}"
+                    if old_max is not None:
+                        select += f" WHERE updated_at >= %({table})s - %(overlap)s * INTERVAL '1 second'"
+                        params[table] = old_max
+                    selects.append(select)
+
+                recent = {}
+                if selects:
+                    cursor.execute(" UNION ALL ".join(selects), params)
+                    for table, item_id, updated_at in cursor.fetchall():
+                        recent.setdefault(table, Counter())[(item_id, updated_at)] += 1
+
+        changed = []
+        if previous is not None:
+            for table, rows in recent.items():
+                if table in cleared:
+                    continue
+                seen = self._recent.get(table, Counter())
+                kind = WATCHED_TABLES[table][0]
+                changed += [(kind, item_id) for (item_id, updated_at), count in rows.items()
+                            if count > seen[(item_id, updated_at)]]
+        self._recent = recent
+
+        for kind, item_id in changed:
+            self.invalidate(kind, [item_id])
+        if changed:
+            logger.info(f"Emisyon faktörü önbelleği: {len(changed)} kayıt geçersiz kılındı")
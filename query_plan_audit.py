@@ -0,0 +1,207 @@
+"""
+Zero@Design - Sorgu Planı Denetimi
+DatabaseManager'ın sık kullanılan (hot) sorgularını çalıştırıp her SELECT için
+EXPLAIN QUERY PLAN alır; indekssiz tam tablo taraması yapan sorgu varsa hata verir.
+
+Kullanım:
+    python query_plan_audit.py [zero_design.db]
+
+Denetim veritabanının geçici bir kopyası üzerinde, eksik indeksler
+oluşturulduktan sonra yapılır; asıl dosyaya yazılmaz.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from typing import Callable, Dict, List, Tuple
+
+from database_manager import DatabaseManager
+from database_setup import DatabaseSetup
+
+# Tam taramasına izin verilen küçük tablolar: tablo -> gerekçe
+ALLOWED_SCANS = {
+    'database_stats': 'tablo başına tek satır',
+}
+
+# Tabloyu bilerek baştan okuyan sorgular (filtresiz listeler, indeks sırasıyla
+# okunan ilk sayfalar ve DISTINCT listeleri)
+FULL_LIST_QUERIES = {
+    'finished products', 'finished products page',
+    'garment processes', 'garment processes page',
+    'master co2 data', 'master co2 data page',
+    'master konfeksiyon', 'master konfeksiyon page',
+    'fabric co2',
+    'categories by table', 'product categories',
+    'co2 calculations',
+    'all styles', 'all styles page',
+}
+
+# Bilinen tam taramalar: etiket -> gerekçe. Raporda görünür, çıkış kodunu bozmaz;
+# düzeltildiğinde listeden çıkarılmalı.
+KNOWN_SCANS = {
+    'finished products by category': "category LIKE '%...%' B-tree indeksi kullanamaz",
+    'operations by product group': "applicable_product_groups LIKE '%...%' B-tree indeksi kullanamaz",
+}
+
+_SCAN = re.compile(r'^SCAN (\S+)(.*)$')
+
+
+def _first_page_cursor(method: Callable, **kwargs) -> Dict:
+    """Sayfalı sorgunun ikinci sayfası için cursor'lu parametreler"""
+    page = method(limit=2, **kwargs)
+    return dict(kwargs, limit=2, cursor=page['next_cursor'])
+
+
+# (etiket, DatabaseManager ile çağrılacak fonksiyon)
+HOT_QUERIES: List[Tuple[str, Callable[[DatabaseManager], object]]] = [
+    ('finished products', lambda m: m.get_finished_product_operations()),
+    ('finished products by category', lambda m: m.get_finished_product_operations('Baskı')),
+    ('finished products page', lambda m: m.get_finished_product_operations(
+        **_first_page_cursor(m.get_finished_product_operations))),
+    ('operations by product group', lambda m: m.get_operations_by_product_group('Tops')),
+    ('garment processes', lambda m: m.get_garment_processes()),
+    ('garment processes page', lambda m: m.get_garment_processes(
+        **_first_page_cursor(m.get_garment_processes))),
+    ('master co2 data', lambda m: m.get_master_co2_data()),
+    ('master co2 data page', lambda m: m.get_master_co2_data(
+        **_first_page_cursor(m.get_master_co2_data))),
+    ('master konfeksiyon', lambda m: m.get_master_konfeksiyon_data()),
+    ('master konfeksiyon page', lambda m: m.get_master_konfeksiyon_data(
+        **_first_page_cursor(m.get_master_konfeksiyon_data))),
+    ('fabric co2', lambda m: m.get_product_fabric_co2_data()),
+    ('fabric co2 by gender', lambda m: m.get_product_fabric_co2_data(gender='Men')),
+    ('fabric co2 page', lambda m: m.get_product_fabric_co2_data(
+        **_first_page_cursor(m.get_product_fabric_co2_data, gender='Men'))),
+    ('fabric types', lambda m: m.get_fabric_types()),
+    ('compositions', lambda m: m.get_compositions()),
+    ('categories by table', lambda m: m.get_categories_by_table()),
+    ('product categories', lambda m: m.get_product_categories()),
+    ('search operations', lambda m: m.search_operations('baski')),
+    ('co2 calculations', lambda m: m.get_co2_calculations()),
+    ('co2 range by category', lambda m: m.get_co2_range_by_category('Tops')),
+    ('database stats', lambda m: m.get_database_stats(max_age=0)),
+    ('all styles', lambda m: m.get_all_styles()),
+    ('all styles page', lambda m: m.get_all_styles(limit=20)),
+    ('collections', lambda m: m.get_collections()),
+    ('styles by collection', lambda m: m.get_styles_by_collection('SS25', full=True)),
+    ('style data', lambda m: m.get_styles_full(['ST-001', 'ST-002'])),
+]
+
+
+def _real_tables(conn) -> set:
+    """Sanal tablolar (FTS) hariç tablolar; sanal tablo taramasını modül indeksler"""
+    return {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND sql NOT LIKE 'CREATE VIRTUAL TABLE%'"
+    )}
+
+
+def explain(conn, statement: str) -> List[str]:
+    """Statement için EXPLAIN QUERY PLAN adımları"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+
+
+def full_scans(plan: List[str], tables: set) -> List[str]:
+    """
+    Tam taranan gerçek tablolar
+
+    "SCAN tablo USING INDEX ..." da tabloyu indeks sırasıyla baştan sona okur;
+    yalnızca SEARCH adımları indeksle aranmış sayılır.
+    """
+    scans = []
+    for step in plan:
+        match = _SCAN.match(step)
+        if match and match.group(1) in tables:
+            scans.append(match.group(1))
+    return scans
+
+
+def audit(db_path: str) -> List[Dict]:
+    """
+    Hot sorguları verilen veritabanında çalıştırıp planlarını denetle
+
+    Args:
+        db_path: Denetlenecek (indeksleri oluşturulmuş) veritabanı
+
+    Returns:
+        Her SELECT için label, sql, plan, full_scans (izin verilmeyen tam
+        taramalar), known (KNOWN_SCANS'ta) ve temp_sort alanları
+    """
+    DatabaseSetup(db_path).create_stats_tables()
+    manager = DatabaseManager(db_path)
+    # Eksik şema nesnelerini (arama, özet tabloları) önceden oluştur
+    manager.ensure_category_co2_ranges()
+    manager.ensure_search_index()
+
+    conn = manager.get_connection()
+    tables = _real_tables(conn)
+    results = []
+    try:
+        for label, call in HOT_QUERIES:
+            statements = []
+            conn.set_trace_callback(statements.append)
+            try:
+                call(manager)
+            finally:
+                conn.set_trace_callback(None)
+
+            for statement in statements:
+                if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                    continue
+                plan = explain(conn, statement)
+                scans = [] if label in FULL_LIST_QUERIES else [
+                    table for table in full_scans(plan, tables) if table not in ALLOWED_SCANS
+                ]
+                results.append({
+                    'label': label,
+                    'sql': ' '.join(statement.split()),
+                    'plan': plan,
+                    'full_scans': scans,
+                    'known': bool(scans) and label in KNOWN_SCANS,
+                    'temp_sort': any('USE TEMP B-TREE' in step for step in plan)
+                })
+    finally:
+        manager.close()
+    return results
+
+
+def main(argv: List[str]) -> int:
+    source = argv[1] if len(argv) > 1 else 'zero_design.db'
+    if not os.path.exists(source):
+        print(f"❌ Veritabanı bulunamadı: {source}")
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'audit.db')
+        with sqlite3.connect(source) as src, sqlite3.connect(db_path) as dst:
+            src.backup(dst)
+
+        created = DatabaseSetup(db_path).create_indexes()
+        if created:
+            print(f"ℹ️ Eksik indeksler kopyada oluşturuldu: {', '.join(created)}")
+
+        results = audit(db_path)
+
+    failures = known = 0
+    for result in results:
+        if result['known']:
+            status = '❌ (bilinen)'
+            known += 1
+        elif result['full_scans']:
+            status = '❌'
+            failures += 1
+        else:
+            status = '⚠️' if result['temp_sort'] else '✅'
+        print(f"{status} {result['label']}: {result['sql'][:160]}")
+        if result['known']:
+            print(f"      Bilinen tam tarama: {KNOWN_SCANS[result['label']]}")
+        for step in result['plan']:
+            print(f"      {step}")
+
+    print(f"\n{len(results)} sorgu denetlendi, {failures} tam tablo taraması, {known} bilinen tam tarama")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,167 @@
+"""
+Zero@Design - Referans Veri Snapshot'ı
+Referans CSV'lerin parse edilmiş, tipli kopyaları: bellek eşlemeli (kopyasız)
+okunan Arrow IPC dosyası ve taşınabilir Parquet dosyası. Snapshot'lar
+DatabaseSetup.build_reference_snapshots ile oluşturulur.
+
+pyarrow requirements.txt ile kurulur; kurulu olmayan ortamlarda snapshot
+kullanılmaz, CSV'ler parse edilir.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.getenv(
+    'REFERENCE_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'reference')
+)
+
+
+def available() -> bool:
+    """pyarrow kurulu mu"""
+    return pa is not None
+
+
+def _paths(name: str, snapshot_dir: Optional[str]) -> Tuple[str, str]:
+    base = os.path.join(snapshot_dir or SNAPSHOT_DIR, name)
+    return f"{base}.arrow", f"{base}.parquet"
+
+
+def write_snapshot(name: str, data: pd.DataFrame, numeric_columns: Iterable[str],
+                   checksum: str, rejected: List[Dict], snapshot_dir: Optional[str] = None) -> str:
+    """
+    Parse edilmiş kaynağı Arrow IPC ve Parquet olarak yaz
+
+    Args:
+        name: Kaynak adı (CSV_SOURCES anahtarı)
+        data: Tablo kolonlarıyla satırlar (NaN -> None)
+        numeric_columns: float64'e zorlanacak kolonlar (diğerlerinin tipi değerlerden çıkarılır)
+        checksum: Kaynak CSV'nin SHA-256 özeti
+        rejected: Parse sırasında reddedilen satırlar
+        snapshot_dir: Hedef klasör (varsayılan: REFERENCE_SNAPSHOT_DIR)
+
+    Returns:
+        Arrow IPC dosya yolu
+    """
+    if pa is None:
+        raise RuntimeError("Snapshot için pyarrow kurulu olmalı")
+
+    numeric_columns = set(numeric_columns)
+    fields, arrays = [], []
+    for column in data.columns:
+        if column in numeric_columns:
+            array = pa.array(pd.to_numeric(data[column]), type=pa.float64(), from_pandas=True)
+        else:
+            try:
+                # Tam sayı, bool ve tarih kolonları kendi tipleriyle saklanır
+                array = pa.array(data[column], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Karışık tipli kolon yalnızca metin olarak saklanabilir
+                array = pa.array([None if value is None else str(value) for value in data[column]],
+                                 type=pa.string())
+        fields.append(pa.field(column, array.type))
+        arrays.append(array)
+    schema = pa.schema(fields, metadata={
+        'source_sha256': checksum,
+        'rejected': json.dumps(rejected, ensure_ascii=False)
+    })
+    table = pa.Table.from_arrays(arrays, schema=schema)
+
+    arrow_path, parquet_path = _paths(name, snapshot_dir)
+    os.makedirs(os.path.dirname(arrow_path), exist_ok=True)
+    # Okuyucular yarım yazılmış dosya görmesin
+    with pa.OSFile(f"{arrow_path}.tmp", 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+    pq.write_table(table, f"{parquet_path}.tmp")
+    os.replace(f"{arrow_path}.tmp", arrow_path)
+    os.replace(f"{parquet_path}.tmp", parquet_path)
+    return arrow_path
+
+
+def open_table(name: str, columns: Optional[List[str]] = None,
+               snapshot_dir: Optional[str] = None):
+    """
+    Snapshot'ı bellek eşlemeli aç
+
+    Arrow IPC dosyası kopyalanmadan okunur; yalnızca Parquet varsa o okunur.
+
+    Returns:
+        pyarrow.Table; pyarrow yoksa ya da snapshot oluşturulmamışsa None
+    """
+    if pa is None:
+        return None
+    arrow_path, parquet_path = _paths(name, snapshot_dir)
+    if os.path.exists(arrow_path):
+        table = pa.ipc.open_file(pa.memory_map(arrow_path)).read_all()
+        return table.select(columns) if columns else table
+    if os.path.exists(parquet_path):
+        return pq.read_table(parquet_path, columns=columns, memory_map=True)
+    return None
+
+
+def snapshot_checksum(name: str, snapshot_dir: Optional[str] = None) -> Optional[str]:
+    """Snapshot'ın üretildiği CSV içeriğinin SHA-256 özeti"""
+    try:
+        table = open_table(name, snapshot_dir=snapshot_dir)
+    except (OSError, pa.ArrowInvalid) as e:
+        logger.warning(f"{name} snapshot'ı okunamadı: {e}")
+        return None
+    if table is None:
+        return None
+    return (table.schema.metadata or {}).get(b'source_sha256', b'').decode() or None
+
+
+def load_frame(name: str, columns: Optional[List[str]] = None,
+               snapshot_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Analiz için snapshot'ı DataFrame olarak yükle
+
+    Returns:
+        Tipli kolonlarla DataFrame (co2_min/co2_max float64); snapshot yoksa None
+    """
+    table = open_table(name, columns, snapshot_dir)
+    return None if table is None else table.to_pandas()
+
+
+def read_source(name: str, checksum: str,
+                snapshot_dir: Optional[str] = None) -> Optional[Tuple[pd.DataFrame, List[Dict]]]:
+    """
+    İçe aktarma için snapshot'ı oku
+
+    Args:
+        name: Kaynak adı
+        checksum: Güncel CSV içeriğinin SHA-256 özeti
+
+    Returns:
+        (satırlar (NaN -> None), reddedilen satırlar); snapshot yoksa ya da
+        farklı bir CSV içeriğinden üretilmişse None
+    """
+    try:
+        table = open_table(name, snapshot_dir=snapshot_dir)
+    except (OSError, pa.ArrowInvalid) as e:
+        logger.warning(f"{name} snapshot'ı okunamadı, CSV kullanılacak: {e}")
+        return None
+    if table is None:
+        return None
+
+    metadata = table.schema.metadata or {}
+    if metadata.get(b'source_sha256', b'').decode() != checksum:
+        return None
+    # Boş değer içeren tam sayı ve tarih kolonları float/Timestamp'e dönmesin
+    data = table.to_pandas(integer_object_nulls=True, date_as_object=True)
+    return data.astype(object).where(data.notna(), None), json.loads(metadata.get(b'rejected', b'[]'))
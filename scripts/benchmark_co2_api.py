@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Zero@Design - CO₂ hesaplama benchmark'ı
+
+Senkron (psycopg2 + thread) ve asenkron (asyncpg + asyncio) hesaplama yollarını
+aynı makinede, aynı BOM ve eşzamanlılık ile karşılaştırır.
+
+Kullanım:
+    # Süreç içi: CO2Calculator vs AsyncCO2Calculator (doğrudan veritabanı, iki taraf
+    # da faktörleri her istekte okur; --sync-factor-cache senkron önbelleği açar)
+    python scripts/benchmark_co2_api.py inprocess --requests 2000 --concurrency 50
+
+    # HTTP: gunicorn (Flask) ve uvicorn (ASGI) endpoint'lerini ayrı ayrı ölç
+    python scripts/benchmark_co2_api.py http --url http://localhost:8001/api/calculate-co2 \\
+        --header "Authorization: Bearer $CO2_API_TOKEN" --requests 2000 --concurrency 50
+    python scripts/benchmark_co2_api.py http --url http://localhost:5000/api/calculate-co2 \\
+        --header "Cookie: session=..." --header "X-CSRF-Token: ..." --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def load_payload(path):
+    """Benchmark BOM'u: dosyadan ya da katalogdaki ilk öğelerden"""
+    if path:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    from co2_calculator import co2_calculator
+    items = co2_calculator.get_available_items()
+    if 'error' in items:
+        sys.exit(f"Katalog okunamadı: {items['error']}")
+    accessories = items['accessories'][:3]
+    return {
+        'fabric_id': str(items['fabrics'][0]['id']) if items['fabrics'] else None,
+        'fabric_quantity_kg': 0.35,
+        'accessory_ids': [str(a['id']) for a in accessories],
+        'accessory_quantities': [0.01] * len(accessories),
+        'process_ids': [str(p['id']) for p in items['processes'][:5]]
+    }
+
+
+def report(label, count, elapsed, errors):
+    print(f"{label:<38} {count:>7} istek  {elapsed:>8.2f} sn  "
+          f"{count / elapsed:>9.1f} istek/sn  {errors} hata")
+
+
+def bench_sync(payload, requests, concurrency, factor_cache=False):
+    """
+    psycopg2 havuzu + thread havuzu (gunicorn gthread worker benzeri)
+
+    AsyncCO2Calculator her istekte faktörleri veritabanından okur; karşılaştırma
+    sürücü/eşzamanlılık modelini ölçsün diye varsayılan olarak faktör önbelleği
+    kapalı yeni bir CO2Calculator kullanılır.
+    """
+    from co2_calculator import CO2Calculator
+
+    calculator = CO2Calculator()
+    if not factor_cache:
+        calculator.factor_cache = None
+    label = f"sync (psycopg2, thread, {'önbellekli' if factor_cache else 'önbelleksiz'})"
+
+    def run(_):
+        return 'error' in calculator.calculate_total_co2(**payload)
+
+    calculator.calculate_total_co2(**payload)  # ısınma
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        errors = sum(executor.map(run, range(requests)))
+    report(label, requests, time.perf_counter() - started, errors)
+
+
+async def bench_async(payload, requests, concurrency):
+    """asyncpg havuzu + asyncio (tek event loop)"""
+    from async_co2_calculator import AsyncCO2Calculator
+
+    calculator = AsyncCO2Calculator()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run():
+        async with semaphore:
+            return 'error' in await calculator.calculate_total_co2(**payload)
+
+    await calculator.calculate_total_co2(**payload)  # ısınma
+    started = time.perf_counter()
+    errors = sum(await asyncio.gather(*(run() for _ in range(requests))))
+    report('async (asyncpg, asyncio, önbelleksiz)', requests, time.perf_counter() - started, errors)
+    await calculator.close()
+
+
+def bench_http(url, headers, payload, requests, concurrency):
+    """HTTP endpoint'ine eşzamanlı POST isteği gönder"""
+    import threading
+    import requests as http
+
+    local = threading.local()
+
+    def run(_):
+        if not hasattr(local, 'session'):
+            local.session = http.Session()
+            local.session.headers.update(headers)
+        response = local.session.post(url, json=payload, timeout=30)
+        return response.status_code != 200
+
+    run(None)  # ısınma
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        errors = sum(executor.map(run, range(requests)))
+    report(url, requests, time.perf_counter() - started, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CO₂ hesaplama benchmark')
+    parser.add_argument('mode', choices=['inprocess', 'http'])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--payload', help='BOM JSON dosyası (varsayılan: katalogdan)')
+    parser.add_argument('--url', help='http modu için endpoint')
+    parser.add_argument('--header', action='append', default=[], help='"Ad: değer" (tekrarlanabilir)')
+    parser.add_argument('--sync-factor-cache', action='store_true',
+                        help='inprocess: senkron tarafta emisyon faktörü önbelleğini aç '
+                             '(asenkron taraf önbelleksiz; karşılaştırma eşit olmaz)')
+    args = parser.parse_args()
+
+    payload = load_payload(args.payload)
+    print(f"BOM: {json.dumps(payload, ensure_ascii=False)}")
+
+    if args.mode == 'inprocess':
+        bench_sync(payload, args.requests, args.concurrency, factor_cache=args.sync_factor_cache)
+        asyncio.run(bench_async(payload, args.requests, args.concurrency))
+    else:
+        if not args.url:
+            parser.error('http modu için --url gerekli')
+        headers = dict(h.split(':', 1) for h in args.header)
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        bench_http(args.url, headers, payload, args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
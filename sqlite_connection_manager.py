@@ -0,0 +1,118 @@
+"""
+Zero@Design - SQLite Bağlantı Yöneticisi
+Her thread için açık tutulan, pragma ayarları yapılmış SQLite bağlantıları
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteConnectionManager:
+    """Thread başına kalıcı SQLite bağlantısı"""
+
+    def __init__(self, db_path: str,
+                 mmap_size: Optional[int] = None,
+                 cache_size: Optional[int] = None,
+                 busy_timeout: Optional[float] = None):
+        """
+        Bağlantı ayarlarını hazırla (bağlantılar ilk kullanımda açılır)
+
+        Args:
+            db_path: SQLite veritabanı dosya yolu
+            mmap_size: Bellek eşlemeli G/Ç boyutu (byte)
+            cache_size: Sayfa önbelleği (negatif değer KiB cinsinden)
+            busy_timeout: Kilitli veritabanında bekleme süresi (sn)
+        """
+        self.db_path = db_path
+        self.mmap_size = int(mmap_size if mmap_size is not None
+                             else os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+        self.cache_size = int(cache_size if cache_size is not None
+                              else os.getenv('SQLITE_CACHE_SIZE', '-65536'))
+        self.busy_timeout = float(busy_timeout if busy_timeout is not None
+                                  else os.getenv('SQLITE_BUSY_TIMEOUT', '5'))
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (thread, bağlantı) çiftleri; biten thread'lerin bağlantıları kapatılır
+        self._connections = []
+        self._pid = os.getpid()
+
+        atexit.register(self.close)
+
+    def _open(self) -> sqlite3.Connection:
+        """Yeni bağlantı aç ve pragma'ları uygula"""
+        # Bağlantı yalnızca açan thread'de kullanılır; kapatma atexit'ten yapılabilsin
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Dict-like access
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size={self.cache_size}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        """Bu thread'in bağlantısını döndür, gerekirse aç"""
+        pid = os.getpid()
+        if self._pid != pid:
+            # Fork sonrası ebeveynin bağlantıları kullanılmaz ve kapatılmaz
+            with self._lock:
+                if self._pid != pid:
+                    self._local = threading.local()
+                    self._connections = []
+                    self._pid = pid
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._prune()
+                self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _prune(self):
+        """Sonlanmış thread'lere ait bağlantıları kapat"""
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+    @contextmanager
+    def transaction(self):
+        """
+        Bu thread'in bağlantısıyla transaction
+
+        Blok başarıyla biterse commit, hata olursa rollback yapılır;
+        bağlantı açık kalır.
+        """
+        conn = self.get()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close(self):
+        """Bu sürecin açtığı tüm bağlantıları kapat"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            for _, conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"SQLite bağlantı kapatma hatası: {e}")
+            self._connections = []
+            self._local = threading.local()
@@ -0,0 +1,167 @@
+"""
+Zero@Design - Typeahead Öneri İndeksi
+Kumaş tipleri, kompozisyonlar, işlem adları ve kategoriler için bellekte
+tutulan önek ağacı (trie). Sorgular SQLite'a gitmez.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('fabric_type', 'composition', 'operation', 'category')
+
+
+def normalize(text: str) -> str:
+    """Türkçe harfleri ve aksanları sadeleştirip küçük harfe çevir (ı/i, ş/s, ğ/g)"""
+    text = text.replace('İ', 'i').replace('I', 'i').lower().replace('ı', 'i')
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        # Oluşturma sırasında aday indeksleri (set), sonra sıralı ilk K kayıt (tuple)
+        self.top = set()
+
+
+class PrefixTrie:
+    """Her düğümde en iyi K sonucu önceden sıralanmış önek ağacı"""
+
+    def __init__(self, entries: List[Dict], top_k: int, max_depth: int):
+        """
+        Args:
+            entries: text ve count alanlarını içeren kayıtlar
+            top_k: Düğüm başına saklanacak sonuç sayısı
+            max_depth: İndekslenecek maksimum önek uzunluğu
+        """
+        self.root = _Node()
+        # Sıralama anahtarı: çok kullanılan önce, eşitlikte alfabetik
+        keys = [(-entry['count'], normalize(entry['text']), entry['kind'], entry['text'])
+                for entry in entries]
+        order = sorted(range(len(entries)), key=keys.__getitem__)
+        self.sort_keys = [keys[i] for i in order]
+        self.entries = [entries[i] for i in order]
+
+        for index, (_, key, _, _) in enumerate(self.sort_keys):
+            # Tam metnin ve her kelimenin başından itibaren indeksle
+            starts = [i for i, char in enumerate(key)
+                      if i == 0 or (char.isalnum() and not key[i - 1].isalnum())]
+            for start in starts:
+                node = self.root
+                for char in key[start:start + max_depth]:
+                    node = node.children.setdefault(char, _Node())
+                    node.top.add(index)
+
+        self._finalize(self.root, top_k)
+
+    def _finalize(self, root: _Node, top_k: int):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node.top = tuple(sorted(node.top)[:top_k])
+            stack.extend(node.children.values())
+
+    def find(self, prefix: str) -> tuple:
+        """Önek için sıralı kayıt indeksleri"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return ()
+        return node.top
+
+
+class SuggestIndex:
+    """Tür bazında önek ağaçları; süresi dolunca arka planda yenilenir"""
+
+    def __init__(self, db_manager, ttl: Optional[float] = None,
+                 top_k: Optional[int] = None, max_depth: int = 32):
+        """
+        Args:
+            db_manager: get_suggestion_terms sağlayan DatabaseManager
+            ttl: İndeksin yenilenme süresi (sn)
+            top_k: Sorgu başına döndürülebilecek maksimum öneri
+            max_depth: İndekslenecek maksimum önek uzunluğu
+        """
+        self.db_manager = db_manager
+        self.ttl = float(ttl if ttl is not None else os.getenv('SUGGEST_INDEX_TTL', '300'))
+        self.top_k = int(top_k if top_k is not None else os.getenv('SUGGEST_MAX_RESULTS', '20'))
+        self.max_depth = max_depth
+
+        self._tries = {}
+        self._built_at = None
+        self._refreshing = threading.Lock()
+
+    def refresh(self):
+        """İndeksi veritabanından yeniden oluştur"""
+        started = time.perf_counter()
+        grouped = {kind: [] for kind in KINDS}
+        for row in self.db_manager.get_suggestion_terms():
+            text = str(row['term']).strip()
+            if text and row['kind'] in grouped:
+                grouped[row['kind']].append({'text': text, 'kind': row['kind'], 'count': row['count']})
+
+        tries = {kind: PrefixTrie(entries, self.top_k, self.max_depth)
+                 for kind, entries in grouped.items()}
+        # Referans değişimi atomik; sorgular eski ya da yeni indeksi görür
+        self._tries = tries
+        self._built_at = time.monotonic()
+        logger.info(
+            f"Öneri indeksi oluşturuldu: {sum(len(t.entries) for t in tries.values())} terim, "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    def _refresh_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Öneri indeksi yenileme hatası: {e}")
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name='suggest-index', daemon=True).start()
+
+    def suggest(self, query: str, limit: int = 10,
+                kinds: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Önek ile eşleşen en çok kullanılan terimler
+
+        Args:
+            query: Kullanıcının yazdığı metin
+            limit: Döndürülecek öneri sayısı (top_k ile sınırlı)
+            kinds: Sadece bu türlerde ara (varsayılan: tümü)
+
+        Returns:
+            text, kind ve count alanlarını içeren öneri listesi
+        """
+        if self._built_at is None:
+            self.refresh()
+        elif self.ttl > 0 and time.monotonic() - self._built_at > self.ttl:
+            self._refresh_in_background()
+
+        prefix = normalize(query.strip())[:self.max_depth]
+        if not prefix:
+            return []
+
+        tries = self._tries
+        candidates = []
+        for kind in kinds or KINDS:
+            trie = tries.get(kind)
+            if trie is not None:
+                candidates.append([(trie.sort_keys[i], trie.entries[i]) for i in trie.find(prefix)])
+
+        merged = heapq.merge(*candidates, key=lambda candidate: candidate[0])
+        return [dict(entry) for (_, entry), _ in zip(merged, range(min(limit, self.top_k)))]
@@ -0,0 +1,633 @@
+"""
+Test suite for CO₂ calculation service
+Tests for PostgreSQL connection pooling and CO2Calculator
+"""
+
+import json
+
+import pytest
+from contextlib import contextmanager
+from unittest.mock import Mock, patch
+from psycopg2 import pool as pg_pool
+
+import asyncio
+
+from async_co2_calculator import (AsyncCO2Calculator, FABRICS_QUERY, ACCESSORIES_QUERY,
+                                  PROCESSES_QUERY, LIFECYCLE_QUERY)
+from connection_pool import PostgresConnectionPool
+from co2_calculator import CO2Calculator, FACTORS_QUERY
+from emission_factor_cache import EmissionFactorCache, WATERMARK_QUERY
+
+
+FABRIC_ID = '11111111-1111-1111-1111-111111111111'
+BUTTON_ID = '22222222-2222-2222-2222-222222222222'
+ZIPPER_ID = '33333333-3333-3333-3333-333333333333'
+SEWING_ID = '44444444-4444-4444-4444-444444444444'
+WASH_ID = '55555555-5555-5555-5555-555555555555'
+
+FABRICS = {
+    FABRIC_ID: {'id': FABRIC_ID, 'fabric_type': 'Single Jersey', 'composition': '%100 Pamuk',
+                'co2_kg_per_kg': 16.6, 'gender': 'Women', 'category': 'Tops', 'product': 'Tişört'}
+}
+ACCESSORIES = {
+    BUTTON_ID: {'id': BUTTON_ID, 'accessory_name': 'Düğme', 'material': 'Polyester',
+                'composition': '%100 PES', 'co2_kg_per_kg': 5.5, 'gender': None,
+                'category': None, 'product': None, 'unit': 'kg'},
+    ZIPPER_ID: {'id': ZIPPER_ID, 'accessory_name': 'Fermuar', 'material': 'Metal',
+                'composition': 'Pirinç', 'co2_kg_per_kg': 8.25, 'gender': None,
+                'category': None, 'product': None, 'unit': 'kg'}
+}
+PROCESSES = {
+    SEWING_ID: {'id': SEWING_ID, 'category': 'Dikiş', 'stage_group': 'Konfeksiyon',
+                'stage': 'Dikim', 'process_name': 'Overlok', 'unit': 'adet',
+                'description': None, 'applied_products': None, 'min_co2_kg': 0.1,
+                'max_co2_kg': 0.3, 'avg_co2_kg': 0.2, 'source': None, 'notes': None}
+}
+LIFECYCLE = {
+    WASH_ID: {'id': WASH_ID, 'upper_category': 'Bitirme', 'category': 'Yıkama',
+              'stage_group': 'Bitirme', 'stage': 'Yıkama', 'process_name': 'Enzim Yıkama',
+              'input_material': None, 'unit': 'adet', 'description': None,
+              'applied_products': None, 'min_co2_kg': 0.4, 'max_co2_kg': 0.8,
+              'avg_co2_kg': 0.6, 'notes': None, 'source': None}
+}
+
+
+class FakeCursor:
+    """Minimal cursor that answers the queries issued by CO2Calculator"""
+
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query, params=None):
+        self.database.queries.append(query)
+        if query == WATERMARK_QUERY:
+            self.rows = list(self.database.watermarks)
+        elif '::text, updated_at' in query:
+            self.rows = list(self.database.recent_rows)
+        elif query == FACTORS_QUERY:
+            tables = [('fabrics', FABRICS, 'fabric_ids'),
+                      ('accessories', ACCESSORIES, 'accessory_ids'),
+                      ('processes', PROCESSES, 'process_ids'),
+                      ('lifecycle', LIFECYCLE, 'process_ids')]
+            self.rows = [(kind, item_id, dict(table[item_id]))
+                         for kind, table, key in tables
+                         for item_id in params[key] if item_id in table]
+        elif params is None and 'ORDER BY' in query:
+            # get_available_items catalog queries
+            if 'FROM fabrics' in query:
+                self.rows = list(FABRICS.values())
+            elif 'FROM accessories' in query:
+                self.rows = list(ACCESSORIES.values())
+            else:
+                self.rows = [{key: row[key] for key in
+                              ('id', 'process_name', 'category', 'stage_group', 'avg_co2_kg')}
+                             for row in PROCESSES.values()]
+        elif 'FROM fabrics' in query:
+            self.rows = [FABRICS[i] for i in params if i in FABRICS]
+        elif 'FROM accessories' in query:
+            self.rows = [ACCESSORIES[i] for i in params if i in ACCESSORIES]
+            if self.database.reverse_rows:
+                self.rows.reverse()
+        elif 'FROM processes' in query:
+            self.rows = [PROCESSES[i] for i in params if i in PROCESSES]
+        elif 'FROM lifecycle_master' in query:
+            self.rows = [LIFECYCLE[i] for i in params if i in LIFECYCLE]
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.queries = []
+        self.watermarks = []
+        self.recent_rows = []
+        self.reverse_rows = False
+
+    @contextmanager
+    def connection(self):
+        conn = Mock()
+        conn.cursor.side_effect = lambda **kwargs: FakeCursor(self)
+        yield conn
+
+
+@pytest.fixture
+def fake_db():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def calculator(fake_db):
+    calc = CO2Calculator()
+    calc.get_db_connection = fake_db.connection
+    calc.factor_cache = None
+    return calc
+
+
+@pytest.fixture
+def cached_calculator(fake_db):
+    calc = CO2Calculator()
+    calc.get_db_connection = fake_db.connection
+    calc.factor_cache = EmissionFactorCache(fake_db.connection, max_size=100, poll_interval=0)
+    return calc
+
+
+def make_connection():
+    """Create a mock psycopg2 connection in a ready state"""
+    conn = Mock()
+    conn.closed = 0
+    conn.status = 1  # STATUS_READY
+    return conn
+
+
+class TestPostgresConnectionPool:
+    """Test cases for PostgresConnectionPool class"""
+
+    @pytest.fixture
+    def mock_pool_class(self):
+        with patch('connection_pool.pool.ThreadedConnectionPool') as mock_class:
+            yield mock_class
+
+    def make_pool(self, **kwargs):
+        options = dict(min_size=1, max_size=2, max_lifetime=1800,
+                       health_check_interval=30, acquire_timeout=0.01)
+        options.update(kwargs)
+        return PostgresConnectionPool({'host': 'localhost'}, **options)
+
+    def test_pool_created_lazily_once(self, mock_pool_class):
+        """Pool is not opened until first use and then reused"""
+        db_pool = self.make_pool()
+        assert not mock_pool_class.called
+
+        mock_pool_class.return_value.getconn.side_effect = lambda: make_connection()
+        with db_pool.connection():
+            pass
+        with db_pool.connection():
+            pass
+
+        mock_pool_class.assert_called_once_with(1, 2, host='localhost')
+
+    def test_connection_commits_and_returns_to_pool(self, mock_pool_class):
+        """Successful block commits and returns connection to the pool"""
+        conn = make_connection()
+        mock_pool_class.return_value.getconn.return_value = conn
+        db_pool = self.make_pool()
+
+        with db_pool.connection() as acquired:
+            assert acquired is conn
+
+        conn.commit.assert_called_once()
+        mock_pool_class.return_value.putconn.assert_called_once_with(conn)
+
+    def test_connection_rolls_back_on_error(self, mock_pool_class):
+        """Failed block rolls back and still returns the connection"""
+        conn = make_connection()
+        mock_pool_class.return_value.getconn.return_value = conn
+        db_pool = self.make_pool()
+
+        with pytest.raises(RuntimeError):
+            with db_pool.connection():
+                raise RuntimeError('boom')
+
+        conn.rollback.assert_called()
+        conn.commit.assert_not_called()
+        mock_pool_class.return_value.putconn.assert_called_once_with(conn)
+
+    def test_closed_connection_is_discarded(self, mock_pool_class):
+        """Closed connections are dropped and replaced on checkout"""
+        dead = make_connection()
+        dead.closed = 1
+        alive = make_connection()
+        mock_pool_class.return_value.getconn.side_effect = [dead, alive]
+        db_pool = self.make_pool()
+
+        conn = db_pool.getconn()
+
+        assert conn is alive
+        mock_pool_class.return_value.putconn.assert_called_once_with(dead, close=True)
+        db_pool.putconn(conn)
+
+    def test_expired_connection_is_recycled(self, mock_pool_class):
+        """Connections older than max_lifetime are closed on checkout"""
+        conn = make_connection()
+        fresh = make_connection()
+        mock_pool_class.return_value.getconn.side_effect = [conn, conn, fresh]
+        db_pool = self.make_pool(max_lifetime=60)
+
+        with patch('connection_pool.time.monotonic', return_value=1000.0):
+            db_pool.putconn(db_pool.getconn())
+        with patch('connection_pool.time.monotonic', return_value=1100.0):
+            assert db_pool.getconn() is fresh
+
+        mock_pool_class.return_value.putconn.assert_any_call(conn, close=True)
+
+    def test_exhausted_pool_times_out(self, mock_pool_class):
+        """Checkout waits at most acquire_timeout when all slots are used"""
+        mock_pool_class.return_value.getconn.side_effect = lambda: make_connection()
+        db_pool = self.make_pool(max_size=1)
+
+        db_pool.getconn()
+        with pytest.raises(pg_pool.PoolError):
+            db_pool.getconn()
+
+    def test_min_size_greater_than_max_size(self):
+        """Invalid pool bounds are rejected"""
+        with pytest.raises(ValueError):
+            PostgresConnectionPool({}, min_size=5, max_size=2)
+
+
+class TestCO2Calculator:
+    """Test cases for CO2Calculator class"""
+
+    def calculate(self, calculator, single_round_trip, **overrides):
+        request = dict(fabric_id=FABRIC_ID, fabric_quantity_kg=0.25,
+                       accessory_ids=[BUTTON_ID, ZIPPER_ID],
+                       accessory_quantities=[0.01, 0.02],
+                       process_ids=[SEWING_ID])
+        request.update(overrides)
+        result = calculator.calculate_total_co2(single_round_trip=single_round_trip, **request)
+        result.pop('calculation_date')
+        return result
+
+    def test_single_round_trip_matches_sequential(self, calculator, fake_db):
+        """Single statement mode returns the same breakdown in one query"""
+        sequential = self.calculate(calculator, False)
+        queries_before = len(fake_db.queries)
+        single = self.calculate(calculator, True)
+
+        assert single == sequential
+        assert len(fake_db.queries) - queries_before == 1
+        assert single['total_co2_kg'] == round(4.15 + 0.055 + 0.165 + 0.2, 4)
+
+    def test_single_round_trip_lifecycle_fallback(self, calculator):
+        """Process IDs missing from processes fall back to lifecycle_master"""
+        sequential = self.calculate(calculator, False, process_ids=[WASH_ID])
+        single = self.calculate(calculator, True, process_ids=[WASH_ID])
+
+        assert single == sequential
+        assert single['processes']['details'][0]['name'] == 'Enzim Yıkama'
+        assert single['summary']['processes_co2'] == 0.6
+
+    def test_single_round_trip_missing_fabric(self, calculator):
+        """Unknown fabric is reported like the sequential path"""
+        missing = '99999999-9999-9999-9999-999999999999'
+        result = self.calculate(calculator, True, fabric_id=missing)
+
+        assert result['fabric']['co2_kg'] == 0
+        assert result['errors'] == [f'Kumaş: Kumaş bulunamadı: {missing}']
+
+    def test_accessory_quantities_follow_ids_not_row_order(self, calculator, fake_db):
+        """Quantities are mapped by UUID even if Postgres returns rows reordered"""
+        fake_db.reverse_rows = True
+        result = calculator.get_accessories_co2([BUTTON_ID, ZIPPER_ID], [0.01, 0.02])
+
+        by_id = {d['id']: d for d in result['details']}
+        assert by_id[BUTTON_ID]['quantity_kg'] == 0.01
+        assert by_id[ZIPPER_ID]['quantity_kg'] == 0.02
+        assert result['co2_kg'] == round(5.5 * 0.01 + 8.25 * 0.02, 4)
+
+    def test_duplicate_accessories_are_aggregated(self, calculator):
+        """Repeated UUIDs add up their quantities in both calculation modes"""
+        ids = [ZIPPER_ID, BUTTON_ID, ZIPPER_ID.upper()]
+        quantities = [0.01, 0.02, 0.03]
+        sequential = self.calculate(calculator, False, accessory_ids=ids,
+                                    accessory_quantities=quantities)
+        single = self.calculate(calculator, True, accessory_ids=ids,
+                                accessory_quantities=quantities)
+
+        assert single == sequential
+        accessories = single['accessories']
+        assert accessories['total_accessories'] == 2
+        assert accessories['details'][0]['quantity_kg'] == pytest.approx(0.04)
+        assert accessories['co2_kg'] == round(8.25 * 0.04 + 5.5 * 0.02, 4)
+
+
+class TestCalculateMany:
+    """Test cases for batch CO₂ calculation"""
+
+    BOMS = [
+        {'style_code': 'ST-001', 'fabric_id': FABRIC_ID, 'fabric_quantity_kg': 0.25,
+         'accessory_ids': [BUTTON_ID], 'accessory_quantities': [0.01],
+         'process_ids': [SEWING_ID]},
+        {'style_code': 'ST-002', 'fabric_id': FABRIC_ID, 'fabric_quantity_kg': 0.4,
+         'accessory_ids': [BUTTON_ID, ZIPPER_ID], 'accessory_quantities': [0.02, 0.05],
+         'process_ids': [WASH_ID]},
+    ]
+
+    def test_matches_single_calculations_with_one_query(self, calculator, fake_db):
+        """Each style equals calculate_total_co2 and factors are fetched once"""
+        result = calculator.calculate_many(self.BOMS)
+
+        assert len(fake_db.queries) == 1
+        assert result['unique_items'] == {'fabrics': 1, 'accessories': 2, 'processes': 2}
+        for bom, style in zip(self.BOMS, result['results']):
+            params = {k: v for k, v in bom.items() if k != 'style_code'}
+            single = calculator.calculate_total_co2(single_round_trip=True, **params)
+            assert style['style_code'] == bom['style_code']
+            assert style['total_co2_kg'] == single['total_co2_kg']
+            assert style['processes'] == single['processes']
+
+    def test_collection_totals(self, calculator):
+        """Collection totals sum the per-style breakdowns"""
+        result = calculator.calculate_many(self.BOMS)
+        totals = result['totals']
+
+        expected = sum(r['total_co2_kg'] for r in result['results'])
+        assert totals['total_co2_kg'] == round(expected, 4)
+        assert totals['total_styles'] == 2
+        assert totals['average_co2_kg'] == round(expected / 2, 4)
+        assert totals['styles_with_errors'] == 0
+
+
+class TestCO2VectorEngine:
+    """Test cases for the NumPy calculation engine"""
+
+    def random_boms(self, count=200, seed=7):
+        import random
+        rng = random.Random(seed)
+        boms = []
+        for index in range(count):
+            accessory_ids = rng.sample([BUTTON_ID, ZIPPER_ID], rng.randint(0, 2))
+            boms.append({
+                'style_code': f'ST-{index:03d}',
+                'fabric_id': rng.choice([FABRIC_ID, None]),
+                'fabric_quantity_kg': round(rng.uniform(0.1, 1.5), 3),
+                'accessory_ids': accessory_ids,
+                'accessory_quantities': [round(rng.uniform(0.001, 0.05), 4) for _ in accessory_ids],
+                'process_ids': rng.sample([SEWING_ID, WASH_ID], rng.randint(0, 2)),
+            })
+        return boms
+
+    def test_matches_dict_engine_to_four_decimals(self, calculator):
+        """Vectorized totals equal the per-item Python calculation"""
+        boms = self.random_boms()
+        expected = calculator.calculate_many(boms)['results']
+        actual = calculator.calculate_many(boms, vectorized=True)['results']
+
+        for exp, act in zip(expected, actual):
+            assert act['style_code'] == exp['style_code']
+            assert act['total_co2_kg'] == pytest.approx(exp['total_co2_kg'], abs=1e-4)
+            for key in ('fabric_co2', 'accessories_co2', 'processes_co2'):
+                assert act['summary'][key] == pytest.approx(exp['summary'][key], abs=1e-4)
+            assert act['summary']['total_items'] == exp['summary']['total_items']
+
+    def test_update_factor_rescores_collection(self, calculator):
+        """Changing one fabric factor re-scores every style that uses it"""
+        boms = self.random_boms(count=50)
+        engine = calculator.build_vector_engine(boms)
+        before = engine.results()
+
+        affected = engine.update_factor('fabrics', FABRIC_ID, 20.0)
+        after = engine.results()
+
+        users = [i for i, bom in enumerate(boms) if bom['fabric_id']]
+        assert affected == users
+        for i, bom in enumerate(boms):
+            if bom['fabric_id']:
+                assert after[i]['summary']['fabric_co2'] == round(bom['fabric_quantity_kg'] * 20.0, 4)
+            else:
+                assert after[i] == before[i]
+
+    def test_simulate_percentile_bands(self, calculator):
+        """Monte Carlo bands bracket the point estimate and respect factor ranges"""
+        boms = [
+            {'style_code': 'FABRIC', 'fabric_id': FABRIC_ID, 'fabric_quantity_kg': 0.5},
+            {'style_code': 'SEWING', 'process_ids': [SEWING_ID]},
+            {'style_code': 'WASH', 'process_ids': [WASH_ID]},
+        ]
+        simulation = calculator.build_vector_engine(boms).simulate(samples=20000, seed=42)
+        fabric, sewing, wash = simulation['results']
+
+        # Point factors have no spread
+        assert fabric['p5'] == fabric['p50'] == fabric['p95'] == round(0.5 * 16.6, 4)
+        assert 0.1 <= sewing['p5'] < sewing['p50'] < sewing['p95'] <= 0.3
+        assert sewing['p50'] == pytest.approx(0.2, abs=0.01)
+        assert 0.4 <= wash['p5'] < wash['p50'] < wash['p95'] <= 0.8
+        assert simulation['uncertain_factors'] == 2
+        collection = simulation['collection']
+        assert collection['p5'] < collection['p50'] < collection['p95']
+
+    def test_simulate_is_reproducible_with_seed(self, calculator):
+        """Same seed yields identical bands through calculate_many"""
+        boms = self.random_boms(count=30)
+        first = calculator.calculate_many(boms, uncertainty={'samples': 2000, 'seed': 3})
+        second = calculator.calculate_many(boms, uncertainty={'samples': 2000, 'seed': 3})
+
+        assert first['uncertainty']['results'] == second['uncertainty']['results']
+        assert first['uncertainty']['samples'] == 2000
+        assert len(first['uncertainty']['results']) == 30
+
+    @pytest.mark.parametrize('uncertainty', [
+        {'samples': 0}, {'samples': -5}, {'samples': 'many'}, {'samples': 10 ** 9},
+        {'seed': 'x'}, [1000],
+    ])
+    def test_invalid_uncertainty_is_rejected(self, calculator, uncertainty):
+        """Bad or oversized settings raise ValueError before any simulation"""
+        with pytest.raises(ValueError):
+            calculator.calculate_many(self.random_boms(count=2), uncertainty=uncertainty)
+
+
+class TestEmissionFactorCache:
+    """Test cases for EmissionFactorCache class"""
+
+    def calculate(self, calc):
+        return calc.calculate_total_co2(
+            fabric_id=FABRIC_ID, fabric_quantity_kg=0.25,
+            accessory_ids=[BUTTON_ID], accessory_quantities=[0.01],
+            process_ids=[SEWING_ID, WASH_ID], single_round_trip=True
+        )
+
+    def test_steady_state_does_not_touch_database(self, cached_calculator, fake_db):
+        """Second calculation with the same items is served from memory"""
+        first = self.calculate(cached_calculator)
+        queries = len(fake_db.queries)
+        second = self.calculate(cached_calculator)
+
+        assert len(fake_db.queries) == queries
+        assert second['total_co2_kg'] == first['total_co2_kg']
+
+    def test_updated_at_change_invalidates_only_changed_ids(self, cached_calculator, fake_db):
+        """A moved high-water mark evicts only the rows updated since"""
+        fake_db.watermarks = [('fabrics', 1, 1), ('accessories', 1, 2)]
+        self.calculate(cached_calculator)
+        cache = cached_calculator.factor_cache
+
+        fake_db.watermarks = [('fabrics', 2, 1), ('accessories', 1, 2)]
+        fake_db.recent_rows = [('fabrics', FABRIC_ID, 2)]
+        cache.poll()
+
+        _, missing = cache.get_many('fabrics', [FABRIC_ID])
+        found, _ = cache.get_many('accessories', [BUTTON_ID])
+        assert missing == [FABRIC_ID]
+        assert BUTTON_ID in found
+
+    def test_late_commit_behind_watermark_invalidates(self, cached_calculator, fake_db):
+        """A commit stamped before the last high-water mark is still picked up"""
+        fake_db.watermarks = [('fabrics', 5, 1), ('accessories', 5, 2)]
+        fake_db.recent_rows = [('accessories', ZIPPER_ID, 5)]
+        self.calculate(cached_calculator)
+        cache = cached_calculator.factor_cache
+
+        # Transaction started before the poll (updated_at = 4) but committed after it
+        fake_db.recent_rows = [('accessories', ZIPPER_ID, 5), ('fabrics', FABRIC_ID, 4)]
+        cache.poll()
+
+        assert 'updated_at >=' in fake_db.queries[-1]
+        _, missing = cache.get_many('fabrics', [FABRIC_ID])
+        found, _ = cache.get_many('accessories', [BUTTON_ID])
+        assert missing == [FABRIC_ID]
+        assert BUTTON_ID in found
+
+        # Rows already seen in the overlap window are not invalidated again
+        self.calculate(cached_calculator)
+        cache.poll()
+        found, _ = cache.get_many('fabrics', [FABRIC_ID])
+        assert FABRIC_ID in found
+
+    def test_row_count_change_clears_kind(self, cached_calculator, fake_db):
+        """Deleted rows cannot be identified, so the whole table is dropped"""
+        fake_db.watermarks = [('accessories', 1, 2)]
+        self.calculate(cached_calculator)
+        cache = cached_calculator.factor_cache
+
+        fake_db.watermarks = [('accessories', 1, 1)]
+        cache.poll()
+
+        _, missing = cache.get_many('accessories', [BUTTON_ID])
+        assert missing == [BUTTON_ID]
+
+    def test_size_bound_evicts_least_recently_used(self, fake_db):
+        """Cache never grows past max_size"""
+        cache = EmissionFactorCache(fake_db.connection, max_size=2, poll_interval=0)
+        cache.put_many('fabrics', {'a': 1, 'b': 2}, ['a', 'b'])
+        cache.get_many('fabrics', ['a'])
+        cache.put_many('fabrics', {'c': 3}, ['c'])
+
+        found, missing = cache.get_many('fabrics', ['a', 'b', 'c'])
+        assert found == {'a': 1, 'c': 3}
+        assert missing == ['b']
+
+    def test_stale_read_not_written_after_invalidation(self, fake_db):
+        """Rows read before an invalidation are not cached"""
+        cache = EmissionFactorCache(fake_db.connection, max_size=10, poll_interval=0)
+        generation = cache.generation
+        cache.invalidate('fabrics', ['a'])
+        cache.put_many('fabrics', {'a': 'old'}, ['a'], generation)
+
+        _, missing = cache.get_many('fabrics', ['a'])
+        assert missing == ['a']
+
+
+class TestItemsSnapshot:
+    """Test cases for the cached /api/co2-items catalog"""
+
+    def catalog_queries(self, fake_db):
+        return [q for q in fake_db.queries if 'ORDER BY' in q]
+
+    def test_snapshot_reused_until_tables_change(self, calculator, fake_db):
+        """Catalog is rebuilt only when a watermark moves"""
+        fake_db.watermarks = [('fabrics', None, 1), ('accessories', None, 2),
+                              ('processes', None, 1), ('emissions', None, 1)]
+        body, etag = calculator.get_items_snapshot()
+        assert calculator.get_items_snapshot() == (body, etag)
+        assert len(self.catalog_queries(fake_db)) == 3
+
+        data = json.loads(body)['data']
+        assert data['total_items'] == 4
+        assert {f['id'] for f in data['fabrics']} == {FABRIC_ID}
+
+        fake_db.watermarks = [('fabrics', None, 2), ('accessories', None, 2),
+                              ('processes', None, 1), ('emissions', None, 1)]
+        calculator.get_items_snapshot()
+        assert len(self.catalog_queries(fake_db)) == 6
+
+    def test_field_projection(self, calculator, fake_db):
+        """Projection keeps only requested columns and has its own ETag"""
+        full_body, full_etag = calculator.get_items_snapshot()
+        body, etag = calculator.get_items_snapshot(['id', 'accessory_name'])
+
+        assert etag != full_etag
+        data = json.loads(body)['data']
+        assert data['fabrics'] == [{'id': FABRIC_ID}]
+        assert {a['accessory_name'] for a in data['accessories']} == {'Düğme', 'Fermuar'}
+        assert all(set(a) == {'id', 'accessory_name'} for a in data['accessories'])
+        assert len(self.catalog_queries(fake_db)) == 3
+
+    def test_unknown_field_rejected(self, calculator):
+        """Projection fields must exist in the catalog"""
+        with pytest.raises(ValueError):
+            calculator.get_items_snapshot(['id', 'password'])
+
+
+class TestAsyncCO2Calculator:
+    """Test cases for the asyncpg calculation path"""
+
+    @pytest.fixture
+    def async_calculator(self, calculator):
+        calc = AsyncCO2Calculator(calculator)
+        tables = {FABRICS_QUERY: FABRICS, ACCESSORIES_QUERY: ACCESSORIES,
+                  PROCESSES_QUERY: PROCESSES, LIFECYCLE_QUERY: LIFECYCLE}
+        calc.queries = []
+
+        async def fetch(query, ids):
+            calc.queries.append(query)
+            await asyncio.sleep(0)
+            return [dict(tables[query][i]) for i in ids if i in tables[query]] if ids else []
+
+        calc._fetch = fetch
+        return calc
+
+    def without_dates(self, result):
+        result = dict(result)
+        result.pop('calculation_date', None)
+        return result
+
+    def test_matches_sync_result(self, calculator, async_calculator):
+        """Async path produces the same breakdown as the sync path"""
+        kwargs = dict(fabric_id=FABRIC_ID, fabric_quantity_kg=0.25,
+                      accessory_ids=[BUTTON_ID, ZIPPER_ID, BUTTON_ID],
+                      accessory_quantities=[0.01, 0.02, 0.03],
+                      process_ids=[SEWING_ID])
+
+        expected = calculator.calculate_total_co2(single_round_trip=True, **kwargs)
+        actual = asyncio.run(async_calculator.calculate_total_co2(**kwargs))
+
+        assert self.without_dates(actual) == self.without_dates(expected)
+        assert len(async_calculator.queries) == 4
+
+    def test_lifecycle_fallback(self, calculator, async_calculator):
+        """Unknown processes fall back to lifecycle_master like the sync path"""
+        expected = calculator.calculate_total_co2(process_ids=[WASH_ID], single_round_trip=True)
+        actual = asyncio.run(async_calculator.calculate_total_co2(process_ids=[WASH_ID]))
+
+        assert self.without_dates(actual) == self.without_dates(expected)
+        assert actual['processes']['co2_kg'] == 0.6
+
+    def test_calculate_many_matches_sync(self, calculator, async_calculator):
+        """Batch results are identical to CO2Calculator.calculate_many"""
+        boms = TestCO2VectorEngine().random_boms(count=20)
+
+        expected = calculator.calculate_many(boms)
+        actual = asyncio.run(async_calculator.calculate_many(boms))
+
+        assert actual['totals'] == expected['totals']
+        assert [self.without_dates(r) for r in actual['results']] == \
+            [self.without_dates(r) for r in expected['results']]
+
+    def test_calculate_many_enforces_sample_cap(self, async_calculator, monkeypatch):
+        """The ASGI path is held to CO2_UNCERTAINTY_MAX_SAMPLES as well"""
+        monkeypatch.setattr(async_calculator.calculator, 'uncertainty_max_samples', 1000)
+        boms = TestCO2VectorEngine().random_boms(count=2)
+        with pytest.raises(ValueError):
+            asyncio.run(async_calculator.calculate_many(boms, uncertainty={'samples': 1001}))
+        assert async_calculator.queries == []
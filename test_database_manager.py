@@ -0,0 +1,973 @@
+"""
+Test suite for the SQLite database manager
+Tests for saved CO₂ calculations and the factor dependency index
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import query_plan_audit
+import reference_snapshot
+from database_manager import DatabaseManager
+from database_setup import DatabaseSetup
+from sqlite_connection_manager import SQLiteConnectionManager
+from suggest_index import SuggestIndex
+from write_behind_queue import WriteBehindQueue
+
+
+@pytest.fixture
+def db_path():
+    """Create an empty Zero@Design schema in a temporary file"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp_db:
+        path = tmp_db.name
+
+    setup = DatabaseSetup(path)
+    setup.create_database()
+    setup.create_styles_tables()
+
+    yield path
+    os.unlink(path)
+
+
+@pytest.fixture
+def manager(db_path):
+    manager = DatabaseManager(db_path)
+    yield manager
+    manager.close()
+
+
+def insert_operation(db_path, table, name, co2_min, co2_max):
+    """Insert one emission factor row and return its id"""
+    name_column = {
+        'finished_product_operations': 'operation_type',
+        'garment_processes': 'process_step',
+        'master_co2_data': 'operation'
+    }[table]
+    conn = sqlite3.connect(db_path)
+    cursor = conn.execute(
+        f"INSERT INTO {table} (category, {name_column}, co2_min, co2_max) VALUES (?, ?, ?, ?)",
+        ('Test', name, co2_min, co2_max)
+    )
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+class TestSQLiteConnectionManager:
+    """Test cases for thread-local SQLite connections"""
+
+    def test_connection_reused_within_thread(self, db_path):
+        """Statements on one thread share a single tuned connection"""
+        connections = SQLiteConnectionManager(db_path, mmap_size=1048576, cache_size=-2000)
+        conn = connections.get()
+
+        assert connections.get() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2000
+        connections.close()
+
+    def test_threads_get_separate_connections(self, db_path):
+        """Each thread opens its own connection"""
+        connections = SQLiteConnectionManager(db_path)
+        main = connections.get()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(connections.get()))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not main
+        connections.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            main.execute("SELECT 1")
+
+    def test_transaction_rolls_back_on_error(self, db_path):
+        """Failed transaction leaves no partial writes and keeps the connection open"""
+        connections = SQLiteConnectionManager(db_path)
+        with pytest.raises(RuntimeError):
+            with connections.transaction() as conn:
+                conn.execute("INSERT INTO product_categories (name) VALUES ('Elbise')")
+                raise RuntimeError('boom')
+
+        count = connections.get().execute("SELECT COUNT(*) FROM product_categories").fetchone()[0]
+        assert count == 0
+        connections.close()
+
+    def test_manager_queries_do_not_reopen(self, manager):
+        """execute_query and execute_insert reuse the thread connection"""
+        conn = manager.get_connection()
+        manager.execute_insert("INSERT INTO product_categories (name) VALUES (?)", ('Tişört',))
+
+        assert manager.get_connection() is conn
+        assert manager.execute_query("SELECT name FROM product_categories") == [{'name': 'Tişört'}]
+
+
+class TestSearchIndex:
+    """Test cases for the FTS5 operation search"""
+
+    def test_turkish_diacritic_folding(self, manager, db_path):
+        """ı/i, ş/s, ğ/g variants match the same rows"""
+        insert_operation(db_path, 'finished_product_operations', 'Enzim Yıkama', 0.1, 0.2)
+        insert_operation(db_path, 'garment_processes', 'Dikiş', 0.1, 0.2)
+        insert_operation(db_path, 'master_co2_data', 'Boyağı Sabitleme', 0.1, 0.2)
+
+        for term in ('yıkama', 'yikama', 'YIKAMA', 'Yıka'):
+            results = manager.search_operations(term)
+            assert [r['operation_type'] for r in results['finished_product_operations']] == ['Enzim Yıkama']
+        assert len(manager.search_operations('dikis')['garment_processes']) == 1
+        assert len(manager.search_operations('boyagi')['master_co2_data']) == 1
+
+    def test_bm25_ranks_name_matches_first(self, manager, db_path):
+        """Rows matching in the operation name outrank description matches"""
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "INSERT INTO master_co2_data (category, operation, description) VALUES (?, ?, ?)",
+            ('Test', 'Ütüleme', 'Baskı sonrası işlem')
+        )
+        conn.execute(
+            "INSERT INTO master_co2_data (category, operation, description) VALUES (?, ?, ?)",
+            ('Test', 'Baskı', 'Serigrafi')
+        )
+        conn.commit()
+        conn.close()
+
+        results = manager.search_operations('baskı')['master_co2_data']
+        assert [r['operation'] for r in results] == ['Baskı', 'Ütüleme']
+
+    def test_triggers_keep_index_in_sync(self, manager, db_path):
+        """Updates and deletes on the source tables are reflected in search"""
+        factor_id = insert_operation(db_path, 'garment_processes', 'Overlok', 0.1, 0.2)
+        assert len(manager.search_operations('overlok')['garment_processes']) == 1
+
+        conn = manager.get_connection()
+        conn.execute("UPDATE garment_processes SET process_step = 'Reçme' WHERE id = ?", (factor_id,))
+        conn.commit()
+        assert manager.search_operations('overlok')['garment_processes'] == []
+        assert len(manager.search_operations('recme')['garment_processes']) == 1
+
+        conn.execute("DELETE FROM garment_processes WHERE id = ?", (factor_id,))
+        conn.commit()
+        assert manager.search_operations('recme')['garment_processes'] == []
+
+    def test_non_word_term_uses_like(self, manager, db_path):
+        """Terms without word characters fall back to LIKE"""
+        insert_operation(db_path, 'garment_processes', 'Overlok', 0.1, 0.2)
+        assert len(manager.search_operations('%')['garment_processes']) == 1
+
+
+class TestSuggestIndex:
+    """Test cases for the in-memory typeahead index"""
+
+    @pytest.fixture
+    def index(self, manager, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO product_fabric_co2 (fabric_type, composition) VALUES (?, ?)",
+            [('Süprem', '%100 Pamuk'), ('Süprem', '%95 Pamuk / %5 Elastan'),
+             ('Single Jersey', '%100 Pamuk'), ('Dokuma', '%100 Polyester')]
+        )
+        conn.commit()
+        conn.close()
+        insert_operation(db_path, 'garment_processes', 'Düz Dikiş', 0.1, 0.2)
+        return SuggestIndex(manager, ttl=0, top_k=5)
+
+    def test_prefix_matches_ranked_by_usage(self, index):
+        """More frequently used terms come first"""
+        suggestions = index.suggest('%1')
+        assert [s['text'] for s in suggestions] == ['%100 Pamuk', '%100 Polyester']
+        assert suggestions[0] == {'text': '%100 Pamuk', 'kind': 'composition', 'count': 2}
+
+    def test_word_prefix_and_turkish_folding(self, index):
+        """Any word start matches and ş/ü/ı fold to ASCII"""
+        assert [s['text'] for s in index.suggest('supr')] == ['Süprem']
+        assert [s['text'] for s in index.suggest('jer')] == ['Single Jersey']
+        assert [s['text'] for s in index.suggest('DIKIS')] == ['Düz Dikiş']
+        assert [s['text'] for s in index.suggest('pam', kinds=['fabric_type'])] == []
+
+    def test_queries_do_not_touch_database(self, index, manager):
+        """After the build, suggestions are served from memory"""
+        index.refresh()
+        manager.get_suggestion_terms = lambda: pytest.fail('database queried')
+
+        assert len(index.suggest('p', limit=10)) <= 5
+        assert index.suggest('xyz') == []
+
+
+class TestFactorDependencies:
+    """Test cases for incremental recalculation of saved calculations"""
+
+    @pytest.fixture
+    def factors(self, db_path):
+        return {
+            'wash': insert_operation(db_path, 'finished_product_operations', 'Yıkama', 0.2, 0.4),
+            'sew': insert_operation(db_path, 'garment_processes', 'Dikim', 0.1, 0.3),
+            'print': insert_operation(db_path, 'master_co2_data', 'Baskı', 1.0, 2.0),
+        }
+
+    def operation(self, table, factor_id, co2_min, co2_max):
+        return {'data_type': table, 'id': factor_id, 'category': 'Test',
+                'operation': 'op', 'co2_min': co2_min, 'co2_max': co2_max}
+
+    def test_save_records_dependencies(self, manager, db_path, factors):
+        """Saved calculations are indexed by the factors they used"""
+        result = manager.calculate_product_co2('Tişört', [
+            self.operation('finished_product_operations', factors['wash'], 0.2, 0.4),
+            self.operation('garment_processes', factors['sew'], 0.1, 0.3),
+            {'operation': 'Serbest', 'co2_min': 1.0, 'co2_max': 1.0},
+        ])
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            "SELECT factor_table, factor_id, dependent_type, dependent_id FROM co2_factor_dependencies"
+        ).fetchall()
+        conn.close()
+
+        assert sorted(rows) == [
+            ('finished_product_operations', factors['wash'], 'calculation', result['calculation_id']),
+            ('garment_processes', factors['sew'], 'calculation', result['calculation_id']),
+        ]
+
+    def test_recalculate_touches_only_affected_rows(self, manager, factors):
+        """Correcting a factor re-totals only calculations that used it"""
+        washed = manager.calculate_product_co2('Yıkamalı', [
+            self.operation('finished_product_operations', factors['wash'], 0.2, 0.4),
+            self.operation('garment_processes', factors['sew'], 0.1, 0.3),
+        ])
+        printed = manager.calculate_product_co2('Baskılı', [
+            self.operation('master_co2_data', factors['print'], 1.0, 2.0),
+        ])
+
+        report = manager.recalculate_factor_dependents([
+            {'table': 'finished_product_operations', 'id': factors['wash'],
+             'co2_min': 0.6, 'co2_max': 0.8}
+        ])
+
+        assert report['calculations_checked'] == 1
+        assert report['calculations_updated'] == 1
+        assert report['total_delta'] == pytest.approx(0.4)
+        assert report['changes'][0]['calculation_id'] == washed['calculation_id']
+        assert report['changes'][0]['new_total_co2'] == pytest.approx(0.9)
+
+        totals = {row['id']: row['total_co2'] for row in manager.get_co2_calculations()}
+        assert totals[washed['calculation_id']] == pytest.approx(0.9)
+        assert totals[printed['calculation_id']] == pytest.approx(1.5)
+
+    def test_correct_single_bound_keeps_the_other(self, manager, db_path, factors):
+        """A correction that changes one bound leaves the other bound intact"""
+        washed = manager.calculate_product_co2('Yıkamalı', [
+            self.operation('finished_product_operations', factors['wash'], 0.2, 0.4),
+            self.operation('garment_processes', factors['sew'], 0.1, 0.3),
+        ])
+        manager.calculate_product_co2('Baskılı', [
+            self.operation('master_co2_data', factors['print'], 1.0, 2.0),
+        ])
+
+        report = manager.recalculate_factor_dependents([
+            {'table': 'finished_product_operations', 'id': factors['wash'], 'co2_min': 0.6},
+            {'table': 'master_co2_data', 'id': factors['print'], 'co2_max': 2.5},
+        ])
+
+        conn = sqlite3.connect(db_path)
+        wash = conn.execute("SELECT co2_min, co2_max FROM finished_product_operations WHERE id = ?",
+                            (factors['wash'],)).fetchone()
+        printed = conn.execute("SELECT co2_min, co2_max, co2_range FROM master_co2_data WHERE id = ?",
+                               (factors['print'],)).fetchone()
+        conn.close()
+        assert wash == (0.6, 0.4)
+        assert printed == (1.0, 2.5, '1.00-2.50')
+
+        assert report['calculations_updated'] == 2
+        change = next(c for c in report['changes'] if c['calculation_id'] == washed['calculation_id'])
+        assert change['new_total_co2'] == pytest.approx(0.7)
+
+    def test_recalculate_without_change_reports_nothing(self, manager, factors):
+        """Unchanged factors leave stored totals untouched"""
+        manager.calculate_product_co2('Tişört', [
+            self.operation('garment_processes', factors['sew'], 0.1, 0.3),
+        ])
+
+        report = manager.recalculate_factor_dependents([
+            {'table': 'garment_processes', 'id': factors['sew']}
+        ])
+
+        assert report['calculations_checked'] == 1
+        assert report['calculations_updated'] == 0
+        assert report['changes'] == []
+
+    def test_invalid_factor_reference(self, manager):
+        """Only known factor tables can be referenced"""
+        with pytest.raises(ValueError):
+            manager.recalculate_factor_dependents([{'table': 'users', 'id': 1}])
+
+
+class TestKeysetPagination:
+    """Test cases for cursor-based list queries"""
+
+    @pytest.fixture
+    def fabrics(self, db_path):
+        conn = sqlite3.connect(db_path)
+        rows = [
+            ('Kadın', 'Üst Giyim', f'Ürün {i:02d}', 'Örme' if i % 3 else None, i % 4 * 1.5)
+            for i in range(23)
+        ]
+        conn.executemany(
+            "INSERT INTO product_fabric_co2 (gender, category, product, fabric_type, co2_kg_per_kg)"
+            " VALUES (?, ?, ?, ?, ?)", rows
+        )
+        conn.commit()
+        conn.close()
+
+    def collect(self, manager, **page):
+        items, cursor = [], None
+        while True:
+            result = manager.get_product_fabric_co2_data(cursor=cursor, **page)
+            items += result['items']
+            cursor = result['next_cursor']
+            assert result['has_more'] == (cursor is not None)
+            if cursor is None:
+                return items
+
+    def test_unpaginated_call_returns_full_list(self, manager, fabrics):
+        """Without limit/cursor the getter keeps returning a plain list"""
+        data = manager.get_product_fabric_co2_data(gender='Kadın')
+        assert isinstance(data, list)
+        assert len(data) == 23
+        assert [row['product'] for row in data] == sorted(row['product'] for row in data)
+
+    def test_pages_cover_full_result(self, manager, fabrics):
+        """Walking the cursors yields every row exactly once, in order"""
+        expected = manager.get_product_fabric_co2_data()
+        assert self.collect(manager, limit=5) == expected
+
+    def test_descending_sort_with_nulls(self, manager, fabrics):
+        """Keyset pages match a full sort even with duplicate and NULL keys"""
+        expected = manager.get_product_fabric_co2_data(sort='-fabric_type,co2_kg_per_kg')
+        assert self.collect(manager, sort='-fabric_type,co2_kg_per_kg', limit=4) == expected
+        assert expected[-1]['fabric_type'] is None
+
+    def test_field_projection(self, manager, fabrics):
+        """Only requested columns are returned, sort columns are not leaked"""
+        result = manager.get_product_fabric_co2_data(fields=['product'], sort='-co2_kg_per_kg', limit=3)
+        assert all(list(row) == ['product'] for row in result['items'])
+        assert result['has_more']
+
+    def test_invalid_parameters(self, manager, fabrics):
+        """Unknown columns, foreign cursors and bad limits are rejected"""
+        with pytest.raises(ValueError):
+            manager.get_product_fabric_co2_data(fields=['password'])
+        with pytest.raises(ValueError):
+            manager.get_product_fabric_co2_data(sort='id; DROP TABLE styles')
+        with pytest.raises(ValueError):
+            manager.get_product_fabric_co2_data(limit=0)
+
+        cursor = manager.get_product_fabric_co2_data(limit=2)['next_cursor']
+        with pytest.raises(ValueError):
+            manager.get_product_fabric_co2_data(sort='product', cursor=cursor)
+        with pytest.raises(ValueError):
+            manager.get_product_fabric_co2_data(cursor='bm90LWpzb24')
+
+
+class TestDatabaseStats:
+    """Test cases for trigger-maintained database statistics"""
+
+    def expected_stats(self, db_path):
+        """The original per-table COUNT(*) and aggregate queries"""
+        conn = sqlite3.connect(db_path)
+        stats = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ('finished_product_operations', 'garment_processes', 'master_co2_data',
+                          'product_categories', 'co2_calculations')
+        }
+        min_co2, max_co2, avg_co2 = conn.execute("""
+            SELECT MIN(co2_min), MAX(co2_max), AVG((co2_min + co2_max) / 2)
+            FROM master_co2_data WHERE co2_min IS NOT NULL AND co2_max IS NOT NULL
+        """).fetchone()
+        conn.close()
+        stats['co2_range'] = {'min_co2': min_co2, 'max_co2': max_co2, 'avg_co2': avg_co2}
+        return stats
+
+    def assert_matches(self, manager, db_path):
+        stats = manager.get_database_stats(max_age=0)
+        assert stats.pop('generated_at')
+        expected = self.expected_stats(db_path)
+        assert stats.pop('co2_range') == pytest.approx(expected.pop('co2_range'))
+        assert stats == expected
+
+    def test_counts_follow_writes(self, manager, db_path):
+        """Inserts, updates and deletes keep the counters exact"""
+        manager.get_database_stats()
+        low = insert_operation(db_path, 'master_co2_data', 'Boyama', 0.5, 2.0)
+        high = insert_operation(db_path, 'master_co2_data', 'Yıkama', 3.0, 9.0)
+        insert_operation(db_path, 'master_co2_data', 'Eksik', None, 4.0)
+        insert_operation(db_path, 'garment_processes', 'Dikim', 0.1, 0.2)
+        manager.save_co2_calculation('Tişört', 1.0, 2.0, [])
+        self.assert_matches(manager, db_path)
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE master_co2_data SET co2_max = 5.0 WHERE id = ?", (high,))
+        conn.execute("DELETE FROM master_co2_data WHERE id = ?", (low,))
+        conn.commit()
+        conn.close()
+        stats = manager.get_database_stats(max_age=0)
+        assert stats['co2_range']['min_co2'] == 3.0
+        assert stats['co2_range']['max_co2'] == 5.0
+        self.assert_matches(manager, db_path)
+
+    def test_seeded_from_existing_rows(self, db_path):
+        """Migrating a database without the stats table fills it from existing rows"""
+        conn = sqlite3.connect(db_path)
+        triggers = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%stats%'"
+        )]
+        for name in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("DROP TABLE database_stats")
+        conn.commit()
+        conn.close()
+        insert_operation(db_path, 'master_co2_data', 'Baskı', 1.0, 3.0)
+
+        setup = DatabaseSetup(db_path)
+        assert setup.create_stats_tables() is True
+        assert setup.create_stats_tables() is False
+
+        manager = DatabaseManager(db_path)
+        try:
+            stats = manager.get_database_stats()
+            assert stats['master_co2_data'] == 1
+            assert stats['co2_range'] == {'min_co2': 1.0, 'max_co2': 3.0, 'avg_co2': 2.0}
+        finally:
+            manager.close()
+
+    def test_bound_recompute_uses_index(self, db_path):
+        """Removing an extreme row re-reads the bound with an index lookup, not a scan"""
+        conn = sqlite3.connect(db_path)
+        plans = [
+            conn.execute(f"""
+                EXPLAIN QUERY PLAN SELECT {aggregate}({column}) FROM master_co2_data
+                WHERE co2_min IS NOT NULL AND co2_max IS NOT NULL
+            """).fetchall()[0][-1]
+            for aggregate, column in (('MIN', 'co2_min'), ('MAX', 'co2_max'))
+        ]
+        conn.close()
+        assert plans == [
+            'SEARCH master_co2_data USING INDEX idx_master_co2_data_co2_min (co2_min>?)',
+            'SEARCH master_co2_data USING INDEX idx_master_co2_data_co2_max (co2_max>?)',
+        ]
+
+    def test_bulk_delete_keeps_range(self, manager, db_path):
+        """Deleting rows extreme-first leaves the remaining range exact"""
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO master_co2_data (category, operation, co2_min, co2_max) VALUES ('Test', 'op', ?, ?)",
+            [(i, 1000 - i) for i in range(500)]
+        )
+        conn.execute("DELETE FROM master_co2_data WHERE co2_min < 400")
+        conn.commit()
+        conn.close()
+        self.assert_matches(manager, db_path)
+
+    def test_snapshot_cached(self, manager, db_path):
+        """Within the TTL the cached snapshot is served"""
+        first = manager.get_database_stats(max_age=60)
+        insert_operation(db_path, 'garment_processes', 'Ütü', 0.1, 0.2)
+        assert manager.get_database_stats(max_age=60) == first
+        assert manager.get_database_stats(max_age=0)['garment_processes'] == first['garment_processes'] + 1
+
+
+class TestStylesFull:
+    """Test cases for bulk style document loading"""
+
+    @pytest.fixture
+    def styles(self, manager):
+        for index in range(3):
+            manager.save_style_data({
+                'styleCode': f'ST-{index}',
+                'productName': f'Ürün {index}',
+                'collection': 'SS25' if index < 2 else 'FW25',
+                'fibers': [{'type': 'Pamuk', 'percentage': 100 - index, 'emissionFactor': 2.1},
+                           {'type': 'Elastan', 'percentage': index, 'emissionFactor': 5.0}],
+                'processes': [{'name': f'İşlem {i}', 'type': 'dyeing', 'factor': 0.5, 'unit': 'kg'}
+                              for i in range(index + 1)]
+            })
+
+    def test_matches_single_style_lookup(self, manager, styles):
+        """Bulk documents are identical to the per-style ones"""
+        documents = manager.get_styles_full(['ST-2', 'ST-0', 'ST-404', 'ST-2'])
+        assert list(documents) == ['ST-2', 'ST-0']
+        assert len(documents['ST-2']['processes']) == 3
+        assert [fiber['fiber_type'] for fiber in documents['ST-0']['fibers']] == ['Pamuk', 'Elastan']
+        for code, document in documents.items():
+            assert manager.get_style_data(code) == document
+        assert manager.get_style_data('ST-404') is None
+
+    def test_collection_full_documents(self, manager, styles):
+        """Collections can be returned as full style documents"""
+        documents = manager.get_styles_by_collection('SS25', full=True)
+        assert sorted(document['style']['style_code'] for document in documents) == ['ST-0', 'ST-1']
+        assert all(document['fibers'] and document['processes'] for document in documents)
+        assert len(manager.get_styles_by_collection('SS25')) == 2
+
+
+class TestSaveStyles:
+    """Test cases for bulk style ingestion"""
+
+    def style(self, code, processes=(), **fields):
+        return {
+            'styleCode': code,
+            'productName': fields.get('productName', code),
+            'collection': 'SS25',
+            'fibers': [{'type': 'Pamuk', 'percentage': 100, 'emissionFactor': 2.1}],
+            'processes': list(processes),
+        }
+
+    def test_bulk_insert(self, manager):
+        """Every style and child row is written in one call"""
+        styles = [self.style(f'ST-{i}', [{'name': 'Boyama', 'factor': 0.5}] * i) for i in range(50)]
+        style_ids = manager.save_styles(styles)
+        assert len(style_ids) == 50
+        documents = manager.get_styles_full(list(style_ids))
+        assert len(documents['ST-7']['processes']) == 7
+        assert documents['ST-7']['style']['id'] == style_ids['ST-7']
+
+    def test_upsert_replaces_children(self, manager, db_path):
+        """Saving an existing style_code updates it and replaces fibers/processes"""
+        factor_id = insert_operation(db_path, 'garment_processes', 'Dikim', 0.2, 0.4)
+        process = {'name': 'Dikim', 'factorTable': 'garment_processes', 'factorId': factor_id}
+        style_id = manager.save_style_data(self.style('ST-1', [process, process]))
+
+        updated = manager.save_styles([self.style('ST-1', [process], productName='Yeni')])
+        assert updated == {'ST-1': style_id}
+
+        document = manager.get_style_data('ST-1')
+        assert document['style']['product_name'] == 'Yeni'
+        assert len(document['fibers']) == 1
+        assert len(document['processes']) == 1
+
+        conn = sqlite3.connect(db_path)
+        dependents = conn.execute(
+            "SELECT dependent_id FROM co2_factor_dependencies WHERE dependent_type = 'style_process'"
+        ).fetchall()
+        conn.close()
+        assert dependents == [(document['processes'][0]['id'],)]
+
+    def test_failed_batch_is_rolled_back(self, manager):
+        """A failing style leaves no partial writes behind"""
+        styles = [self.style('ST-1'), self.style('ST-2')]
+        styles[1]['fibers'] = [{'type': object()}]
+        with pytest.raises(sqlite3.Error):
+            manager.save_styles(styles)
+        assert manager.get_style_data('ST-1') is None
+
+
+class TestWriteBehindQueue:
+    """Test cases for batched calculation history writes"""
+
+    def test_group_commit_batches_concurrent_writes(self, manager):
+        """Concurrent saves share transactions and still get their own ids"""
+        batches = []
+
+        def write_batch(calculations):
+            batches.append(len(calculations))
+            time.sleep(0.005)  # saves arriving during a commit join the next batch
+            return manager._write_co2_calculations(calculations)
+
+        manager.calculation_writer = WriteBehindQueue(write_batch, durability='group')
+        ids = []
+        threads = [
+            threading.Thread(target=lambda i=i: ids.append(
+                manager.save_co2_calculation(f'Ürün {i}', 1.0, 2.0, [])))
+            for i in range(40)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(ids)) == 40 and None not in ids
+        assert sum(batches) == 40
+        assert len(batches) < 40
+        assert len(manager.get_co2_calculations(limit=100)) == 40
+
+    def test_group_commit_does_not_wait_for_a_lone_write(self, manager):
+        """A single save is committed right away, not after the flush interval"""
+        manager.calculation_writer = WriteBehindQueue(manager._write_co2_calculations,
+                                                      durability='group', flush_interval_ms=2000)
+        started = time.monotonic()
+        calculation_id = manager.save_co2_calculation('Tişört', 1.0, 3.0, [])
+        assert time.monotonic() - started < 1
+        assert calculation_id is not None
+
+    def test_async_mode_returns_immediately(self, manager):
+        """Async saves return no id and are visible after the flush"""
+        manager.calculation_writer = WriteBehindQueue(manager._write_co2_calculations,
+                                                      durability='async', flush_interval_ms=1000)
+        assert manager.save_co2_calculation('Tişört', 1.0, 3.0, []) is None
+        assert manager.calculation_writer.pending == 1
+
+        calculations = manager.get_co2_calculations()
+        assert [row['total_co2'] for row in calculations] == [2.0]
+        assert manager.calculation_writer.pending == 0
+
+    def test_calculation_response_flags_queued_writes(self, manager):
+        """Async mode reports queued instead of a null calculation_id"""
+        operations = [{'operation_type': 'Dikim', 'co2_min': 0.1, 'co2_max': 0.3}]
+        saved = manager.calculate_product_co2('Tişört', operations)
+        assert isinstance(saved['calculation_id'], int) and 'queued' not in saved
+
+        manager.calculation_writer = WriteBehindQueue(manager._write_co2_calculations, durability='async')
+        queued = manager.calculate_product_co2('Tişört', operations)
+        assert queued['queued'] is True and 'calculation_id' not in queued
+        assert len(manager.get_co2_calculations()) == 2
+
+    def test_failed_item_does_not_drop_batch(self):
+        """A failing record is isolated and the rest of the batch is written"""
+        written = []
+
+        def write_batch(items):
+            if 'bad' in items:
+                raise ValueError('bad item')
+            written.extend(items)
+            return items
+
+        writer = WriteBehindQueue(write_batch, durability='async', flush_interval_ms=200)
+        futures = [writer.submit(item) for item in ('a', 'bad', 'b')]
+        writer.flush()
+
+        assert written == ['a', 'b']
+        assert isinstance(futures[1].exception(), ValueError)
+        assert futures[2].result() == 'b'
+
+    def test_invalid_durability(self):
+        with pytest.raises(ValueError):
+            WriteBehindQueue(lambda items: items, durability='never')
+
+
+class TestCategoryCO2Ranges:
+    """Test cases for the precomputed category range summary"""
+
+    @pytest.fixture
+    def ranges(self, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO master_konfeksiyon (category, name, min_co2_kg, max_co2_kg, avg_co2_kg)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [('Üst Giyim', 'Dikim', 0.2, 0.6, 0.4), ('üst giyim', 'Ütü', 0.1, 0.3, None),
+             ('Alt Giyim', 'Yıkama', 1.0, 3.0, 2.0), ('Alt Giyim Denim', 'Taşlama', 2.0, 5.0, 3.5)]
+        )
+        conn.executemany(
+            "INSERT INTO product_fabric_co2 (category, product, co2_kg_per_kg) VALUES (?, ?, ?)",
+            [('Alt Giyim', 'Jean', 12.0), ('Alt Giyim Denim', 'Jean', 16.0)]
+        )
+        conn.commit()
+        conn.close()
+
+    def test_exact_hit_ignores_case_and_turkish_letters(self, manager, ranges):
+        """Exact keys fold case and Turkish letters and merge spellings"""
+        result = manager.get_co2_range_by_category('UST GIYIM')
+        assert result['konfeksiyon'] == {'min_co2': 0.1, 'max_co2': 0.6, 'avg_co2': 0.4, 'match': 'exact'}
+        assert result['fabric']['match'] == 'fuzzy'
+        assert result['fabric']['min_co2'] is None
+
+    def test_exact_hit_does_not_include_similar_categories(self, manager, ranges):
+        result = manager.get_co2_range_by_category('Alt Giyim')
+        assert result['konfeksiyon']['max_co2'] == 3.0
+        assert result['fabric'] == {'min_co2': 12.0, 'max_co2': 12.0, 'avg_co2': 12.0, 'match': 'exact'}
+
+    def test_fuzzy_fallback_matches_like_scan(self, manager, ranges, db_path):
+        """Without an exact key the result equals the old LIKE aggregate"""
+        result = manager.get_co2_range_by_category('giyim')
+        conn = sqlite3.connect(db_path)
+        expected = conn.execute("""
+            SELECT MIN(min_co2_kg), MAX(max_co2_kg), AVG(avg_co2_kg)
+            FROM master_konfeksiyon WHERE category LIKE '%giyim%'
+        """).fetchone()
+        conn.close()
+        konfeksiyon = result['konfeksiyon']
+        assert konfeksiyon['match'] == 'fuzzy'
+        assert (konfeksiyon['min_co2'], konfeksiyon['max_co2']) == expected[:2]
+        assert konfeksiyon['avg_co2'] == pytest.approx(expected[2])
+
+    def test_rebuild_after_import(self, manager, ranges, db_path):
+        """The summary only changes when it is refreshed"""
+        manager.get_co2_range_by_category('Alt Giyim')
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO product_fabric_co2 (category, co2_kg_per_kg) VALUES ('Alt Giyim', 20.0)")
+        conn.commit()
+        conn.close()
+        assert manager.get_co2_range_by_category('Alt Giyim')['fabric']['max_co2'] == 12.0
+        manager.rebuild_category_co2_ranges()
+        assert manager.get_co2_range_by_category('Alt Giyim')['fabric']['max_co2'] == 20.0
+
+
+class TestQueryPlans:
+    """Test cases for schema indexes and the query plan audit"""
+
+    def test_create_indexes_is_idempotent(self, db_path):
+        """The migration only creates missing indexes"""
+        assert DatabaseSetup(db_path).create_indexes() == []
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP INDEX idx_styles_collection")
+        conn.commit()
+        conn.close()
+        assert DatabaseSetup(db_path).create_indexes() == ['idx_styles_collection']
+
+    def test_hot_queries_do_not_scan_tables(self, db_path):
+        """Every hot DatabaseManager query is served by an index"""
+        insert_operation(db_path, 'finished_product_operations', 'Baskı', 0.1, 0.2)
+        insert_operation(db_path, 'finished_product_operations', 'Nakış', 0.2, 0.3)
+        for table in ('garment_processes', 'master_co2_data'):
+            insert_operation(db_path, table, 'Dikim', 0.1, 0.2)
+            insert_operation(db_path, table, 'Ütü', 0.1, 0.2)
+        conn = sqlite3.connect(db_path)
+        conn.executemany("INSERT INTO master_konfeksiyon (category, name) VALUES (?, ?)",
+                         [('Üst Giyim', 'Dikim'), ('Üst Giyim', 'Ütü')])
+        conn.executemany("INSERT INTO product_fabric_co2 (gender, category, product) VALUES (?, ?, ?)",
+                         [('Men', 'Tops', 'Tişört'), ('Men', 'Tops', 'Gömlek')])
+        conn.commit()
+        conn.close()
+
+        results = query_plan_audit.audit(db_path)
+        assert {result['label'] for result in results} == {label for label, _ in query_plan_audit.HOT_QUERIES}
+        assert [(result['label'], result['plan']) for result in results
+                if result['full_scans'] and not result['known']] == []
+        # A known scan that gets fixed must be removed from KNOWN_SCANS
+        assert {result['label'] for result in results if result['known']} == set(query_plan_audit.KNOWN_SCANS)
+
+    def test_full_scan_detection(self):
+        tables = {'styles'}
+        assert query_plan_audit.full_scans(['SCAN styles'], tables) == ['styles']
+        assert query_plan_audit.full_scans(['SCAN styles USING INDEX idx_styles_created_at'], tables) == ['styles']
+        assert query_plan_audit.full_scans(['SEARCH styles USING INDEX idx_styles_collection (collection=?)'],
+                                           tables) == []
+        assert query_plan_audit.full_scans(['SCAN h'], tables) == []
+
+
+class TestCsvImport:
+    """Test cases for the bulk CSV import, the incremental sync and snapshots"""
+
+    @pytest.fixture
+    def setup(self, db_path, tmp_path):
+        (tmp_path / 'Final_Dosyalar').mkdir()
+        (tmp_path / 'bitmis_urun_islemleri_co2.csv').write_text(
+            "Kategori,İşlem Türü,Açıklama,Uygulanan Ürün Grupları,CO2 (kgCO2e/ürün),Not\n"
+            "Baskı,Serigrafi,,Tops,0.35-0.50,\n"
+            "Baskı,Dijital,,Tops,0.4,\n"
+            "Nakış,Aplike,,Tops,,\n", encoding='utf-8')
+        (tmp_path / 'Final_Dosyalar' / 'Urun_Kumas_CO2_Listesi.csv').write_text(
+            "gender;category;product;fabric_type;composition;usage_hint;co2_kg_per_kg\n"
+            "Men;Tops;Tişört;Süprem;%100 Pamuk;;5.5\n", encoding='utf-8')
+        setup = DatabaseSetup(db_path)
+        setup.csv_dir = str(tmp_path)
+        return setup
+
+    def test_vectorized_parse_matches_row_parser(self):
+        setup = DatabaseSetup(':memory:')
+        values = ['0.35-0.50', ' 0.4 ', '1-2-3', '-0.6', 'abc', 'a-1', '', None, float('nan'), 2.5]
+        parsed = setup.parse_co2_ranges(pd.Series(values, dtype=object))
+        assert list(parsed.itertuples(index=False, name=None)) == [
+            setup.parse_co2_range(value) for value in values]
+
+        # No value contains a range separator
+        single = ['0.4', '', None, 'abc']
+        parsed = setup.parse_co2_ranges(pd.Series(single, dtype=object))
+        assert list(parsed.itertuples(index=False, name=None)) == [
+            setup.parse_co2_range(value) for value in single]
+
+    def test_import_all_sources(self, setup, db_path):
+        assert setup.import_csv_sources() == {'finished_product_operations': 3, 'product_fabric_co2': 1}
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT operation_type, co2_min, co2_max, notes"
+                            " FROM finished_product_operations ORDER BY id").fetchall()
+        ranges = conn.execute("SELECT source, category_key, min_co2 FROM category_co2_ranges").fetchall()
+        conn.close()
+        assert rows == [('Serigrafi', 0.35, 0.5, None), ('Dijital', 0.4, 0.4, None), ('Aplike', None, None, None)]
+        assert ranges == [('fabric', 'tops', 5.5)]
+
+    def test_failed_source_rolls_back_every_table(self, setup, db_path):
+        """A failing table leaves the tables imported before it untouched"""
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE product_fabric_co2")
+        conn.close()
+        with pytest.raises(sqlite3.OperationalError):
+            setup.import_csv_sources()
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM finished_product_operations").fetchone()[0] == 0
+        conn.close()
+
+    def test_invalid_rows_are_rejected(self, setup, db_path, tmp_path):
+        (tmp_path / 'Final_Dosyalar' / 'Urun_Kumas_CO2_Listesi.csv').write_text(
+            "gender;category;product;fabric_type;composition;usage_hint;co2_kg_per_kg\n"
+            "Men;Tops;Tişört;Süprem;%100 Pamuk;;5.5\n"
+            "Men;Tops;Gömlek;Poplin;%100 Pamuk;;yok\n"
+            ";;;;;;4.0\n", encoding='utf-8')
+        (tmp_path / 'bitmis_urun_islemleri_co2.csv').write_text(
+            "Kategori,İşlem Türü,Açıklama,Uygulanan Ürün Grupları,CO2 (kgCO2e/ürün),Not\n"
+            "Baskı,Serigrafi,,Tops,-0.6,\n", encoding='utf-8')
+        report = setup.sync_csv_sources()
+        assert report['product_fabric_co2']['rejected'] == [
+            {'line': 3, 'reason': 'Sayısal olmayan co2_kg_per_kg'},
+            {'line': 4, 'reason': 'Anahtar kolonları boş'}]
+        assert report['product_fabric_co2']['rows'] == 1
+        assert report['finished_product_operations']['rejected'] == [
+            {'line': 2, 'reason': 'Geçersiz CO2 aralığı'}]
+
+    def test_parse_in_worker_processes(self, setup, db_path):
+        """Sources parsed in a process pool are written by the caller"""
+        parallel = setup.sync_csv_sources(workers=2)
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT * FROM product_fabric_co2").fetchall()
+        conn.close()
+        assert parallel['finished_product_operations']['inserted'] == 3
+        assert parallel['product_fabric_co2']['parse_ms'] >= 0
+        assert [row[1:5] for row in rows] == [('Men', 'Tops', 'Tişört', 'Süprem')]
+
+    def test_stream_import_in_chunks(self, setup, db_path, tmp_path):
+        """Chunks are staged and swapped in; the table keeps only the new rows"""
+        setup.import_csv_sources()
+        (tmp_path / 'Final_Dosyalar' / 'Urun_Kumas_CO2_Listesi.csv').write_text(
+            "gender;category;product;fabric_type;composition;usage_hint;co2_kg_per_kg\n"
+            "Women;Tops;Bluz;Viskon;%100 Viskon;;4.1\n"
+            "Women;Tops;Elbise;Krep;%100 Polyester;;yok\n"
+            "Women;Tops;Tunik;Poplin;%100 Pamuk;;3.2\n", encoding='utf-8')
+        result = setup.stream_csv_source('product_fabric_co2', chunk_rows=1)
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT product, co2_kg_per_kg FROM product_fabric_co2 ORDER BY id").fetchall()
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        assert (result['rows'], result['rejected']) == (2, 1)
+        assert result['rejected_sample'] == [{'line': 3, 'reason': 'Sayısal olmayan co2_kg_per_kg'}]
+        assert rows == [('Bluz', 4.1), ('Tunik', 3.2)]
+        assert 'product_fabric_co2_staging' not in tables
+
+    def test_reference_snapshot_replaces_csv_parsing(self, setup, tmp_path, monkeypatch):
+        """A snapshot built from the same CSV content is read instead of the CSV"""
+        setup.snapshot_dir = str(tmp_path / 'reference')
+        assert setup.build_reference_snapshots()['finished_product_operations']['rows'] == 3
+        assert setup.build_reference_snapshots()['finished_product_operations'] == {'status': 'unchanged'}
+
+        frame = reference_snapshot.load_frame('finished_product_operations', ['co2_min', 'co2_max'],
+                                              snapshot_dir=setup.snapshot_dir)
+        assert [str(dtype) for dtype in frame.dtypes] == ['float64', 'float64']
+        assert frame['co2_max'].tolist()[:2] == [0.5, 0.4]
+
+        def parse_csv(*args):
+            raise AssertionError('CSV parsed although the snapshot is fresh')
+
+        monkeypatch.setattr(DatabaseSetup, '_read_csv_source', parse_csv)
+        assert setup.import_csv_sources() == {'finished_product_operations': 3, 'product_fabric_co2': 1}
+        monkeypatch.undo()
+
+        (tmp_path / 'bitmis_urun_islemleri_co2.csv').write_text(
+            "Kategori,İşlem Türü,Açıklama,Uygulanan Ürün Grupları,CO2 (kgCO2e/ürün),Not\n"
+            "Baskı,Serigrafi,,Tops,0.35-0.50,\n", encoding='utf-8')
+        assert len(setup.load_csv_source('finished_product_operations')['data']) == 1
+
+    def test_snapshot_keeps_column_types(self, tmp_path):
+        """Integers, booleans and dates read back from a snapshot keep their types"""
+        data = pd.DataFrame({
+            'row_no': [1, 2, None],
+            'active': [True, None, False],
+            'valid_from': [date(2024, 1, 2), None, date(2024, 3, 4)],
+            'name': ['Baskı', None, 'Nakış'],
+            'co2_min': [1, None, 2.5],
+        }, dtype=object)
+        reference_snapshot.write_snapshot('typed', data, ['co2_min'], 'sha', [], str(tmp_path))
+
+        for stale in (None, 'typed.arrow'):
+            if stale:
+                # Parquet copy is read when the Arrow file is missing
+                (tmp_path / stale).unlink()
+            restored, rejected = reference_snapshot.read_source('typed', 'sha', str(tmp_path))
+            assert rejected == []
+            assert restored.to_dict('list') == {
+                'row_no': [1, 2, None],
+                'active': [True, None, False],
+                'valid_from': [date(2024, 1, 2), None, date(2024, 3, 4)],
+                'name': ['Baskı', None, 'Nakış'],
+                'co2_min': [1.0, None, 2.5],
+            }
+            assert [type(value) for value in restored['row_no'][:2]] == [int, int]
+
+    def test_snapshot_without_pyarrow(self, setup, monkeypatch):
+        monkeypatch.setattr(reference_snapshot, 'pa', None)
+        with pytest.raises(RuntimeError):
+            setup.build_reference_snapshots()
+        assert len(setup.load_csv_source('finished_product_operations')['data']) == 3
+
+    def test_sync_skips_unchanged_files(self, setup):
+        first = setup.sync_csv_sources()
+        assert first['finished_product_operations']['inserted'] == 3
+        assert setup.sync_csv_sources() == {'finished_product_operations': {'status': 'unchanged'},
+                                            'product_fabric_co2': {'status': 'unchanged'}}
+
+    def test_sync_applies_row_diff_in_place(self, setup, db_path, tmp_path):
+        """Changed rows keep their ids; only the diff is written"""
+        setup.sync_csv_sources()
+        conn = sqlite3.connect(db_path)
+        ids = dict(conn.execute("SELECT operation_type, id FROM finished_product_operations"))
+        (tmp_path / 'bitmis_urun_islemleri_co2.csv').write_text(
+            "Kategori,İşlem Türü,Açıklama,Uygulanan Ürün Grupları,CO2 (kgCO2e/ürün),Not\n"
+            "Baskı,Serigrafi,,Tops,0.35-0.50,\n"
+            "Baskı,Dijital,,Tops,0.5,\n"
+            "Nakış,Zincir,,Tops,0.7,\n", encoding='utf-8')
+
+        report = setup.sync_csv_sources()
+        rows = dict(conn.execute("SELECT operation_type, id FROM finished_product_operations"))
+        dijital = conn.execute("SELECT co2_min FROM finished_product_operations WHERE id = ?",
+                               (ids['Dijital'],)).fetchone()
+        conn.close()
+        assert {key: report['finished_product_operations'][key] for key in ('inserted', 'updated', 'deleted')} \
+            == {'inserted': 1, 'updated': 1, 'deleted': 1}
+        assert report['finished_product_operations']['updated_ids'] == [ids['Dijital']]
+        assert report['product_fabric_co2'] == {'status': 'unchanged'}
+        assert set(rows) == {'Serigrafi', 'Dijital', 'Zincir'}
+        assert (rows['Serigrafi'], rows['Dijital']) == (ids['Serigrafi'], ids['Dijital'])
+        assert dijital == (0.5,)
+
+    def test_sync_duplicate_key_insert_touches_one_row(self, setup, db_path, tmp_path):
+        """A new row sharing a key with existing rows does not shift their keys"""
+        header = "Kategori,İşlem Türü,Açıklama,Uygulanan Ürün Grupları,CO2 (kgCO2e/ürün),Not\n"
+        csv_file = tmp_path / 'bitmis_urun_islemleri_co2.csv'
+        csv_file.write_text(header + "Baskı,Dijital,A4,Tops,0.3-0.4,\n"
+                                     "Baskı,Dijital,A3,Tops,0.5-0.6,\n"
+                                     "Baskı,Dijital,A2,Tops,0.7-0.8,\n", encoding='utf-8')
+        setup.sync_csv_sources()
+        conn = sqlite3.connect(db_path)
+        before = dict(conn.execute("SELECT description, id FROM finished_product_operations"))
+
+        csv_file.write_text(header + "Baskı,Dijital,A5,Tops,0.2-0.3,\n"
+                                     "Baskı,Dijital,A4,Tops,0.3-0.4,\n"
+                                     "Baskı,Dijital,A3,Tops,0.5-0.6,\n"
+                                     "Baskı,Dijital,A2,Tops,0.7-0.9,\n", encoding='utf-8')
+        report = setup.sync_csv_sources()['finished_product_operations']
+        after = dict(conn.execute("SELECT description, id FROM finished_product_operations"))
+        manifest = sorted(row_id for (row_id,) in conn.execute(
+            "SELECT row_id FROM csv_import_rows WHERE source = 'finished_product_operations'"))
+        conn.close()
+        assert (report['inserted'], report['updated'], report['deleted']) == (1, 1, 0)
+        assert report['updated_ids'] == [before['A2']]
+        assert {key: after[key] for key in before} == before
+        assert manifest == sorted(after.values())
+
+    def test_first_sync_matches_existing_rows(self, setup, db_path):
+        """Without a manifest the sync adopts the rows of a full import"""
+        setup.import_csv_sources()
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO finished_product_operations (category, operation_type) VALUES ('Elle', 'Eklenen')")
+        conn.commit()
+        before = conn.execute("SELECT * FROM finished_product_operations ORDER BY id").fetchall()
+
+        report = setup.sync_csv_sources()
+        after = conn.execute("SELECT * FROM finished_product_operations ORDER BY id").fetchall()
+        conn.close()
+        assert [report[name]['inserted'] + report[name]['updated'] + report[name]['deleted']
+                for name in report] == [0, 0]
+        assert after == before
+        assert setup.sync_csv_sources()['finished_product_operations'] == {'status': 'unchanged'}
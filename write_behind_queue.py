@@ -0,0 +1,177 @@
+"""
+Zero@Design - Write-Behind Kuyruğu
+İstek yolundaki küçük INSERT'leri arka plan thread'inde toplayıp tek
+transaction'da yazar; SQLite yazma kilidi her istek için ayrı alınmaz.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# sync: istek içinde yazılır (kuyruk kullanılmaz)
+# group: istek kendi satırı commit edilene kadar bekler; lider/takipçi grup
+#        commit'i: kuyruktakiler hemen yazılır, yazma sürerken gelenler sonraki
+#        transaction'da birlikte yazılır (kalıcılık korunur, kayıt ID'si döner)
+# async: istek beklemez; kayıtlar flush aralığı boyunca toplanır, çökmede son
+#        aralıktaki kayıtlar kaybolabilir
+DURABILITY_MODES = ('sync', 'group', 'async')
+
+_FLUSH = object()
+
+
+class WriteBehindQueue:
+    """Kayıtları N ms ya da M satırda bir toplu yazan kuyruk"""
+
+    def __init__(self, write_batch: Callable[[List[Any]], List[Any]],
+                 durability: Optional[str] = None,
+                 flush_interval_ms: Optional[float] = None,
+                 max_batch: Optional[int] = None,
+                 name: str = 'write-behind'):
+        """
+        Args:
+            write_batch: Kayıt listesini tek transaction'da yazıp sonuçlarını
+                         (ör. ID'ler) aynı sırayla döndüren fonksiyon
+            durability: sync, group veya async
+            flush_interval_ms: async modda ilk kayıttan sonra batch'in toplanma
+                               süresi (ms); group modda beklenmez
+            max_batch: Bir transaction'da yazılacak maksimum kayıt
+            name: Yazıcı thread adı
+        """
+        self.write_batch = write_batch
+        self.durability = durability or os.getenv('WRITE_BEHIND_DURABILITY', 'group')
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(f"Geçersiz kalıcılık modu: {self.durability}")
+        self.flush_interval = float(
+            flush_interval_ms if flush_interval_ms is not None
+            else os.getenv('WRITE_BEHIND_FLUSH_MS', '10')
+        ) / 1000
+        self.max_batch = int(max_batch if max_batch is not None
+                             else os.getenv('WRITE_BEHIND_MAX_BATCH', '500'))
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._unwritten = 0
+
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        """Henüz commit edilmemiş kayıt sayısı"""
+        return self._unwritten
+
+    def submit(self, item: Any) -> Future:
+        """
+        Kaydı yazılmak üzere kuyruğa ekle
+
+        Returns:
+            Yazma sonucu (write_batch'in bu kayıt için döndürdüğü değer)
+        """
+        future = Future()
+        if self.durability == 'sync':
+            try:
+                future.set_result(self.write_batch([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_writer()
+        with self._lock:
+            self._unwritten += 1
+        self._queue.put((item, future))
+        return future
+
+    def write(self, item: Any) -> Any:
+        """Kaydı kalıcılık moduna göre yaz; async modda beklemeden None döner"""
+        future = self.submit(item)
+        if self.durability == 'async':
+            return None
+        return future.result()
+
+    def flush(self, timeout: Optional[float] = None):
+        """Kuyruktaki tüm kayıtlar yazılana kadar bekle"""
+        if self.durability == 'sync' or self._thread is None:
+            return
+        future = Future()
+        self._queue.put((_FLUSH, future))
+        future.result(timeout)
+
+    def close(self):
+        """Süreç sonunda bekleyen kayıtları yaz"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            try:
+                self.flush(timeout=30)
+            except Exception as e:
+                logger.error(f"{self.name} kuyruğu kapatılırken yazılamayan kayıtlar: {e}")
+
+    def _ensure_writer(self):
+        """Yazıcı thread'i başlat (fork sonrası yeniden)"""
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != pid or self._thread is None:
+                if self._pid != pid:
+                    # Ebeveynin kuyruğu ve thread'i fork'ta taşınmaz
+                    self._queue = queue.Queue()
+                    self._unwritten = 0
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List:
+        """
+        İlk kayıt gelince max_batch'e kadar topla
+
+        group modda yalnızca o anda kuyrukta bekleyenler alınır; tek kayıt da
+        gecikmeden commit edilir. async modda flush_interval boyunca beklenir.
+        """
+        batch = [self._queue.get()]
+        wait = self.flush_interval if self.durability == 'async' else 0
+        deadline = time.monotonic() + wait
+        # flush() isteği beklemeden o ana kadar gelenleri yazdırır
+        while len(batch) < self.max_batch and batch[-1][0] is not _FLUSH:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [(item, future) for item, future in batch if item is not _FLUSH]
+            if items:
+                self._write(items)
+                with self._lock:
+                    self._unwritten -= len(items)
+            for item, future in batch:
+                if item is _FLUSH:
+                    future.set_result(None)
+
+    def _write(self, items: List):
+        """Batch'i yaz; başarısız olursa hatalı kaydı ayırmak için tek tek dene"""
+        try:
+            results = self.write_batch([item for item, _ in items])
+        except Exception as e:
+            if len(items) == 1:
+                logger.error(f"{self.name} kaydı yazılamadı: {e}")
+                items[0][1].set_exception(e)
+                return
+            logger.warning(f"{self.name} batch yazılamadı, kayıtlar tek tek deneniyor: {e}")
+            for item in items:
+                self._write([item])
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(result)